@@ -0,0 +1,106 @@
+"""
+Simulate dashboard reruns and compare the previous pyplot expense chart
+(new figure per rerun, never closed) with charts.create_expense_chart.
+
+Each rerun renders the chart for the same data, as Streamlit does on every
+widget interaction. Reported per mode: mean rerun time and RSS growth.
+
+Usage:
+    python benchmarks/bench_charts.py [--reruns 1000] [--fmt png]
+"""
+import argparse
+import gc
+import io
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+import charts  # noqa: E402
+
+CATEGORIES = ['Accommodation', 'Food', 'Transportation', 'Activities', 'Miscellaneous']
+MIN_AMOUNTS = [20000, 20000, 10000, 5000, 5000]
+MAX_AMOUNTS = [25000, 25000, 15000, 10000, 10000]
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def pyplot_chart(fmt):
+    # The dashboard's implementation before charts.py
+    x = range(len(CATEGORIES))
+    width = 0.35
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.bar([i - width / 2 for i in x], MAX_AMOUNTS, width, label='Max Amount (¥)', color='#3498db')
+    ax.bar([i + width / 2 for i in x], MIN_AMOUNTS, width, label='Min Amount (¥)', color='#2ecc71')
+    ax.set_title('Budget Breakdown')
+    ax.set_ylabel('Amount (¥)')
+    ax.set_xticks(list(x))
+    ax.set_xticklabels(CATEGORIES, rotation=45, ha='right')
+    ax.legend()
+    plt.tight_layout()
+    buf = io.BytesIO()
+    plt.savefig(buf, format=fmt)
+    buf.seek(0)
+    return buf
+
+
+def uncached_chart(fmt):
+    charts.clear_chart_cache()
+    return charts.create_expense_chart(CATEGORIES, MIN_AMOUNTS, MAX_AMOUNTS, fmt=fmt)
+
+
+def cached_chart(fmt):
+    return charts.create_expense_chart(CATEGORIES, MIN_AMOUNTS, MAX_AMOUNTS, fmt=fmt)
+
+
+def run(render, reruns, fmt):
+    gc.collect()
+    start_rss = rss_mb()
+    start = time.perf_counter()
+    for _ in range(reruns):
+        render(fmt)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return elapsed / reruns * 1000, rss_mb() - start_rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=1000)
+    parser.add_argument("--fmt", choices=charts.CHART_FORMATS, default="png")
+    args = parser.parse_args()
+
+    # Render once so font caches and imports are not counted against the first mode
+    charts.create_expense_chart(CATEGORIES, MIN_AMOUNTS, MAX_AMOUNTS, fmt=args.fmt)
+    charts.clear_chart_cache()
+
+    modes = [
+        ("cached (charts.py)", cached_chart),
+        ("uncached, released figure", uncached_chart),
+        ("pyplot, never closed (before)", pyplot_chart),
+    ]
+    print(f"{args.reruns} reruns, {args.fmt}")
+    print(f"{'mode':<32} {'ms/rerun':>9} {'RSS growth MB':>14}")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # pyplot warns once more than 20 figures are open
+        for label, render in modes:
+            per_rerun, growth = run(render, args.reruns, args.fmt)
+            print(f"{label:<32} {per_rerun:>9.2f} {growth:>14.1f}")
+    print(f"open pyplot figures after run: {len(plt.get_fignums())}")
+
+
+if __name__ == "__main__":
+    main()
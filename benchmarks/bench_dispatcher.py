@@ -0,0 +1,95 @@
+"""
+Throughput and latency of concurrent parses: a lock around the shared
+pipeline against nlp_dispatcher.NlpDispatcher.
+
+Requests come from 1, 2, 4, ... threads, the way simultaneous Streamlit
+sessions do. With the lock every request runs `nlp(text)` on its own; with
+the dispatcher, requests that arrive together share one `nlp.pipe` batch.
+Reported per cell: requests per second and p50/p95 latency, plus the mean
+batch size the dispatcher formed.
+
+Usage:
+    python benchmarks/bench_dispatcher.py [--model en_core_web_trf] [--concurrency 1 2 4 8 16]
+                                          [--requests 64] [--wait-ms 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inference_profile  # noqa: E402
+from nlp_dispatcher import NlpDispatcher  # noqa: E402
+
+REQUESTS = [
+    "Trip from Mumbai to Goa from 3-13th april 2025 for 2 adults, budget 50000 rupees.",
+    "I want to travel from London to Tokyo for two weeks in spring with my wife and two children.",
+    "Family of 4 heading to Bali on 12th june for a week. Prefer resorts and a cooking class.",
+    "Solo backpacking trip across Vietnam, starting in Hanoi and ending in Ho Chi Minh City.",
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run(parse, texts, concurrency):
+    def timed_parse(text):
+        start = time.perf_counter()
+        parse(text)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed_parse, texts))
+    elapsed = time.perf_counter() - start
+    return len(texts) / elapsed, statistics.median(latencies), percentile(latencies, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="en_core_web_trf")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    try:
+        import spacy
+        nlp = spacy.load(args.model)
+    except (ImportError, OSError):
+        sys.exit(f"spacy and the {args.model} package are required for this benchmark")
+
+    profile = inference_profile.profile_from_env()
+    inference_profile.apply_profile(nlp, profile)
+    for text in REQUESTS:
+        nlp(text)  # Warm up
+
+    lock = threading.Lock()
+
+    def locked_parse(text):
+        with lock, inference_profile.inference_guard():
+            return nlp(text)
+
+    texts = [REQUESTS[i % len(REQUESTS)] for i in range(args.requests)]
+    print(f"{args.model}, {args.requests} requests per cell, batch size {profile.batch_size}, "
+          f"window {args.wait_ms} ms")
+    print(f"{'concurrency':>11} {'mode':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch':>6}")
+    for concurrency in args.concurrency:
+        rps, p50, p95 = run(locked_parse, texts, concurrency)
+        print(f"{concurrency:>11} {'lock':>10} {rps:>8.2f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {1:>6.2f}")
+
+        dispatcher = NlpDispatcher(nlp, profile, max_wait_ms=args.wait_ms)
+        rps, p50, p95 = run(dispatcher.parse, texts, concurrency)
+        batch = dispatcher.stats()["mean_batch"]
+        dispatcher.close()
+        print(f"{concurrency:>11} {'dispatcher':>10} {rps:>8.2f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {batch:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Memory and lookup latency of the location gazetteer per population threshold.
+
+For every threshold, and for both the compact `gazetteer.Gazetteer` and the
+dict-of-dicts layout it replaces, a fresh process loads the geonames
+records, builds the gazetteer and reports:
+
+    entries        names in the gazetteer
+    retained MB    bytes allocated by the gazetteer itself (tracemalloc)
+    RSS MB         resident size of the process after building it
+    hit/miss us    microseconds per get() for known places and for plain words
+    words          plain English words that match a place (false positives)
+
+Usage:
+    python benchmarks/bench_gazetteer.py [--thresholds 500 1000 5000 15000 50000 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gazetteer  # noqa: E402
+
+# Words a travel request is full of; every one found in the gazetteer is a false positive
+WORDS = ["hotel", "beach", "museum", "budget", "week", "family", "trip", "flight", "train", "food", "nice",
+         "reading", "bath", "split", "mobile", "sale", "deal", "battle", "hope", "orange", "university",
+         "union", "liberty", "paradise", "eagle", "marina", "temple", "garden", "harbor", "plain"]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Peak, in KB on Linux
+
+
+def per_lookup_us(lookup, keys, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            lookup(key)
+    return (time.perf_counter() - start) / (rounds * len(keys)) * 1e6
+
+
+def worker(args):
+    cache = gazetteer.geonamescache.GeonamesCache(
+        min_city_population=gazetteer._dataset_population(args.threshold))
+    cities, countries = list(cache.get_cities().values()), list(cache.get_countries().values())
+    del cache
+
+    gc.collect()
+    tracemalloc.start()
+    built = gazetteer.build_gazetteer(args.threshold, cities=cities, countries=countries)
+    if args.layout == "dict":
+        built = dict(built.items())
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del cities, countries
+    gc.collect()
+
+    keys = list(built)
+    hits = keys[::max(1, len(keys) // 2000)]
+    misses = [word for word in WORDS if word not in built]
+    print(json.dumps({
+        "threshold": args.threshold, "layout": args.layout, "entries": len(built),
+        "retained_mb": retained / 1024 / 1024, "rss_mb": rss_mb(),
+        "hit_us": per_lookup_us(built.get, hits, args.rounds),
+        "miss_us": per_lookup_us(built.get, misses or WORDS, args.rounds),
+        "words": len(WORDS) - len(misses),
+    }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", type=int, nargs="+", default=[500, 1000, 5000, 15000, 50000, 100000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--threshold", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--layout", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.layout:
+        worker(args)
+        return
+    if gazetteer.geonamescache is None:
+        sys.exit("geonamescache is required for this benchmark")
+
+    print(f"{'min pop':>8} {'layout':>8} {'entries':>8} {'retained MB':>12} {'RSS MB':>7} "
+          f"{'hit us':>7} {'miss us':>8} {'words':>6}")
+    for threshold in args.thresholds:
+        for layout in ("dict", "compact"):
+            command = [sys.executable, os.path.abspath(__file__), "--threshold", str(threshold),
+                       "--layout", layout, "--rounds", str(args.rounds)]
+            row = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+            print(f"{row['threshold']:>8} {row['layout']:>8} {row['entries']:>8} {row['retained_mb']:>12.2f} "
+                  f"{row['rss_mb']:>7.1f} {row['hit_us']:>7.2f} {row['miss_us']:>8.2f} "
+                  f"{row['words']:>3}/{len(WORDS)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput and latency of the transformer pipeline across CPU profiles.
+
+For every torch thread count a fresh process loads the model with
+inference_profile.apply_profile (torch thread pools are process-wide), then
+parses the same travel requests from 1, 2, 4, ... concurrent threads, the way
+simultaneous Streamlit sessions do. Reported per cell: requests per second
+and p50/p95 latency.
+
+Usage:
+    python benchmarks/bench_inference.py [--model en_core_web_trf] [--threads 1 2 4]
+                                         [--concurrency 1 2 4 8] [--requests 64]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import inference_profile  # noqa: E402
+
+REQUESTS = [
+    "Trip from Mumbai to Goa from 3-13th april 2025 for 2 adults, budget 50000 rupees.",
+    "I want to travel from London to Tokyo for two weeks in spring with my wife and two children. "
+    "We like museums, street food and hiking, and our budget is around $6,000.",
+    "Family of 4 heading to Bali on 12th june for a week. Prefer resorts, vegetarian meals and a "
+    "cooking class. Flying from Singapore.",
+    "Solo backpacking trip across Vietnam, starting in Hanoi and ending in Ho Chi Minh City, "
+    "for a month on a cheap budget. Trains and buses only.",
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def worker(args):
+    import spacy
+
+    profile = inference_profile.InferenceProfile(threads=args.threads[0], interop_threads=1,
+                                                 batch_size=args.batch_size, max_chunk_chars=args.max_chunk_chars)
+    nlp = inference_profile.apply_profile(spacy.load(args.model), profile)
+    for text in REQUESTS:
+        inference_profile.parse(nlp, text, profile)  # Warm up
+
+    texts = [REQUESTS[i % len(REQUESTS)] for i in range(args.requests)]
+
+    def timed_parse(text):
+        start = time.perf_counter()
+        inference_profile.parse(nlp, text, profile)
+        return time.perf_counter() - start
+
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(timed_parse, texts))
+        elapsed = time.perf_counter() - start
+        print(json.dumps({"threads": profile.threads, "concurrency": concurrency,
+                          "rps": len(texts) / elapsed, "p50": statistics.median(latencies),
+                          "p95": percentile(latencies, 0.95)}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="en_core_web_trf")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=inference_profile.DEFAULT_PROFILE.batch_size)
+    parser.add_argument("--max-chunk-chars", type=int, default=inference_profile.DEFAULT_PROFILE.max_chunk_chars)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    try:
+        import spacy
+        spacy.util.get_package_path(args.model)
+    except ImportError:
+        sys.exit(f"spacy and the {args.model} package are required for this benchmark")
+
+    print(f"{args.model}, {args.requests} requests per cell, {os.cpu_count()} CPUs")
+    print(f"{'threads':>7} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for threads in args.threads:
+        command = [sys.executable, os.path.abspath(__file__), "--worker", "--model", args.model,
+                   "--threads", str(threads), "--requests", str(args.requests),
+                   "--batch-size", str(args.batch_size), "--max-chunk-chars", str(args.max_chunk_chars),
+                   "--concurrency", *map(str, args.concurrency)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        for line in output.splitlines():
+            row = json.loads(line)
+            print(f"{row['threads']:>7} {row['concurrency']:>11} {row['rps']:>8.2f} "
+                  f"{row['p50'] * 1000:>8.1f} {row['p95'] * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare number_normalizer.parse_number with word2number's w2n.word_to_num.
+
+Both parse the phrases extractors see in travel requests ("two weeks",
+"twenty-one", "a couple"). Reported per parser: microseconds per call with a
+cold and a warm memo cache, and how many phrases each parses to the expected
+value. w2n is skipped when word2number is not installed.
+
+Usage:
+    python benchmarks/bench_numbers.py [--rounds 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from number_normalizer import parse_number  # noqa: E402
+
+try:
+    from word2number import w2n
+except ImportError:
+    w2n = None
+
+PHRASES = {
+    "3": 3, "14": 14, "50,000": 50000, "1,50,000": 150000, "2.5": 2.5, "1.5k": 1500, "2 lakh": 200000,
+    "one": 1, "two": 2, "ten": 10, "twelve": 12, "twenty-one": 21, "thirty five": 35,
+    "one hundred and fifty": 150, "two thousand five hundred": 2500, "a": 1, "an": 1,
+    "a couple": 2, "a couple of": 2, "a dozen": 12, "two dozen": 24,
+}
+
+
+def w2n_parse(text):
+    try:
+        return w2n.word_to_num(text)
+    except ValueError:
+        return None
+
+
+def timed(parse, rounds, clear=None):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if clear:
+            clear()
+        for phrase in PHRASES:
+            parse(phrase)
+    return (time.perf_counter() - start) / (rounds * len(PHRASES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = [
+        ("parse_number, cold cache", timed(parse_number, args.rounds, parse_number.cache_clear), parse_number),
+        ("parse_number, warm cache", timed(parse_number, args.rounds), parse_number),
+    ]
+    if w2n is not None:
+        rows.append(("w2n.word_to_num", timed(w2n_parse, args.rounds), w2n_parse))
+    else:
+        print("word2number is not installed; skipping w2n")
+
+    print(f"{len(PHRASES)} phrases x {args.rounds} rounds")
+    print(f"{'parser':<28} {'us/call':>8} {'correct':>9}")
+    for label, per_call, parse in rows:
+        correct = sum(parse(phrase) == expected for phrase, expected in PHRASES.items())
+        print(f"{label:<28} {per_call:>8.2f} {correct:>4}/{len(PHRASES)}")
+
+
+if __name__ == "__main__":
+    main()
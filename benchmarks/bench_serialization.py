@@ -0,0 +1,69 @@
+"""
+Compare the pretty printer used so far (json.dumps(..., indent=2)) with the
+compact, orjson and gzip paths in serialization.py.
+
+Usage:
+    python benchmarks/bench_serialization.py [--count 200] [--days 14]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization  # noqa: E402
+from sample_data import make_sample_itineraries  # noqa: E402
+
+
+def measure(label, encode, itineraries, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payloads = [encode(itinerary) for itinerary in itineraries]
+        best = min(best, time.perf_counter() - start)
+    size = sum(len(payload) for payload in payloads)
+    return label, size, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--days", type=int, default=14)
+    args = parser.parse_args()
+
+    itineraries = make_sample_itineraries(args.count, args.days)
+    rows = [
+        measure("json indent=2 (current)", lambda d: json.dumps(d, indent=2).encode("utf-8"), itineraries),
+        measure("json compact", lambda d: serialization.dumps_bytes(d, compact=True, fast=False), itineraries),
+    ]
+    if serialization.orjson is not None:
+        rows.append(measure("orjson indent=2", lambda d: serialization.dumps_bytes(d), itineraries))
+        rows.append(measure("orjson compact", lambda d: serialization.dumps_bytes(d, compact=True), itineraries))
+    else:
+        print("orjson is not installed; skipping the fast encoder rows")
+    rows.append(measure("compact + gzip", lambda d: gzip.compress(serialization.dumps_bytes(d, compact=True), 6),
+                        itineraries, repeat=2))
+
+    baseline_size, baseline_time = rows[0][1], rows[0][2]
+    print(f"{len(itineraries)} itineraries x {args.days} days")
+    print(f"{'encoder':<26} {'bytes':>12} {'vs current':>11} {'encode ms':>10} {'speedup':>8}")
+    for label, size, seconds in rows:
+        print(f"{label:<26} {size:>12,} {size / baseline_size:>10.0%} {seconds * 1000:>10.1f} {baseline_time / seconds:>7.1f}x")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "itineraries.jsonl.gz")
+        start = time.perf_counter()
+        with serialization.JsonLinesWriter(path) as writer:
+            for itinerary in itineraries:
+                writer.write(itinerary)
+        elapsed = time.perf_counter() - start
+        print(f"\nStreaming writer: {writer.count} itineraries -> {os.path.getsize(path):,} bytes (gzip JSON Lines) "
+              f"in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Compare the itinerary views built with one st.markdown call per card (the
+previous display_itinerary_tabs) with the batched templates.py sections.
+
+Both scripts render the day, accommodation, dining, attraction and essential
+info sections of a synthetic itinerary with streamlit's AppTest. Reported:
+median rerun time, number of elements and the serialized size of the element
+protos, which is what a rerun sends over the websocket.
+
+Usage:
+    python benchmarks/bench_templates.py [--days 14] [--reruns 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sample_data import make_sample_itinerary  # noqa: E402
+
+SCRIPT_HEADER = f"""
+import json
+import sys
+sys.path.insert(0, {REPO_ROOT!r})
+import streamlit as st
+itinerary_json = json.load(open(ITINERARY_PATH))
+"""
+
+PER_CARD_SCRIPT = '''
+st.markdown("<h2 style='text-align: center;'>Daily Itinerary</h2>", unsafe_allow_html=True)
+for day in itinerary_json.get("days", []):
+    with st.expander(f"Day {day.get('day_number')} - {day.get('title', '')}"):
+        st.markdown("""
+            <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
+                <h3 style='color: #1E88E5; margin: 0;'>Morning</h3>
+                <p>{}</p>
+                <h3 style='color: #1E88E5; margin-top: 1rem;'>Afternoon</h3>
+                <p>{}</p>
+                <h3 style='color: #1E88E5; margin-top: 1rem;'>Evening</h3>
+                <p>{}</p>
+            </div>
+        """.format(day.get("morning", "No activities specified"), day.get("afternoon", "No activities specified"),
+                   day.get("evening", "No activities specified")), unsafe_allow_html=True)
+        meals = day.get("meals", {})
+        st.markdown("""
+            <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
+                <h3 style='color: #EF6C00; margin: 0;'>Meals</h3>
+                <p><b>Breakfast:</b> {}</p>
+                <p><b>Lunch:</b> {}</p>
+                <p><b>Dinner:</b> {}</p>
+            </div>
+        """.format(meals.get("breakfast", "Not specified"), meals.get("lunch", "Not specified"),
+                   meals.get("dinner", "Not specified")), unsafe_allow_html=True)
+        st.markdown("""
+            <div style='background-color: #E8F5E9; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
+                <h3 style='color: #43A047; margin: 0;'>Accommodation</h3>
+                <p>{}</p>
+            </div>
+        """.format(day.get("accommodation", "Not specified")), unsafe_allow_html=True)
+
+st.markdown("<h2 style='text-align: center;'>Accommodations</h2>", unsafe_allow_html=True)
+for acc in itinerary_json.get("accommodations", []):
+    with st.expander(acc.get("name", "Unnamed Accommodation")):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.markdown("""
+                <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px;'>
+                    <p><b>Price Range:</b> {}</p>
+                    <p><b>Description:</b> {}</p>
+                </div>
+            """.format(acc.get("price_range", "Not specified"), acc.get("description", "No description available")),
+                unsafe_allow_html=True)
+        with col2:
+            booking_url = f"https://www.booking.com/search.html?ss={acc.get('name', '')}"
+            st.markdown(f"""
+                <div style='text-align: center;'>
+                    <a href="{booking_url}" target="_blank" style="
+                        display: inline-block;
+                        padding: 0.5rem 1rem;
+                        background-color: #1E88E5;
+                        color: white;
+                        text-decoration: none;
+                        border-radius: 5px;
+                        margin: 0.5rem 0;
+                        font-weight: bold;
+                        transition: background-color 0.3s;">
+                        🏨 Book Now
+                    </a>
+                </div>
+                <div style='background-color: #E8F5E9; padding: 1rem; border-radius: 10px; margin-top: 1rem;'>
+                    <p>✓ Direct booking available</p>
+                    <p>✓ Best price guarantee</p>
+                    <p>✓ Free cancellation</p>
+                </div>
+            """, unsafe_allow_html=True)
+
+st.markdown("<h2 style='text-align: center;'>Dining Recommendations</h2>", unsafe_allow_html=True)
+for restaurant in itinerary_json.get("dining", []):
+    with st.expander(restaurant.get("name", "Unnamed Restaurant")):
+        st.markdown("""
+            <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px;'>
+                <p><b>Cuisine:</b> {}</p>
+                <p><b>Price Range:</b> {}</p>
+                <p><b>Meal Type:</b> {}</p>
+            </div>
+        """.format(restaurant.get("cuisine", "Not specified"), restaurant.get("price_range", "Not specified"),
+                   restaurant.get("meal_type", "Not specified")), unsafe_allow_html=True)
+
+st.markdown("<h2 style='text-align: center;'>Top Attractions</h2>", unsafe_allow_html=True)
+for attraction in itinerary_json.get("attractions", []):
+    with st.expander(attraction.get("name", "Unnamed Attraction")):
+        st.markdown("""
+            <div style='background-color: #E8F5E9; padding: 1rem; border-radius: 10px;'>
+                <p><b>Description:</b> {}</p>
+                <p><b>Visit Duration:</b> {}</p>
+            </div>
+        """.format(attraction.get("description", "No description available"),
+                   attraction.get("visit_duration", "Not specified")), unsafe_allow_html=True)
+
+essential_info = itinerary_json.get("essential_info", {})
+st.markdown("<h2 style='text-align: center;'>Essential Information</h2>", unsafe_allow_html=True)
+st.markdown("<h3 style='color: #1E88E5;'>💡 Travel Tips</h3>", unsafe_allow_html=True)
+for tip in itinerary_json.get("travel_tips", []):
+    st.markdown(f"• {tip}")
+col1, col2 = st.columns(2)
+with col1:
+    st.markdown("""
+        <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
+            <h3 style='color: #1E88E5; margin: 0;'>📋 Important Information</h3>
+            <p style='margin: 0.5rem 0;'><b>🛂 Visa:</b> {}</p>
+            <p style='margin: 0.5rem 0;'><b>🆘 Emergency:</b> {}</p>
+            <p style='margin: 0.5rem 0;'><b>🏺 Local Customs:</b> {}</p>
+        </div>
+    """.format(essential_info.get("visa_requirements", "Not specified"),
+               essential_info.get("emergency_contacts", "Not specified"),
+               essential_info.get("local_customs", "Not specified")), unsafe_allow_html=True)
+with col2:
+    st.markdown("""
+        <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
+            <h3 style='color: #EF6C00; margin: 0;'>🔍 Additional Information</h3>
+            <p style='margin: 0.5rem 0;'><b>🛡️ Safety:</b> {}</p>
+            <p style='margin: 0.5rem 0;'><b>🗣️ Language:</b> {}</p>
+            <p style='margin: 0.5rem 0;'><b>💱 Currency:</b> {}</p>
+        </div>
+    """.format(essential_info.get("safety_tips", "Not specified"),
+               essential_info.get("language", "Not specified"),
+               essential_info.get("currency_exchange", "Not specified")), unsafe_allow_html=True)
+'''
+
+TEMPLATE_SCRIPT = '''
+import templates
+st.markdown(templates.stylesheet(), unsafe_allow_html=True)
+st.markdown(templates.list_section_html("Daily Itinerary", itinerary_json.get("days", []), templates.day_html),
+            unsafe_allow_html=True)
+st.markdown(templates.list_section_html("Accommodations", itinerary_json.get("accommodations", []),
+                                        templates.accommodation_html), unsafe_allow_html=True)
+st.markdown(templates.list_section_html("Dining Recommendations", itinerary_json.get("dining", []),
+                                        templates.dining_html), unsafe_allow_html=True)
+st.markdown(templates.list_section_html("Top Attractions", itinerary_json.get("attractions", []),
+                                        templates.attraction_html), unsafe_allow_html=True)
+st.markdown(templates.essential_info_html(itinerary_json), unsafe_allow_html=True)
+'''
+
+
+def tree_stats(node):
+    """Return (element count, serialized proto bytes) for an AppTest tree."""
+    elements, size = 0, 0
+    proto = getattr(node, "proto", None)
+    children = getattr(node, "children", None)
+    if proto is not None:
+        size += proto.ByteSize()
+        if not children:
+            elements += 1
+    for child in (children or {}).values():
+        child_elements, child_size = tree_stats(child)
+        elements += child_elements
+        size += child_size
+    return elements, size
+
+
+def measure(label, body, itinerary_path, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    script = f"ITINERARY_PATH = {itinerary_path!r}\n" + SCRIPT_HEADER + body
+    at = AppTest.from_string(script, default_timeout=120).run()
+    if at.exception:
+        raise RuntimeError(f"{label}: {at.exception[0].message}")
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    elements, size = tree_stats(at._tree)
+    return label, statistics.median(timings), elements, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        sys.exit("streamlit is required for this benchmark")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        itinerary_path = os.path.join(tmp, "itinerary.json")
+        with open(itinerary_path, "w", encoding="utf-8") as f:
+            json.dump(make_sample_itinerary(days=args.days), f)
+
+        rows = [
+            measure("st.markdown per card (before)", PER_CARD_SCRIPT, itinerary_path, args.reruns),
+            measure("templates.py sections", TEMPLATE_SCRIPT, itinerary_path, args.reruns),
+        ]
+
+    baseline = rows[0]
+    print(f"{args.days}-day itinerary, median of {args.reruns} reruns")
+    print(f"{'renderer':<32} {'rerun ms':>9} {'elements':>9} {'payload bytes':>14} {'vs before':>10}")
+    for label, seconds, elements, size in rows:
+        print(f"{label:<32} {seconds * 1000:>9.1f} {elements:>9} {size:>14,} {size / baseline[3]:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
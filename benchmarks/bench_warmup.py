@@ -0,0 +1,99 @@
+"""
+First-request latency of the extraction pipeline with and without warm-up.
+
+Each run is a fresh process that imports nlp_json (which loads the
+transformer), optionally runs `nlp_json.warmup()`, and then serves two
+requests: `extract_details` plus `generate_prompt` on a travel description
+and `extract_itinerary_json` plus geocoding on an itinerary, neither of which
+the warm-up has seen. The Doc cache is disabled so every run parses. Reported
+per mode: import and warm-up seconds and the first and second request in ms
+(medians over --runs processes).
+
+Usage:
+    python benchmarks/bench_warmup.py [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+REQUEST = ("My partner and I want to go from Berlin to Lisbon for 8 days in late September, "
+           "about 3000 euros, boutique hotels and seafood.")
+ITINERARY = """Destination: Lisbon
+8-day trip
+Budget range: €3,000
+
+Day 1: Alfama
+Date: 22nd September 2025
+* **Morning:** Sao Jorge Castle (€15 entry).
+* **Afternoon:** Lisbon Cathedral and the Alfama viewpoints.
+* **Evening:** Fado show in Alfama.
+* **Meals:**
+    * Breakfast: Fabrica Coffee Roasters (€8-€12)
+    * Lunch: Time Out Market (€15-€25)
+    * Dinner: Cervejaria Ramiro (€40-€60)
+* **Accommodation:** Memmo Alfama (€220-€300 per night)
+"""
+
+
+def first_requests(app):
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        app.generate_prompt(app.extract_details(REQUEST))
+        app.geocode_itinerary(app.extract_itinerary_json(ITINERARY))
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def worker(mode):
+    start = time.perf_counter()
+    import nlp_json
+    imported = time.perf_counter() - start
+    warmup = 0.0
+    if mode == "warm":
+        start = time.perf_counter()
+        nlp_json.warmup()
+        warmup = time.perf_counter() - start
+    first, second = first_requests(nlp_json)
+    print(json.dumps({"import": imported, "warmup": warmup, "first": first, "second": second}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mode", choices=["cold", "warm"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        worker(args.mode)
+        return
+
+    try:
+        import spacy
+        spacy.util.get_package_path("en_core_web_trf")
+    except ImportError:
+        sys.exit("spacy and the en_core_web_trf package are required for this benchmark")
+
+    env = dict(os.environ, SPACY_DOC_CACHE_MB="0")
+    print(f"{args.runs} fresh processes per mode")
+    print(f"{'mode':>6} {'import s':>9} {'warm-up s':>10} {'1st req ms':>11} {'2nd req ms':>11}")
+    for mode in ("cold", "warm"):
+        rows = []
+        for _ in range(args.runs):
+            command = [sys.executable, os.path.abspath(__file__), "--mode", mode]
+            output = subprocess.run(command, check=True, capture_output=True, text=True, env=env, cwd=REPO_ROOT).stdout
+            rows.append(json.loads(output.strip().splitlines()[-1]))
+        median = {key: statistics.median(row[key] for row in rows) for key in rows[0]}
+        print(f"{mode:>6} {median['import']:>9.1f} {median['warmup']:>10.1f} "
+              f"{median['first'] * 1000:>11.1f} {median['second'] * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
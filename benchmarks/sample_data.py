@@ -0,0 +1,66 @@
+"""Synthetic itineraries in the `extract_itinerary_json` shape, used by the benchmarks."""
+
+
+def make_sample_itinerary(days=14, destination="Tokyo"):
+    meal_prices = ["¥800-¥1,500", "¥1,000-¥2,000", "¥2,500-¥4,000"]
+    return {
+        "trip_overview": {
+            "destination": destination,
+            "duration_days": days,
+            "trip_type": "Cultural Tourism",
+            "budget_range": "¥250,000",
+        },
+        "days": [
+            {
+                "day_number": day,
+                "date": f"2025-04-{day:02d}" if day <= 30 else "",
+                "title": f"Exploring district {day}",
+                "morning": f"Visit Senso-ji Temple and walk the Nakamise shopping street (day {day}).",
+                "afternoon": "Explore the Imperial Palace East Garden, then the Edo-Tokyo Museum (¥600).",
+                "evening": "Dinner in Shinjuku and a night view from the Metropolitan Government Building.",
+                "meals": {
+                    "breakfast": f"Bakery near the hotel ({meal_prices[0]})",
+                    "lunch": f"Ramen at Ichiran Shibuya ({meal_prices[1]})",
+                    "dinner": f"Yakitori at Omoide Yokocho ({meal_prices[2]})",
+                },
+                "accommodation": "Hotel Gracery Shinjuku (¥15,000-¥20,000 per night)",
+                "activities": [
+                    "Senso-ji Temple",
+                    "Nakamise shopping street",
+                    "Imperial Palace East Garden",
+                    "Edo-Tokyo Museum",
+                ],
+            }
+            for day in range(1, days + 1)
+        ],
+        "attractions": [
+            {"name": f"Attraction {i}", "description": "A must-visit landmark with panoramic city views and a small museum.",
+             "visit_duration": "2 hours"}
+            for i in range(1, 10)
+        ],
+        "accommodations": [
+            {"name": f"Hotel {i}", "description": "Business hotel two minutes from the station.",
+             "price_range": f"¥{8 + i},000-¥{12 + i},000 / ${55 + i * 5}-${80 + i * 5}"}
+            for i in range(1, 8)
+        ],
+        "dining": [
+            {"name": f"Restaurant {i}", "cuisine": "Japanese", "price_range": meal_prices[i % 3],
+             "meal_type": ["Breakfast", "Lunch", "Dinner"][i % 3]}
+            for i in range(1, 11)
+        ],
+        "transportation": [
+            {"type": "Subway", "details": "Tokyo Metro 24-hour pass ¥600"},
+            {"type": "Train", "details": "Narita Express to Shinjuku ¥3,250"},
+            {"type": "Taxi", "details": "Short rides ¥1,500-¥3,000"},
+        ],
+        "travel_tips": ["Carry cash; many small shops do not take cards."] * 8,
+        "weather": {
+            "temperature_range": {"min": 10, "max": 18, "unit": "Celsius"},
+            "conditions": "Mild with occasional showers",
+            "clothing_recommendations": "Light layers and a rain jacket",
+        },
+    }
+
+
+def make_sample_itineraries(count=200, days=14):
+    return [make_sample_itinerary(days=days, destination=f"City {i}") for i in range(count)]
@@ -0,0 +1,248 @@
+"""
+Budget engine for parsed itineraries.
+
+Collects every price string from accommodations, dining, transportation,
+attractions and the per-day plans, parses each into a (min, max, currency)
+range and stores the results in NumPy arrays so per-category, per-currency
+and per-day totals are computed with a single `np.bincount` each.
+
+Prices keep their own currency: "¥1,500-¥2,500 / $10-$17" is read as a JPY
+range, "100-150 USD" as a USD range, and amounts in different currencies are
+never added together.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+
+# Currency symbols, ISO codes and names recognized in price strings
+CURRENCY_SYMBOLS = {
+    "US$": "USD", "$": "USD", "A$": "AUD", "C$": "CAD", "S$": "SGD", "HK$": "HKD", "NZ$": "NZD",
+    "R$": "BRL", "€": "EUR", "£": "GBP", "₹": "INR", "Rs.": "INR", "Rs": "INR", "¥": "JPY",
+    "₩": "KRW", "฿": "THB", "₫": "VND", "₱": "PHP", "₺": "TRY", "₽": "RUB", "RM": "MYR", "Rp": "IDR",
+}
+CURRENCY_CODES = (
+    "USD", "EUR", "GBP", "INR", "JPY", "CNY", "AUD", "CAD", "CHF", "SGD", "HKD", "NZD", "THB",
+    "AED", "SAR", "QAR", "IDR", "MYR", "PHP", "VND", "KRW", "TWD", "LKR", "NPR", "BDT", "PKR",
+    "MVR", "TRY", "RUB", "BRL", "MXN", "ZAR", "EGP", "MAD", "KES", "SEK", "NOK", "DKK", "ISK",
+    "PLN", "CZK", "HUF",
+)
+CURRENCY_NAMES = {
+    "dollar": "USD", "dollars": "USD", "euro": "EUR", "euros": "EUR", "pound": "GBP", "pounds": "GBP",
+    "rupee": "INR", "rupees": "INR", "yen": "JPY", "yuan": "CNY", "rmb": "CNY", "renminbi": "CNY",
+    "baht": "THB", "dirham": "AED", "dirhams": "AED", "riyal": "SAR", "riyals": "SAR",
+    "rupiah": "IDR", "ringgit": "MYR", "peso": "PHP", "pesos": "PHP", "dong": "VND", "won": "KRW",
+    "lira": "TRY", "ruble": "RUB", "rubles": "RUB", "rand": "ZAR", "franc": "CHF", "francs": "CHF",
+    "krona": "SEK", "kronor": "SEK", "krone": "NOK", "kroner": "NOK", "zloty": "PLN", "rufiyaa": "MVR",
+}
+
+CATEGORIES = ("accommodation", "dining", "transportation", "attraction")
+
+_SYMBOL_PATTERN = "|".join(re.escape(symbol) for symbol in sorted(CURRENCY_SYMBOLS, key=len, reverse=True))
+_CODE_PATTERN = "|".join(CURRENCY_CODES)
+_NAME_PATTERN = "|".join(sorted(CURRENCY_NAMES, key=len, reverse=True))
+
+MONEY_PATTERN = re.compile(
+    rf'(?:(?<![A-Za-z])(?P<symbol>{_SYMBOL_PATTERN})|\b(?P<prefix_code>{_CODE_PATTERN})\b)?\s*'
+    r'(?P<amount>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+    r'(?P<thousands>\s*[kK]\b)?'
+    rf'(?:\s*(?:\b(?P<suffix_code>{_CODE_PATTERN})\b|\b(?P<name>(?i:{_NAME_PATTERN}))\b))?'
+)
+RANGE_SEPARATOR = re.compile(r'^\s*(?:-|–|—|to)\s*$', re.IGNORECASE)
+
+
+def parse_price(price_str, default_currency=None):
+    """
+    Parse a price string into a (min, max, currency) range.
+
+    Args:
+        price_str (str): Text such as "¥1,500-¥2,500", "$25.50", "100 to 150 USD" or "1.5k euros"
+        default_currency (str, optional): Currency for bare numbers. When None,
+                                          strings without any currency are ignored.
+
+    Returns:
+        tuple: (min, max, currency) or None when no price is found
+    """
+    if not price_str:
+        return None
+
+    amounts = []
+    for match in MONEY_PATTERN.finditer(price_str):
+        value = float(match.group("amount").replace(",", ""))
+        if match.group("thousands"):
+            value *= 1000
+        symbol = match.group("symbol")
+        currency = (CURRENCY_SYMBOLS.get(symbol) if symbol else None) or match.group("prefix_code") \
+            or match.group("suffix_code") or CURRENCY_NAMES.get((match.group("name") or "").lower())
+        amounts.append([value, currency, match.start(), match.end()])
+    if not amounts:
+        return None
+
+    # Numbers joined into a range share a currency: "100-150 USD", "¥1,500-2,500"
+    for left, right in zip(amounts, amounts[1:]):
+        if RANGE_SEPARATOR.match(price_str[left[3]:right[2]]):
+            left[1] = left[1] or right[1]
+            right[1] = right[1] or left[1]
+
+    # The first amount with a currency is the price; later ones are usually conversions ("/ $25")
+    priced = [i for i, amount in enumerate(amounts) if amount[1]]
+    if priced:
+        start = priced[0]
+        currency = amounts[start][1]
+    elif default_currency:
+        start = 0
+        currency = default_currency
+    else:
+        return None
+
+    low = high = amounts[start][0]
+    if start + 1 < len(amounts):
+        following = amounts[start + 1]
+        if RANGE_SEPARATOR.match(price_str[amounts[start][3]:following[2]]) and (following[1] or currency) == currency:
+            high = following[0]
+    return min(low, high), max(low, high), currency
+
+
+class PriceTable:
+    """
+    Column arrays of parsed prices.
+
+    Attributes:
+        labels (list): Display name of each item
+        extras (list): Extra output fields per item (e.g. meal type), or None
+        mins, maxs (np.ndarray): float64 price bounds
+        currency (np.ndarray): int16 index into `currencies`
+        category (np.ndarray): int8 index into CATEGORIES
+        day (np.ndarray): int32 day number, or -1 for catalogue items not tied to a day
+    """
+
+    def __init__(self, rows, currencies):
+        self.currencies = currencies
+        self.labels = [row[0] for row in rows]
+        self.extras = [row[6] for row in rows]
+        currency_index = {code: i for i, code in enumerate(currencies)}
+        self.mins = np.array([row[1] for row in rows], dtype=np.float64)
+        self.maxs = np.array([row[2] for row in rows], dtype=np.float64)
+        self.currency = np.array([currency_index[row[3]] for row in rows], dtype=np.int16)
+        self.category = np.array([CATEGORIES.index(row[4]) for row in rows], dtype=np.int8)
+        self.day = np.array([row[5] for row in rows], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def totals_by(self, group, mask, size):
+        """
+        Sum mins and maxs per (group, currency) over the rows selected by mask.
+
+        Returns:
+            tuple: (min totals, max totals), each of shape (size, number of currencies)
+        """
+        n_currencies = max(len(self.currencies), 1)
+        index = group[mask].astype(np.int64) * n_currencies + self.currency[mask]
+        shape = (size, n_currencies)
+        mins = np.bincount(index, weights=self.mins[mask], minlength=size * n_currencies).reshape(shape)
+        maxs = np.bincount(index, weights=self.maxs[mask], minlength=size * n_currencies).reshape(shape)
+        return mins, maxs
+
+
+def _collect_price_strings(parsed_data):
+    # (label, price text, category, day number, extra fields, bare numbers allowed)
+    for acc in parsed_data.get("accommodations", []):
+        yield acc.get("name", "Accommodation"), acc.get("price_range", ""), "accommodation", -1, None, True
+    for dining in parsed_data.get("dining", []):
+        extra = {"meal_type": dining.get("meal_type", "")}
+        yield dining.get("name", dining.get("meal_type", "Meal")), dining.get("price_range", ""), "dining", -1, extra, True
+    for transport in parsed_data.get("transportation", []):
+        yield transport.get("type", "Transportation"), transport.get("details", ""), "transportation", -1, None, False
+    for attraction in parsed_data.get("attractions", []):
+        price_text = attraction.get("price_range") or attraction.get("cost") or attraction.get("description", "")
+        yield attraction.get("name", "Attraction"), price_text, "attraction", -1, None, bool(attraction.get("price_range"))
+    for day in parsed_data.get("days", []):
+        day_number = day.get("day_number")
+        if not isinstance(day_number, int):
+            continue
+        for meal_type, meal_text in (day.get("meals") or {}).items():
+            yield meal_type.capitalize(), meal_text, "dining", day_number, None, False
+        yield "Accommodation", day.get("accommodation", ""), "accommodation", day_number, None, False
+
+
+def build_price_table(parsed_data):
+    """
+    Parse every price in the itinerary into a PriceTable.
+
+    Bare numbers in explicit price fields take the itinerary's most common
+    currency; numbers in free text are only counted when a currency is given.
+    """
+    collected = list(_collect_price_strings(parsed_data))
+    explicit = [parse_price(text) for _, text, _, _, _, _ in collected]
+    counts = Counter(price[2] for price in explicit if price)
+    main_currency = counts.most_common(1)[0][0] if counts else None
+
+    rows = []
+    for (label, text, category, day, extra, bare_allowed), price in zip(collected, explicit):
+        if price is None and bare_allowed and main_currency:
+            price = parse_price(text, default_currency=main_currency)
+        if price:
+            rows.append((label, price[0], price[1], price[2], category, day, extra))
+
+    currencies = sorted({row[3] for row in rows}, key=lambda code: (-counts.get(code, 0), code))
+    return PriceTable(rows, currencies)
+
+
+def _number(value):
+    # Keep whole amounts as ints so the JSON output matches the old summary
+    return int(value) if float(value).is_integer() else round(float(value), 2)
+
+
+def summarize_budget(parsed_data):
+    """
+    Compute per-item costs and per-category, per-currency and per-day totals.
+
+    Args:
+        parsed_data (dict): The parsed itinerary data
+
+    Returns:
+        dict: Budget summary with categorized expenses
+    """
+    table = build_price_table(parsed_data)
+    currencies = table.currencies
+    main_currency = currencies[0] if currencies else "USD"
+
+    summary = {f"{category}_costs": [] for category in CATEGORIES}
+    catalogue = table.day < 0
+    for i in np.flatnonzero(catalogue):
+        category = CATEGORIES[table.category[i]]
+        item = {"type" if category == "transportation" else "name": table.labels[i],
+                "min": _number(table.mins[i]), "max": _number(table.maxs[i]),
+                "currency": currencies[table.currency[i]]}
+        item.update(table.extras[i] or {})
+        summary[f"{category}_costs"].append(item)
+
+    # Catalogue items (per category) and day plans (per day) are totalled separately
+    category_mins, category_maxs = table.totals_by(table.category, catalogue, len(CATEGORIES))
+    days = table.day[~catalogue]
+    n_days = int(days.max()) + 1 if len(days) else 0
+    day_mins, day_maxs = table.totals_by(np.maximum(table.day, 0), ~catalogue, n_days)
+
+    totals_by_currency = {}
+    for j, code in enumerate(currencies):
+        if category_maxs[:, j].any():
+            totals_by_currency[code] = {"min": _number(category_mins[:, j].sum()), "max": _number(category_maxs[:, j].sum())}
+
+    summary["category_totals"] = {
+        category: {code: {"min": _number(category_mins[c, j]), "max": _number(category_maxs[c, j])}
+                   for j, code in enumerate(currencies) if category_maxs[c, j]}
+        for c, category in enumerate(CATEGORIES)
+    }
+    summary["daily_totals"] = [
+        {"day_number": d, **{code: {"min": _number(day_mins[d, j]), "max": _number(day_maxs[d, j])}
+                             for j, code in enumerate(currencies) if day_maxs[d, j]}}
+        for d in np.unique(days).tolist()
+    ]
+    summary["totals_by_currency"] = totals_by_currency
+    summary["estimated_total"] = {
+        "min": totals_by_currency.get(main_currency, {}).get("min", 0),
+        "max": totals_by_currency.get(main_currency, {}).get("max", 0),
+        "currency": main_currency,
+    }
+    return summary
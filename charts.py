@@ -0,0 +1,105 @@
+"""
+Chart rendering for the dashboard budget views.
+
+Charts are drawn on a standalone `matplotlib.figure.Figure`, never through
+pyplot's global figure manager, so nothing keeps a reference to the figure
+once the image bytes are written and it is released explicitly afterwards.
+Rendered images are cached on a hash of the chart data and format, so a
+Streamlit rerun with unchanged data costs a dictionary lookup instead of a
+full render.
+
+Run `python benchmarks/bench_charts.py` to compare rerun time and RSS growth
+with the previous pyplot implementation.
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+from matplotlib.figure import Figure
+
+CHART_FORMATS = ("png", "svg")
+
+# Rendered charts, most recently used last; Streamlit sessions share it from their own threads
+_CHART_CACHE = OrderedDict()
+_CHART_CACHE_LOCK = threading.Lock()
+CHART_CACHE_SIZE = 32
+
+
+def chart_key(*parts):
+    """Return a stable digest of the chart inputs."""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _figure_bytes(fig, fmt):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt)
+    data = buf.getvalue()
+    if fmt == "svg":
+        # Drop the XML prolog so the markup can be passed straight to st.image / st.markdown
+        data = data[data.index(b"<svg"):]
+    return data
+
+
+def _draw_expense_chart(categories, min_amounts, max_amounts, currency_symbol, fmt):
+    fig = Figure(figsize=(10, 5))
+    try:
+        ax = fig.subplots()
+        x = range(len(categories))
+        width = 0.35
+        ax.bar([i - width / 2 for i in x], max_amounts, width, label=f'Max Amount ({currency_symbol})', color='#3498db')
+        ax.bar([i + width / 2 for i in x], min_amounts, width, label=f'Min Amount ({currency_symbol})', color='#2ecc71')
+
+        ax.set_title('Budget Breakdown')
+        ax.set_ylabel(f'Amount ({currency_symbol})')
+        ax.set_xticks(list(x))
+        ax.set_xticklabels(categories, rotation=45, ha='right')
+        ax.legend()
+        fig.tight_layout()
+        return _figure_bytes(fig, fmt)
+    finally:
+        fig.clear()
+
+
+def create_expense_chart(categories, min_amounts, max_amounts, currency_symbol="¥", fmt="png"):
+    """
+    Render a grouped min/max bar chart of budget categories.
+
+    Args:
+        categories (list): Category labels
+        min_amounts (list): Lower estimate per category
+        max_amounts (list): Upper estimate per category
+        currency_symbol (str): Symbol shown in the axis label and legend
+        fmt (str): "png" for a raster image or "svg" for vector markup
+
+    Returns:
+        bytes: The encoded image; identical inputs return the cached bytes
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt!r} (expected one of {CHART_FORMATS})")
+
+    categories = [str(category) for category in categories]
+    min_amounts = [float(amount) for amount in min_amounts]
+    max_amounts = [float(amount) for amount in max_amounts]
+    key = chart_key("expense", categories, min_amounts, max_amounts, currency_symbol, fmt)
+
+    with _CHART_CACHE_LOCK:
+        image = _CHART_CACHE.get(key)
+        if image is not None:
+            _CHART_CACHE.move_to_end(key)
+            return image
+
+    # Rendered outside the lock, so sessions drawing different charts don't wait for each other
+    image = _draw_expense_chart(categories, min_amounts, max_amounts, currency_symbol, fmt)
+    with _CHART_CACHE_LOCK:
+        _CHART_CACHE[key] = image
+        if len(_CHART_CACHE) > CHART_CACHE_SIZE:
+            _CHART_CACHE.popitem(last=False)
+    return image
+
+
+def clear_chart_cache():
+    with _CHART_CACHE_LOCK:
+        _CHART_CACHE.clear()
@@ -0,0 +1,103 @@
+"""
+Currency conversion backed by an offline rate snapshot.
+
+The snapshot (data/fx_rates.json) lists units per 1 USD for every currency
+the budget engine recognizes. It is loaded once into an N x N NumPy matrix,
+`matrix[i, j]` being the number of units of currency j per unit of currency
+i, so converting a whole array of amounts is a single fancy-indexed multiply.
+"""
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+DEFAULT_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fx_rates.json")
+
+
+class RateTable:
+    """
+    Conversion matrix between the currencies of a rate snapshot.
+
+    Attributes:
+        codes (tuple): ISO currency codes in matrix order
+        matrix (np.ndarray): matrix[i, j] = units of codes[j] per unit of codes[i]
+        as_of (str): Date of the snapshot
+    """
+
+    def __init__(self, rates_per_usd, as_of=None):
+        self.codes = tuple(rates_per_usd)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        per_usd = np.array([rates_per_usd[code] for code in self.codes], dtype=np.float64)
+        self.matrix = per_usd[np.newaxis, :] / per_usd[:, np.newaxis]
+        self.as_of = as_of
+
+    def indices(self, codes):
+        """
+        Map currency codes to matrix indices, -1 for unknown codes.
+
+        Only the distinct codes are looked up, so long arrays stay cheap.
+        """
+        unique, inverse = np.unique(np.asarray(codes, dtype=object), return_inverse=True)
+        lookup = np.array([self.index.get(code, -1) for code in unique], dtype=np.int64)
+        return lookup[inverse]
+
+    def rate(self, from_currency, to_currency):
+        return float(self.matrix[self.index[from_currency], self.index[to_currency]])
+
+    def convert(self, amounts, from_currency, to_currency):
+        """
+        Convert amounts into to_currency.
+
+        Args:
+            amounts (float or array-like): Amounts to convert
+            from_currency (str or array-like): One code for all amounts, or one code per amount
+            to_currency (str): Target currency code
+
+        Returns:
+            float or np.ndarray: Converted amounts; NaN where a source currency is unknown
+        """
+        target = self.index[to_currency]
+        if isinstance(from_currency, str):
+            converted = np.asarray(amounts, dtype=np.float64) * self.matrix[self.index[from_currency], target]
+            return float(converted) if converted.ndim == 0 else converted
+
+        source = self.indices(from_currency)
+        factors = np.where(source >= 0, self.matrix[source, target], np.nan)
+        return np.asarray(amounts, dtype=np.float64) * factors
+
+    def __contains__(self, code):
+        return code in self.index
+
+
+@lru_cache(maxsize=4)
+def _load_rate_table(path, mtime):
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    return RateTable(snapshot["rates"], as_of=snapshot.get("as_of"))
+
+
+def load_rate_table(path=DEFAULT_SNAPSHOT):
+    """
+    Load a rate snapshot, reusing the parsed matrix until the file changes.
+
+    Args:
+        path (str): Snapshot file with a "rates" mapping of units per 1 USD
+
+    Returns:
+        RateTable: The conversion matrix
+    """
+    return _load_rate_table(path, os.path.getmtime(path))
+
+
+def convert_price_table(table, to_currency, rates=None):
+    """
+    Convert every line item of a budget_engine.PriceTable in one call.
+
+    Returns:
+        tuple: (mins, maxs) arrays in to_currency
+    """
+    rates = rates or load_rate_table()
+    source = rates.indices(table.currencies)[table.currency] if len(table) else np.array([], dtype=np.int64)
+    factors = np.where(source >= 0, rates.matrix[source, rates.index[to_currency]], np.nan)
+    return table.mins * factors, table.maxs * factors
@@ -0,0 +1,283 @@
+"""
+Disk cache of parsed spaCy Docs.
+
+Users resubmit the same (or templated) descriptions, and re-running
+`en_core_web_trf` on them costs far more than reading the result back. Each
+parsed Doc is stored as a one-Doc `DocBin` file named by the SHA-1 of its
+text, under a directory per model named by a fingerprint of the pipeline:
+
+    <root>/<lang>_<model name>/<fingerprint>/<sha1 of text>.spacy
+
+The fingerprint covers the model version, the spaCy version, the pipeline
+components and an optional salt (e.g. a hash of the gazetteer patterns), so
+upgrading a model or changing its pipeline writes to a fresh directory and
+the model's directories of other fingerprints are deleted. Other models
+(e.g. en_core_web_sm next to en_core_web_trf) keep their own directories
+under the same root. Reads refresh a file's mtime
+and writes evict the least recently used files once the directory grows past
+its size or entry limit. Writes go through a temporary file and `os.replace`,
+so processes sharing the directory never read a partial entry.
+
+Settings come from the environment:
+
+    SPACY_DOC_CACHE_DIR        cache root (default: data/cache/docs)
+    SPACY_DOC_CACHE_MB         size limit in MB, 0 disables the cache (default: 256)
+    SPACY_DOC_CACHE_ENTRIES    entry limit (default: 50000)
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cache", "docs")
+DEFAULT_MAX_MB = 256
+DEFAULT_MAX_ENTRIES = 50000
+# Eviction frees space down to this share of the limits, so it does not run on every write
+LOW_WATER = 0.9
+SUFFIX = ".spacy"
+
+FINGERPRINT_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def model_directory_name(nlp):
+    """Directory holding one model's caches, e.g. "en_core_web_trf"."""
+    name = f"{nlp.lang}_{nlp.meta.get('name') or 'pipeline'}"
+    return UNSAFE_NAME_CHARS.sub("_", name)
+
+
+def model_fingerprint(nlp, salt=""):
+    """
+    Identify the pipeline whose Docs a cache holds.
+
+    Args:
+        nlp (Language): The loaded pipeline
+        salt (str): Anything else the Docs depend on, e.g. a gazetteer hash
+
+    Returns:
+        str: 16 hex characters
+    """
+    import spacy
+
+    meta = nlp.meta
+    described = {"lang": nlp.lang, "name": meta.get("name"), "version": meta.get("version"),
+                 "spacy": spacy.__version__, "pipes": list(nlp.pipe_names), "salt": salt}
+    return hashlib.sha1(json.dumps(described, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class DocCache:
+    """
+    Disk-backed cache from text to the Doc a pipeline produced for it.
+
+    Args:
+        nlp (Language): The pipeline; rehydrated Docs share its vocab
+        directory (str): Cache root; one subdirectory per model, holding one
+                         per pipeline fingerprint
+        max_bytes (int): Size limit of the stored Docs; 0 disables the cache
+        max_entries (int): Limit on the number of stored Docs
+        salt (str): Extra fingerprint input (see model_fingerprint)
+    """
+
+    def __init__(self, nlp, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 max_entries=DEFAULT_MAX_ENTRIES, salt=""):
+        self.nlp = nlp
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.fingerprint = model_fingerprint(nlp, salt)
+        self.root = os.path.join(directory, model_directory_name(nlp))
+        self.directory = os.path.join(self.root, self.fingerprint)
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.bytes = 0
+        self.entries = 0
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self._remove_stale()
+            self.bytes, self.entries = self._usage()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 and self.max_entries > 0
+
+    @contextmanager
+    def bypassed(self):
+        """Skip the cache, and its stats, for calls made in this thread (e.g. a warm-up)."""
+        self._local.bypass = True
+        try:
+            yield
+        finally:
+            self._local.bypass = False
+
+    def _active(self):
+        return self.enabled and not getattr(self._local, "bypass", False)
+
+    def _path(self, text):
+        return os.path.join(self.directory, text_key(text) + SUFFIX)
+
+    def _remove_stale(self):
+        # Docs of earlier versions or pipeline layouts of this model can never be read again;
+        # other models have their own directory next to self.root
+        for name in os.listdir(self.root):
+            if name != self.fingerprint and FINGERPRINT_PATTERN.match(name):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def _files(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # Evicted by another process
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _usage(self):
+        files = self._files()
+        return sum(size for _, size, _ in files), len(files)
+
+    def get(self, text, vocab=None):
+        """
+        Return the cached Doc for text, or None.
+
+        The Doc is rehydrated into vocab, by default the pipeline's.
+
+        Entries that fail to load (truncated or from an incompatible spaCy)
+        are deleted and count as misses.
+        """
+        if not self._active():
+            return None
+        from spacy.tokens import DocBin
+
+        path = self._path(text)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            doc = next(iter(DocBin().from_bytes(data).get_docs(vocab if vocab is not None else self.nlp.vocab)))
+            if doc.text != text:
+                raise ValueError("hash collision")
+            os.utime(path)  # Most recently used
+        except FileNotFoundError:
+            doc = None
+        except Exception:
+            doc = None
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self.lock:
+            if doc is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return doc
+
+    def put(self, text, doc):
+        """Store doc as the parse of text, evicting old entries when over a limit."""
+        if not self._active():
+            return
+        from spacy.tokens import DocBin
+
+        doc_bin = DocBin(store_user_data=False)
+        doc_bin.add(doc)
+        data = doc_bin.to_bytes()
+        path = self._path(text)
+        replaced = os.path.getsize(path) if os.path.exists(path) else None
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self.lock:
+            self.bytes += len(data) - (replaced or 0)
+            self.entries += replaced is None
+            if self.bytes > self.max_bytes or self.entries > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # Called with the lock held. Rescans, since other processes share the directory.
+        files = sorted(self._files())
+        total, count = sum(size for _, size, _ in files), len(files)
+        target_bytes, target_entries = self.max_bytes * LOW_WATER, self.max_entries * LOW_WATER
+        for _, size, path in files:
+            if total <= target_bytes and count <= target_entries:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            count -= 1
+            self.evicted += 1
+        self.bytes, self.entries = total, count
+
+    def parse(self, text, parse_text, vocab=None):
+        """
+        Return the Doc for text, from the cache or from parse_text(text).
+
+        Args:
+            text (str): Text to parse
+            parse_text (callable): Runs the pipeline on one text
+            vocab (Vocab): Vocab of the pipeline parse_text runs; see get()
+
+        Returns:
+            Doc: The parsed or rehydrated Doc
+        """
+        doc = self.get(text, vocab)
+        if doc is None:
+            doc = parse_text(text)
+            self.put(text, doc)
+        return doc
+
+    def pipe(self, texts, parse_texts, vocab=None):
+        """
+        Return Docs for texts, running parse_texts only on those not cached.
+
+        Args:
+            texts (list): Texts to parse
+            parse_texts (callable): Runs the pipeline on a list of texts and
+                                    returns their Docs in order
+            vocab (Vocab): Vocab of the pipeline parse_texts runs; see get()
+
+        Returns:
+            list: One Doc per text, in order
+        """
+        docs = [self.get(text, vocab) for text in texts]
+        missing = [i for i, doc in enumerate(docs) if doc is None]
+        if missing:
+            for i, doc in zip(missing, parse_texts([texts[i] for i in missing])):
+                docs[i] = doc
+                self.put(texts[i], doc)
+        return docs
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "entries": self.entries, "bytes": self.bytes, "evicted": self.evicted,
+                    "fingerprint": self.fingerprint}
+
+
+def cache_from_env(nlp, salt="", environ=None):
+    """Build a DocCache from SPACY_DOC_CACHE_* environment variables."""
+    environ = os.environ if environ is None else environ
+    max_mb = float(environ.get("SPACY_DOC_CACHE_MB") or DEFAULT_MAX_MB)
+    return DocCache(nlp, directory=environ.get("SPACY_DOC_CACHE_DIR") or DEFAULT_CACHE_DIR,
+                    max_bytes=int(max_mb * 1024 * 1024),
+                    max_entries=int(environ.get("SPACY_DOC_CACHE_ENTRIES") or DEFAULT_MAX_ENTRIES), salt=salt)
@@ -0,0 +1,183 @@
+"""
+Place-name gazetteer with a population threshold and a compact layout.
+
+The location extractors need to ask "is this phrase a known place?" for
+every candidate phrase of every request. A dict of per-name dicts holds
+two Python strings and a dict object per place in every process; with the
+low population thresholds that also bring in villages named like English
+words, that is most of the gazetteer's cost.
+
+`Gazetteer` is a read-only Mapping from a lowercased name to
+{"name", "source", "population"} laid out as:
+
+    keys        every lowercased name back to back as UTF-8 bytes, sorted,
+                with an array('I') of boundaries
+    names       the display names, laid out the same way
+    population  array('q'), -1 where unknown
+    source      array('B') of indexes into SOURCES
+    prefixes    dict from the first two bytes of a key to its index range
+
+Each name is stored once, whatever its source, and a lookup bisects the
+keys sharing its first two bytes, so the per-place cost is a few
+bytes of array plus the characters of the name. Entries are materialized
+only when looked up.
+
+`build_gazetteer(min_population)` drops cities below the threshold.
+Countries and extra names (e.g. hand-picked destinations) are always kept.
+Run `python benchmarks/bench_gazetteer.py` to see memory and lookup latency
+per threshold.
+"""
+import os
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+try:
+    import geonamescache
+except ImportError:  # Extra names only
+    geonamescache = None
+
+SOURCES = ("geonames_city", "geonames_country", "common_destination")
+# Population cut-offs geonamescache ships city files for
+DATASET_POPULATIONS = (500, 1000, 5000, 15000)
+DEFAULT_MIN_POPULATION = int(os.environ.get("GAZETTEER_MIN_POPULATION") or 15000)
+
+
+class _Blob:
+    """
+    Sequence of strings stored back to back as UTF-8.
+
+    Bytes rather than one str, since a single non-Latin-1 name would make
+    CPython store the whole str at two or four bytes per character.
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        self.data = b"".join(encoded)
+        self.offsets = array("I", [0])
+        for chunk in encoded:
+            self.offsets.append(self.offsets[-1] + len(chunk))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def string(self, i):
+        return self[i].decode("utf-8")
+
+    @property
+    def nbytes(self):
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class Gazetteer(Mapping):
+    """
+    Read-only mapping from lowercased place name to its entry.
+
+    Args:
+        entries (iterable): (name, source, population) tuples with unique
+                            lowercased names; source is one of SOURCES and
+                            population may be None
+    """
+
+    __slots__ = ("_key_blob", "names", "population", "source", "prefixes")
+
+    def __init__(self, entries):
+        entries = sorted((name.lower(), name, source, population) for name, source, population in entries)
+        self._key_blob = _Blob([key for key, _, _, _ in entries])
+        self.names = _Blob([name for _, name, _, _ in entries])
+        self.population = array("q", (-1 if population is None else population for _, _, _, population in entries))
+        self.source = array("B", (SOURCES.index(source) for _, _, source, _ in entries))
+        # UTF-8 byte order is code point order, so the keys stay sorted as bytes
+        self.prefixes = {}
+        for i in range(len(entries)):
+            prefix = self._key_blob[i][:2]
+            lo, _ = self.prefixes.get(prefix, (i, i))
+            self.prefixes[prefix] = (lo, i + 1)
+
+    def __len__(self):
+        return len(self.population)
+
+    def entry_at(self, i):
+        population = self.population[i]
+        return {"name": self.names.string(i), "source": SOURCES[self.source[i]],
+                "population": None if population < 0 else population}
+
+    def index(self, key):
+        """Position of a lowercased name, or -1."""
+        key = key.encode("utf-8")
+        lo, hi = self.prefixes.get(key[:2], (0, 0))
+        i = bisect_left(self._key_blob, key, lo, hi)
+        return i if i < hi and self._key_blob[i] == key else -1
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self.index(key) >= 0
+
+    def __getitem__(self, key):
+        i = self.index(key) if isinstance(key, str) else -1
+        if i < 0:
+            raise KeyError(key)
+        return self.entry_at(i)
+
+    def __iter__(self):
+        return (self._key_blob.string(i) for i in range(len(self)))
+
+    def items(self):
+        # Sequential, without a lookup per key (the EntityRuler patterns are built from this)
+        return ((self._key_blob.string(i), self.entry_at(i)) for i in range(len(self)))
+
+    @property
+    def nbytes(self):
+        """Approximate size of the name text and arrays in bytes."""
+        return (self._key_blob.nbytes + self.names.nbytes + self.population.itemsize * len(self.population)
+                + len(self.source))
+
+
+def _dataset_population(min_population):
+    # The smallest-population geonamescache file that still covers the threshold
+    return max((p for p in DATASET_POPULATIONS if p <= min_population), default=DATASET_POPULATIONS[0])
+
+
+def build_gazetteer(min_population=DEFAULT_MIN_POPULATION, extra_names=(), exclude=(), cities=None, countries=None):
+    """
+    Build a Gazetteer of cities, countries and extra names.
+
+    A name shared by several cities keeps the most populous one; cities
+    take precedence over countries, and both over extra names.
+
+    Args:
+        min_population (int): Smallest city population kept
+        extra_names (iterable): Names always included, as "common_destination"
+        exclude (iterable): Lowercased names never included (e.g. stop words)
+        cities (iterable): City records with "name" and "population";
+                           defaults to geonamescache
+        countries (iterable): Country records with "name" and "population";
+                              defaults to geonamescache
+
+    Returns:
+        Gazetteer: The gazetteer
+    """
+    if geonamescache is not None and (cities is None or countries is None):
+        cache = geonamescache.GeonamesCache(min_city_population=_dataset_population(min_population))
+        cities = cache.get_cities().values() if cities is None else cities
+        countries = cache.get_countries().values() if countries is None else countries
+
+    entries = {}
+    for city in cities or ():
+        population = city.get("population") or 0
+        if population < min_population:
+            continue
+        key = city["name"].lower()
+        if key not in entries or population > entries[key][2]:
+            entries[key] = (city["name"], "geonames_city", population)
+    for country in countries or ():
+        entries.setdefault(country["name"].lower(), (country["name"], "geonames_country", country.get("population")))
+    for name in extra_names:
+        entries.setdefault(name.lower(), (name, "common_destination", None))
+    for key in exclude:
+        entries.pop(key, None)
+    return Gazetteer(entries.values())
@@ -0,0 +1,493 @@
+"""
+Offline geocoding for the places named in an itinerary.
+
+Places come from the geonamescache city list plus an optional local POI file
+(data/poi.json: a list of {"name", "lat", "lon", "country"} objects for
+hotels, temples, stations and so on). The repository does not ship a POI
+file, so out of the box only cities resolve: hotels, sights and restaurants
+land on a city centroid at best, and `Geocoder.has_pois` is False. Point
+GEOCODER_POI_PATH at such a file to place them exactly. Every place is stored as a unit vector
+on the sphere, so the straight-line (chord) distance between two vectors is
+a monotonic function of the great-circle distance and an ordinary KD-tree
+over xyz answers nearest-neighbor and radius queries.
+
+Building the index from ~25k cities takes about a second; the arrays and the
+tree are saved with `np.savez` under data/cache and reloaded in milliseconds
+until the POI file or the population threshold changes. When scipy is
+installed its cKDTree answers the queries instead of the NumPy tree.
+"""
+import hashlib
+import heapq
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import geonamescache
+except ImportError:  # POI file only
+    geonamescache = None
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Optional speedup
+    cKDTree = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_POI_PATH = os.environ.get("GEOCODER_POI_PATH") or os.path.join(DATA_DIR, "poi.json")
+DEFAULT_CACHE_DIR = os.environ.get("GEOCODER_CACHE_DIR") or os.path.join(DATA_DIR, "cache")
+MIN_CITY_POPULATION = 15000
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 16
+# A place named inside a longer name ("Temple" in "Senso-ji Temple") only counts this close to the trip
+PARTIAL_MATCH_MAX_KM = 1000
+CACHE_VERSION = 1
+
+KIND_CITY, KIND_POI = 0, 1
+
+Place = namedtuple("Place", ["name", "lat", "lon", "country", "kind", "population"])
+
+# Itinerary sections whose items are placed on the map
+MAPPED_SECTIONS = ("accommodations", "attractions", "dining")
+
+
+def to_xyz(lat, lon):
+    """Convert degrees (scalars or arrays) to unit vectors, shape (..., 3)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def km_to_chord(km):
+    return 2.0 * np.sin(np.minimum(km / EARTH_RADIUS_KM, np.pi) / 2.0)
+
+
+def chord_to_km(chord):
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+def normalize_name(name):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", str(name).lower())).strip()
+
+
+class KDTree:
+    """
+    Static KD-tree over 3-D points, stored as flat NumPy arrays.
+
+    Node i covers points[order[start[i]:end[i]]]; internal nodes split on
+    axis[i] at value[i] into children left[i] and right[i] (-1 for leaves).
+    The arrays are what `Geocoder.save` writes, so a cached tree is never
+    rebuilt.
+    """
+    FIELDS = ("order", "start", "end", "axis", "value", "left", "right")
+
+    def __init__(self, points, order, start, end, axis, value, left, right):
+        self.points = points
+        self.order, self.start, self.end = order, start, end
+        self.axis, self.value, self.left, self.right = axis, value, left, right
+        self._bounds = None
+
+    @classmethod
+    def build(cls, points, leaf_size=LEAF_SIZE):
+        order = np.arange(len(points))
+        nodes = []  # [start, end, axis, value, left, right]
+        stack = [(0, len(points), -1, 0)]
+        while stack:
+            lo, hi, parent, side = stack.pop()
+            node = len(nodes)
+            nodes.append([lo, hi, -1, 0.0, -1, -1])
+            if parent >= 0:
+                nodes[parent][4 + side] = node
+            if hi - lo <= leaf_size:
+                continue
+            subset = order[lo:hi]
+            axis = int(np.argmax(np.ptp(points[subset], axis=0)))
+            mid = (hi - lo) // 2
+            order[lo:hi] = subset[np.argpartition(points[subset, axis], mid)]
+            nodes[node][2:4] = [axis, float(points[order[lo + mid], axis])]
+            stack.append((lo + mid, hi, node, 1))
+            stack.append((lo, lo + mid, node, 0))
+
+        columns = list(zip(*nodes)) if nodes else [()] * 6
+        start, end, axis, value, left, right = (np.array(column) for column in columns)
+        return cls(points, order, start.astype(np.int64), end.astype(np.int64), axis.astype(np.int8),
+                   value.astype(np.float64), left.astype(np.int64), right.astype(np.int64))
+
+    def arrays(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def _leaf(self, node):
+        ids = self.order[self.start[node]:self.end[node]]
+        return ids, self.points[ids]
+
+    def query(self, point, k=1):
+        """
+        Find the k points closest to point.
+
+        Returns:
+            tuple: (chord distances, point indices), nearest first
+        """
+        if not len(self.start):
+            return np.array([]), np.array([], dtype=np.int64)
+        best = []  # max-heap of (-squared distance, index)
+        stack = [(0.0, 0)]
+        while stack:
+            bound, node = stack.pop()
+            if len(best) == k and bound >= -best[0][0]:
+                continue
+            if self.left[node] < 0:
+                ids, coords = self._leaf(node)
+                for dist, idx in zip(np.sum((coords - point) ** 2, axis=1), ids):
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, idx))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, idx))
+                continue
+            diff = point[self.axis[node]] - self.value[node]
+            near, far = (self.left[node], self.right[node]) if diff < 0 else (self.right[node], self.left[node])
+            stack.append((max(bound, diff * diff), far))
+            stack.append((bound, near))
+        best.sort(reverse=True)
+        return np.sqrt([-dist for dist, _ in best]), np.array([idx for _, idx in best], dtype=np.int64)
+
+    def bounds(self):
+        """Bounding box (lo, hi) of every node, computed on first use."""
+        if self._bounds is None:
+            lo, hi = np.empty((len(self.start), 3)), np.empty((len(self.start), 3))
+            if len(self.order):
+                leaves = np.nonzero(self.left < 0)[0]
+                leaves = leaves[np.argsort(self.start[leaves])]
+                coords = self.points[self.order]
+                lo[leaves] = np.minimum.reduceat(coords, self.start[leaves], axis=0)
+                hi[leaves] = np.maximum.reduceat(coords, self.start[leaves], axis=0)
+                # Children are numbered after their parent, so reverse order is bottom-up
+                for node in np.nonzero(self.left >= 0)[0][::-1]:
+                    lo[node] = np.minimum(lo[self.left[node]], lo[self.right[node]])
+                    hi[node] = np.maximum(hi[self.left[node]], hi[self.right[node]])
+            self._bounds = lo, hi
+        return self._bounds
+
+    def query_nearest(self, points):
+        """
+        Find the nearest point for many query points at once.
+
+        All queries walk the tree together; a node is visited only by the
+        queries whose current best distance reaches its bounding box, and
+        each leaf is one vectorized distance block.
+
+        Returns:
+            tuple: (chord distances, point indices), one per query point
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        best_dist = np.full(len(points), np.inf)
+        best_id = np.full(len(points), -1, dtype=np.int64)
+        if not len(points) or not len(self.order):
+            return np.sqrt(best_dist), best_id
+
+        lo, hi = self.bounds()
+        stack = [(0, np.arange(len(points)))]
+        while stack:
+            node, queries = stack.pop()
+            coords = points[queries]
+            gap = np.maximum(lo[node] - coords, 0) + np.maximum(coords - hi[node], 0)
+            keep = np.sum(gap * gap, axis=1) < best_dist[queries]
+            queries, coords = queries[keep], coords[keep]
+            if not len(queries):
+                continue
+            if self.left[node] < 0:
+                ids, leaf = self._leaf(node)
+                dist = np.sum((coords[:, np.newaxis, :] - leaf[np.newaxis, :, :]) ** 2, axis=2)
+                nearest = np.argmin(dist, axis=1)
+                nearest_dist = dist[np.arange(len(queries)), nearest]
+                better = nearest_dist < best_dist[queries]
+                best_dist[queries[better]] = nearest_dist[better]
+                best_id[queries[better]] = ids[nearest[better]]
+                continue
+            go_left = coords[:, self.axis[node]] < self.value[node]
+            left, right = self.left[node], self.right[node]
+            # Far sides are pushed first, so every query finishes its own side before crossing over
+            for child, side in ((right, queries[go_left]), (left, queries[~go_left]),
+                                (right, queries[~go_left]), (left, queries[go_left])):
+                if len(side):
+                    stack.append((child, side))
+        return np.sqrt(best_dist), best_id
+
+    def query_ball(self, point, radius):
+        """Indices of all points within chord distance radius of point."""
+        found = []
+        stack = [0] if len(self.start) else []
+        radius_sq = radius * radius
+        while stack:
+            node = stack.pop()
+            if self.left[node] < 0:
+                ids, coords = self._leaf(node)
+                found.append(ids[np.sum((coords - point) ** 2, axis=1) <= radius_sq])
+                continue
+            diff = point[self.axis[node]] - self.value[node]
+            if diff < radius:
+                stack.append(self.left[node])
+            if diff > -radius:
+                stack.append(self.right[node])
+        return np.concatenate(found) if found else np.array([], dtype=np.int64)
+
+
+class Geocoder:
+    """
+    Name lookup and spatial queries over the city and POI gazetteer.
+
+    Attributes:
+        names (np.ndarray): Place names
+        lat, lon (np.ndarray): Coordinates in degrees
+        country (np.ndarray): ISO country codes ("" when unknown)
+        kind (np.ndarray): KIND_CITY or KIND_POI
+        population (np.ndarray): City population, 0 for POIs
+    """
+
+    def __init__(self, names, lat, lon, country, kind, population, tree_arrays=None):
+        self.names, self.lat, self.lon = names, lat, lon
+        self.country, self.kind, self.population = country, kind, population
+        self.points = to_xyz(lat, lon).reshape(-1, 3)
+        self.tree = KDTree(self.points, **tree_arrays) if tree_arrays else KDTree.build(self.points)
+        self._scipy_tree = cKDTree(self.points) if cKDTree is not None and len(self.points) else None
+
+        # POIs first, then cities by population, so the first hit for a name is the likeliest
+        self.by_name = {}
+        for i in np.lexsort((-population, -kind)):
+            self.by_name.setdefault(normalize_name(names[i]), []).append(int(i))
+        self.longest_name = max((len(key.split()) for key in self.by_name), default=0)
+
+    @classmethod
+    def build(cls, min_city_population=MIN_CITY_POPULATION, poi_path=DEFAULT_POI_PATH):
+        """Collect places from geonamescache and the POI file and index them."""
+        rows = []
+        if geonamescache is not None:
+            cities = geonamescache.GeonamesCache(min_city_population=min_city_population).get_cities()
+            rows.extend((city["name"], city["latitude"], city["longitude"], city.get("countrycode", ""),
+                         KIND_CITY, city.get("population", 0)) for city in cities.values())
+        if poi_path and os.path.exists(poi_path):
+            with open(poi_path, encoding="utf-8") as f:
+                rows.extend((poi["name"], poi["lat"], poi["lon"], poi.get("country", ""), KIND_POI, 0)
+                            for poi in json.load(f))
+
+        names, lat, lon, country, kind, population = (list(column) for column in zip(*rows)) if rows \
+            else ([], [], [], [], [], [])
+        return cls(np.array(names, dtype=str), np.array(lat, dtype=np.float64), np.array(lon, dtype=np.float64),
+                   np.array(country, dtype=str), np.array(kind, dtype=np.int8), np.array(population, dtype=np.int64))
+
+    @property
+    def has_pois(self):
+        """Whether any POI was loaded, i.e. whether anything can resolve to an exact position."""
+        return bool(np.any(self.kind == KIND_POI))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, names=self.names, lat=self.lat, lon=self.lon, country=self.country, kind=self.kind,
+                 population=self.population, **self.tree.arrays())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files}
+        tree_arrays = {field: arrays.pop(field) for field in KDTree.FIELDS}
+        return cls(tree_arrays=tree_arrays, **arrays)
+
+    def __len__(self):
+        return len(self.names)
+
+    def place(self, i):
+        return Place(str(self.names[i]), float(self.lat[i]), float(self.lon[i]), str(self.country[i]),
+                     int(self.kind[i]), int(self.population[i]))
+
+    def nearest(self, lat, lon, k=1, max_km=None):
+        """
+        Find the places closest to a coordinate.
+
+        Args:
+            lat (float): Latitude in degrees
+            lon (float): Longitude in degrees
+            k (int): Number of places to return
+            max_km (float): Drop places farther than this
+
+        Returns:
+            list: (Place, distance in km) tuples, nearest first
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        point = to_xyz(lat, lon)
+        if self._scipy_tree is not None:
+            chords, ids = self._scipy_tree.query(point, k=k)
+            chords, ids = np.atleast_1d(chords), np.atleast_1d(ids)
+        else:
+            chords, ids = self.tree.query(point, k=k)
+        distances = chord_to_km(chords)
+        return [(self.place(i), float(km)) for i, km in zip(ids, distances) if max_km is None or km <= max_km]
+
+    def within(self, lat, lon, radius_km):
+        """
+        Find every place within radius_km of a coordinate.
+
+        Returns:
+            list: (Place, distance in km) tuples, nearest first
+        """
+        point = to_xyz(lat, lon)
+        radius = float(km_to_chord(radius_km))
+        if self._scipy_tree is not None:
+            ids = np.array(self._scipy_tree.query_ball_point(point, radius), dtype=np.int64)
+        else:
+            ids = self.tree.query_ball(point, radius)
+        distances = chord_to_km(np.linalg.norm(self.points[ids] - point, axis=1)) if len(ids) else np.array([])
+        return [(self.place(ids[j]), float(distances[j])) for j in np.argsort(distances)]
+
+    def _pick(self, candidates, near, country, strict=False):
+        # strict: only accept candidates in country and within PARTIAL_MATCH_MAX_KM of near
+        if country:
+            in_country = [i for i in candidates if self.country[i] == country]
+            candidates = in_country if in_country or strict else candidates
+        if near is None or not candidates:
+            return candidates[0] if candidates else None
+        point = to_xyz(*near)
+        best = min(candidates, key=lambda i: float(np.sum((self.points[i] - point) ** 2)))
+        if strict and chord_to_km(np.linalg.norm(self.points[best] - point)) > PARTIAL_MATCH_MAX_KM:
+            return None
+        return best if len(candidates) > 1 or strict else candidates[0]
+
+    def geocode(self, name, near=None, country=None):
+        """
+        Resolve a place name to a gazetteer entry.
+
+        An exact (case and punctuation insensitive) match wins; otherwise the
+        longest run of words naming a known place is used, so "Kyoto Imperial
+        Palace" resolves to Kyoto. Ambiguous names prefer the given country,
+        then the entry closest to near; partial matches must lie in that
+        country and within PARTIAL_MATCH_MAX_KM of near.
+
+        Args:
+            name (str): Place name
+            near (tuple): Optional (lat, lon) to disambiguate with
+            country (str): Optional ISO country code to prefer
+
+        Returns:
+            Place or None: The match, None when nothing in the name is known
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        if key in self.by_name:
+            return self.place(self._pick(self.by_name[key], near, country))
+
+        words = key.split()
+        for size in range(min(len(words), self.longest_name), 0, -1):
+            for begin in range(len(words) - size + 1):
+                candidates = self.by_name.get(" ".join(words[begin:begin + size]))
+                match = self._pick(candidates, near, country, strict=True) if candidates else None
+                if match is not None:
+                    return self.place(match)
+        return None
+
+
+def _cache_path(cache_dir, min_city_population, poi_path):
+    poi_stamp = os.path.getmtime(poi_path) if poi_path and os.path.exists(poi_path) else None
+    source = getattr(geonamescache, "__version__", None) if geonamescache is not None else "none"
+    key = json.dumps([CACHE_VERSION, min_city_population, poi_path, poi_stamp, source])
+    return os.path.join(cache_dir, f"geocoder-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.npz")
+
+
+@lru_cache(maxsize=2)
+def _load_geocoder(cache_path, min_city_population, poi_path):
+    if os.path.exists(cache_path):
+        try:
+            return Geocoder.load(cache_path)
+        except (OSError, KeyError, ValueError):
+            pass  # Truncated or outdated cache; rebuild it
+    geocoder = Geocoder.build(min_city_population, poi_path)
+    try:
+        geocoder.save(cache_path)
+    except OSError:
+        pass  # Read-only deployments still work, just without the disk cache
+    return geocoder
+
+
+def load_geocoder(min_city_population=MIN_CITY_POPULATION, poi_path=DEFAULT_POI_PATH, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Load the geocoder from the disk cache, building and saving it on first use.
+
+    The cache file name encodes the population threshold and the POI file's
+    mtime, so editing the POI file produces a fresh index.
+
+    Returns:
+        Geocoder: The shared geocoder for these settings
+    """
+    cache_path = _cache_path(cache_dir, min_city_population, poi_path)
+    return _load_geocoder(cache_path, min_city_population, poi_path)
+
+
+def is_exactly_placed(item):
+    """Whether an itinerary item has coordinates of its own, not a fallback or centroid."""
+    return isinstance(item, dict) and "lat" in item and "lon" in item and not item.get("approximate_location")
+
+
+def has_exact_positions(itinerary, sections=MAPPED_SECTIONS):
+    """Whether any item of the given sections is exactly placed; never with the default data (no POI file)."""
+    return any(is_exactly_placed(item) for section in sections for item in itinerary.get(section) or [])
+
+
+def itinerary_anchor(itinerary, geocoder):
+    # The trip destination ("Tokyo, Japan") locates everything that can't be resolved by name
+    overview = itinerary.get("trip_overview") or {}
+    destination = overview.get("destination") or itinerary.get("destination") or ""
+    for part in str(destination).split(","):
+        place = geocoder.geocode(part)
+        if place is not None:
+            return place
+    return None
+
+
+def geocode_itinerary(itinerary, geocoder=None, sections=MAPPED_SECTIONS):
+    """
+    Add "lat"/"lon" to the itinerary items that have none.
+
+    Items are resolved by name near the trip destination; items whose name
+    is unknown fall back to the destination itself. Both those and items
+    that only matched a city centroid or part of their name ("Baga Beach"
+    resolving to the town of Baga) are marked with "approximate_location":
+    True. Items that already carry coordinates are left as they are.
+
+    Args:
+        itinerary (dict): Parsed itinerary JSON
+        geocoder (Geocoder): Defaults to `load_geocoder()`
+        sections (tuple): Itinerary lists to geocode
+
+    Returns:
+        dict: A shallow copy of the itinerary with geocoded item copies
+    """
+    geocoder = geocoder or load_geocoder()
+    anchor = itinerary_anchor(itinerary, geocoder)
+    near = (anchor.lat, anchor.lon) if anchor else None
+    country = anchor.country if anchor else None
+
+    result = dict(itinerary)
+    for section in sections:
+        items = []
+        for item in itinerary.get(section) or []:
+            if not isinstance(item, dict) or ("lat" in item and "lon" in item):
+                items.append(item)
+                continue
+            place = geocoder.geocode(item.get("name", ""), near=near, country=country)
+            item = dict(item)
+            if place is not None:
+                item["lat"], item["lon"] = place.lat, place.lon
+                if place.kind == KIND_CITY or normalize_name(place.name) != normalize_name(item.get("name", "")):
+                    item["approximate_location"] = True
+            elif anchor is not None:
+                item["lat"], item["lon"] = anchor.lat, anchor.lon
+                item["approximate_location"] = True
+            items.append(item)
+        if section in itinerary:
+            result[section] = items
+    return result
@@ -0,0 +1,135 @@
+"""
+CPU inference settings for the spaCy transformer pipeline.
+
+On CPU-only hosts torch sizes its thread pools from the core count, so every
+Streamlit session parsing at once oversubscribes the machine. An
+`InferenceProfile` pins the torch intra-op and inter-op threads, the
+`nlp.pipe` batch size and a maximum chunk length, and `parse` runs the
+pipeline under `torch.inference_mode()` on sentence-aligned chunks so long
+texts neither allocate one huge transformer batch nor hit `nlp.max_length`.
+
+Settings come from the environment:
+
+    SPACY_CPU_THREADS        torch intra-op threads (default: 2)
+    SPACY_CPU_INTEROP        torch inter-op threads (default: 1)
+    SPACY_BATCH_SIZE         docs per nlp.pipe batch (default: 8)
+    SPACY_MAX_CHUNK_CHARS    longest text parsed in one piece (default: 2000)
+
+Run `python benchmarks/bench_inference.py` to pick thread counts for a host.
+"""
+import contextlib
+import os
+import re
+from collections import namedtuple
+
+try:
+    import torch
+except ImportError:  # Pipelines without a torch backend
+    torch = None
+
+InferenceProfile = namedtuple("InferenceProfile", ["threads", "interop_threads", "batch_size", "max_chunk_chars"])
+
+DEFAULT_PROFILE = InferenceProfile(threads=2, interop_threads=1, batch_size=8, max_chunk_chars=2000)
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+def profile_from_env(environ=None, default=DEFAULT_PROFILE):
+    """Read an InferenceProfile from SPACY_* environment variables."""
+    environ = os.environ if environ is None else environ
+    names = {"threads": "SPACY_CPU_THREADS", "interop_threads": "SPACY_CPU_INTEROP",
+             "batch_size": "SPACY_BATCH_SIZE", "max_chunk_chars": "SPACY_MAX_CHUNK_CHARS"}
+    values = {field: max(1, int(environ[name])) if environ.get(name) else getattr(default, field)
+              for field, name in names.items()}
+    return InferenceProfile(**values)
+
+
+def apply_profile(nlp, profile):
+    """
+    Apply a profile to the process and to a loaded pipeline.
+
+    Torch's inter-op pool can only be sized before it first runs work, so a
+    second call (e.g. after a cache reload) keeps the existing inter-op size.
+
+    Returns:
+        Language: nlp, with its pipe batch size set
+    """
+    if torch is not None:
+        torch.set_num_threads(profile.threads)
+        try:
+            torch.set_num_interop_threads(profile.interop_threads)
+        except RuntimeError:
+            pass  # Already started
+    nlp.batch_size = profile.batch_size
+    nlp.max_length = max(nlp.max_length, profile.max_chunk_chars)
+    return nlp
+
+
+def inference_guard():
+    """Context manager that disables autograd bookkeeping while parsing."""
+    return torch.inference_mode() if torch is not None else contextlib.nullcontext()
+
+
+def _pieces(text, max_chars):
+    # Sentences with their trailing whitespace; over-long ones split after a space
+    start = 0
+    ends = [match.end() for match in SENTENCE_END.finditer(text)] + [len(text)]
+    for end in ends:
+        while end - start > max_chars:
+            cut = text.rfind(" ", start, start + max_chars)
+            cut = cut + 1 if cut > start else start + max_chars
+            yield text[start:cut]
+            start = cut
+        if end > start:
+            yield text[start:end]
+            start = end
+
+
+def chunk_text(text, max_chars):
+    """
+    Split text into pieces of at most max_chars, breaking between sentences.
+
+    A single sentence longer than max_chars is split between words. The
+    chunks keep every character, whitespace included, so "".join(chunks)
+    is text and `Doc.from_docs(docs, ensure_whitespace=False)` over their
+    Docs reproduces it with unchanged character offsets.
+
+    Returns:
+        list: Chunks in order; [] when text is only whitespace
+    """
+    if not text.strip():
+        return []
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks, current = [], ""
+    for piece in _pieces(text, max_chars):
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pipe(nlp, texts, profile):
+    """Run nlp.pipe over texts with the profile's batch size under the inference guard."""
+    with inference_guard():
+        return list(nlp.pipe(texts, batch_size=profile.batch_size))
+
+
+def parse(nlp, text, profile):
+    """
+    Parse text under a profile, chunking it when it is longer than max_chunk_chars.
+
+    Returns:
+        Doc: One Doc for the whole text
+    """
+    from spacy.tokens import Doc
+
+    chunks = chunk_text(text, profile.max_chunk_chars)
+    if len(chunks) <= 1:
+        with inference_guard():
+            return nlp(text)
+    return Doc.from_docs(pipe(nlp, chunks, profile), ensure_whitespace=False)
@@ -0,0 +1,183 @@
+"""
+Bounded vocabulary growth for long-running spaCy pipelines.
+
+spaCy interns every string it sees in `nlp.vocab.strings` (the StringStore)
+and keeps a lexeme per new word in `nlp.vocab`; neither ever shrinks, so a
+process parsing unbounded user input grows for as long as it runs.
+`ManagedPipeline` wraps a pipeline together with the function that loads it
+and tracks how many strings have been added since the load. Once that
+exceeds a limit, a replacement is loaded in a background thread and swapped
+in; requests keep being served by the old pipeline until the swap, and a
+request that already holds it finishes with it, so none are dropped.
+
+Instead of reloading, a process that can be replaced cheaply (a pre-forked
+worker whose parent holds the pristine pipeline) can pass `on_limit` and exit.
+
+The wrapper forwards attribute access to the current pipeline, so it can
+stand in for `nlp` (`nlp(text)`, `nlp.pipe(texts)`, `nlp.vocab`, ...).
+
+Settings come from the environment:
+
+    VOCAB_MAX_NEW_STRINGS    strings added before a reload, 0 disables (default: 250000)
+    VOCAB_CHECK_EVERY        requests between growth checks (default: 50)
+"""
+import logging
+import os
+import threading
+import time
+
+DEFAULT_MAX_NEW_STRINGS = 250000
+DEFAULT_CHECK_EVERY = 50
+
+logger = logging.getLogger(__name__)
+
+
+def limits_from_env(environ=None):
+    """Read max_new_strings and check_every from VOCAB_* environment variables."""
+    environ = os.environ if environ is None else environ
+    return {
+        "max_new_strings": int(environ.get("VOCAB_MAX_NEW_STRINGS") or DEFAULT_MAX_NEW_STRINGS),
+        "check_every": max(1, int(environ.get("VOCAB_CHECK_EVERY") or DEFAULT_CHECK_EVERY)),
+    }
+
+
+class ManagedPipeline:
+    """
+    A spaCy pipeline that is reloaded once its vocabulary has grown too much.
+
+    Args:
+        load (callable): Returns a freshly loaded pipeline
+        pipeline (Language): The initial pipeline; loaded with load() when None
+        max_new_strings (int): Strings added since the load that trigger a
+                               reload; 0 disables the limit
+        check_every (int): Requests between growth checks
+        on_limit (callable): Called instead of reloading when the limit is hit
+        name (str): Label for logs and stats
+    """
+
+    def __init__(self, load, pipeline=None, max_new_strings=DEFAULT_MAX_NEW_STRINGS,
+                 check_every=DEFAULT_CHECK_EVERY, on_limit=None, name="pipeline"):
+        self._load = load
+        self._lock = threading.Lock()
+        self._pipeline = pipeline if pipeline is not None else load()
+        self.max_new_strings = max_new_strings
+        self.check_every = check_every
+        self.on_limit = on_limit
+        self.name = name
+        self.generation = 0
+        self.requests = 0
+        self.reloads = 0
+        self.reloading = False
+        self.last_reload_seconds = None
+        self.last_error = None
+        self.baseline_strings = len(self._pipeline.vocab.strings)
+        self.baseline_lexemes = len(self._pipeline.vocab)
+        # Strings added by pipelines that have been replaced, for the growth rate
+        self.retired_strings = 0
+
+    def current(self):
+        """The pipeline in use right now."""
+        return self._pipeline
+
+    def __getattr__(self, name):
+        # Only called for attributes ManagedPipeline doesn't define
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._pipeline, name)
+
+    def for_request(self):
+        """
+        The pipeline to use for one request.
+
+        Every check_every calls, compares the vocabulary with its size after
+        the load and starts a reload (or calls on_limit) when over the limit.
+        Callers that need several Docs sharing one Vocab should parse them all
+        with the pipeline returned here.
+        """
+        with self._lock:
+            self.requests += 1
+            pipeline = self._pipeline
+            due = (self.max_new_strings > 0 and not self.reloading and self.requests % self.check_every == 0
+                   and len(pipeline.vocab.strings) - self.baseline_strings > self.max_new_strings)
+            if due:
+                self.reloading = True
+        if due:
+            logger.info("%s vocabulary grew by %d strings since load; %s", self.name,
+                        len(pipeline.vocab.strings) - self.baseline_strings,
+                        "calling on_limit" if self.on_limit else "reloading")
+            if self.on_limit:
+                self.on_limit()
+            else:
+                threading.Thread(target=self.reload, name=f"{self.name}-reload", daemon=True).start()
+        return pipeline
+
+    def __call__(self, text, **kwargs):
+        return self.for_request()(text, **kwargs)
+
+    def pipe(self, texts, **kwargs):
+        return self.for_request().pipe(texts, **kwargs)
+
+    def reload(self):
+        """Load a replacement pipeline and swap it in."""
+        with self._lock:
+            self.reloading = True
+        start = time.perf_counter()
+        try:
+            replacement = self._load()
+        except Exception as error:  # Keep serving with the grown pipeline
+            logger.exception("Reloading %s failed", self.name)
+            with self._lock:
+                self.last_error = str(error)
+                # Try again only after another max_new_strings
+                self.baseline_strings = len(self._pipeline.vocab.strings)
+                self.reloading = False
+            return
+        with self._lock:
+            self.retired_strings += len(self._pipeline.vocab.strings) - self.baseline_strings
+            self._pipeline = replacement
+            self.baseline_strings = len(replacement.vocab.strings)
+            self.baseline_lexemes = len(replacement.vocab)
+            self.generation += 1
+            self.reloads += 1
+            self.last_reload_seconds = time.perf_counter() - start
+            self.last_error = None
+            self.reloading = False
+
+    def reset_stats(self):
+        """
+        Count growth and requests from now on, e.g. after a warm-up; the
+        strings added so far become part of the baseline.
+        """
+        with self._lock:
+            self.requests = 0
+            self.retired_strings = 0
+            self.baseline_strings = len(self._pipeline.vocab.strings)
+            self.baseline_lexemes = len(self._pipeline.vocab)
+
+    def stats(self):
+        """
+        Vocabulary growth metrics.
+
+        Returns:
+            dict: Current "strings" and "lexemes", "new_strings" and
+                  "new_lexemes" since the last load, "strings_per_request"
+                  over the process lifetime, the limit, and reload counters
+        """
+        with self._lock:
+            vocab = self._pipeline.vocab
+            new_strings = len(vocab.strings) - self.baseline_strings
+            return {
+                "name": self.name,
+                "strings": len(vocab.strings),
+                "lexemes": len(vocab),
+                "new_strings": new_strings,
+                "new_lexemes": len(vocab) - self.baseline_lexemes,
+                "max_new_strings": self.max_new_strings,
+                "strings_per_request": (self.retired_strings + new_strings) / self.requests if self.requests else 0.0,
+                "requests": self.requests,
+                "generation": self.generation,
+                "reloads": self.reloads,
+                "reloading": self.reloading,
+                "last_reload_seconds": self.last_reload_seconds,
+                "last_error": self.last_error,
+            }
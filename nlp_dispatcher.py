@@ -0,0 +1,253 @@
+"""
+Micro-batching dispatcher for a spaCy pipeline shared between threads.
+
+Streamlit runs every session in its own thread, and all of them share one
+cached pipeline. Calling `nlp(text)` from several threads at once is not
+something spaCy promises to support, and a lock around it makes requests
+wait for each other one by one. An `NlpDispatcher` owns the pipeline
+instead: callers queue texts and wait on a Future, and a single worker
+thread collects what arrives within a short window (or until a batch is
+full) and runs it through one `nlp.pipe` call, so concurrent requests share
+a transformer batch instead of queueing behind each other.
+
+Per-request latency stays bounded by the window plus one batch. The window
+only applies while the previous batch held more than one request, so a
+lone request under low load runs at once; with a window of 0 only requests
+that are already queued are batched.
+
+The window comes from SPACY_BATCH_WAIT_MS (default: 10) and the longest a
+caller waits for its Docs from SPACY_DISPATCH_TIMEOUT_S (default: 120);
+batch size and chunking come from the inference profile.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import inference_profile
+
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("SPACY_BATCH_WAIT_MS") or 10)
+DEFAULT_TIMEOUT_S = float(os.environ.get("SPACY_DISPATCH_TIMEOUT_S") or 120)
+
+
+class _Job:
+    __slots__ = ("texts", "pipeline", "future", "queued_at")
+
+    def __init__(self, texts, pipeline):
+        self.texts = texts
+        self.pipeline = pipeline
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class NlpDispatcher:
+    """
+    Serialize and micro-batch calls into one pipeline.
+
+    Args:
+        nlp (Language or ManagedPipeline): The shared pipeline; for a
+            ManagedPipeline each request counts as one of its requests and
+            runs on the pipeline current when its batch starts
+        profile (InferenceProfile): Supplies the batch size and chunk length
+        max_wait_ms (float): How long the first request of a batch waits for
+                             others
+        name (str): Label for the worker thread and stats
+        timeout (float): Seconds parse() and pipe() wait for their Docs by
+                         default; None waits indefinitely
+    """
+
+    def __init__(self, nlp, profile=inference_profile.DEFAULT_PROFILE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 name="nlp", timeout=DEFAULT_TIMEOUT_S):
+        self.nlp = nlp
+        self.profile = profile
+        self.max_batch = profile.batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self.name = name
+        self._closed = False
+        self._start()
+        if hasattr(os, "register_at_fork"):
+            # Threads do not survive fork(); pre-forked workers need their own
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.queue_seconds = 0.0
+        self.batch_seconds = 0.0
+        self._last_batch_requests = 0
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-dispatcher", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        if not self._closed:
+            self._start()
+
+    def submit(self, texts, pipeline=None):
+        """
+        Queue texts to be parsed together in one batch.
+
+        Args:
+            texts (list): Texts to parse
+            pipeline (Language): Pipeline to parse with, e.g. one pinned by
+                                 the caller so all its Docs share a Vocab;
+                                 defaults to the dispatcher's
+
+        Returns:
+            Future: Resolves to the Docs, in order
+        """
+        job = _Job(list(texts), pipeline)
+        self._queue.put(job)
+        return job.future
+
+    def pipe(self, texts, pipeline=None, timeout=None):
+        """
+        Parse texts in one batch and wait for their Docs.
+
+        Raises concurrent.futures.TimeoutError after timeout seconds, by
+        default the dispatcher's.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.submit(texts, pipeline).result(self.timeout if timeout is None else timeout)
+
+    def parse(self, text, pipeline=None, timeout=None):
+        """
+        Parse one text, in sentence-aligned chunks when it is longer than
+        the profile's max_chunk_chars. See pipe() for the timeout.
+
+        Returns:
+            Doc: One Doc for the whole text, with doc.text == text
+
+        Raises:
+            ValueError: When the chunks' Docs don't add up to text
+        """
+        chunks = inference_profile.chunk_text(text, self.profile.max_chunk_chars)
+        if len(chunks) <= 1:
+            return self.pipe([text], pipeline, timeout)[0]
+        from spacy.tokens import Doc
+
+        # The chunks keep their whitespace, so no separators are added and offsets match the text
+        doc = Doc.from_docs(self.pipe(chunks, pipeline, timeout), ensure_whitespace=False)
+        if doc.text != text:
+            raise ValueError("chunked parse does not reproduce the input text")
+        return doc
+
+    def close(self):
+        """Stop the worker thread after the queued requests."""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            jobs, size = [job], len(job.texts)
+            # A lone request under low load doesn't wait for company that isn't coming
+            deadline = time.perf_counter() + (self.max_wait if self._last_batch_requests > 1 else 0)
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    following = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if following is None:
+                    self._queue.put(None)  # Close after this batch
+                    break
+                jobs.append(following)
+                size += len(following.texts)
+            self._last_batch_requests = len(jobs)
+            try:
+                self._run_batch(jobs)
+            except Exception as error:
+                # The worker must outlive any batch; otherwise every later request waits forever
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(error)
+
+    def _resolve(self):
+        for_request = getattr(self.nlp, "for_request", None)
+        return for_request() if for_request else self.nlp
+
+    def _run_batch(self, jobs):
+        groups = {}
+        for job in jobs:
+            pipeline = job.pipeline
+            if pipeline is None:
+                try:
+                    # Once per request, so a ManagedPipeline counts requests rather than batches
+                    pipeline = self._resolve()
+                except Exception as error:
+                    job.future.set_exception(error)
+                    continue
+            groups.setdefault(id(pipeline), (pipeline, []))[1].append(job)
+        for pipeline, group in groups.values():
+            self._run_group(pipeline, group)
+
+    def _run_group(self, pipeline, group):
+        texts = [text for job in group for text in job.texts]
+        start = time.perf_counter()
+        try:
+            with inference_profile.inference_guard():
+                docs = list(pipeline.pipe(texts, batch_size=self.max_batch))
+        except Exception as error:
+            if len(group) > 1:
+                # Keep one bad input from failing the requests batched with it
+                for job in group:
+                    self._run_group(pipeline, [job])
+            else:
+                group[0].future.set_exception(error)
+            return
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.batches += 1
+            self.requests += len(group)
+            self.texts += len(texts)
+            self.largest_batch = max(self.largest_batch, len(texts))
+            self.batch_seconds += elapsed
+            self.queue_seconds += sum(start - job.queued_at for job in group)
+        position = 0
+        for job in group:
+            job.future.set_result(docs[position:position + len(job.texts)])
+            position += len(job.texts)
+
+    def reset_stats(self):
+        """Zero the batching metrics, e.g. after a warm-up."""
+        with self._lock:
+            self.requests = 0
+            self.texts = 0
+            self.batches = 0
+            self.largest_batch = 0
+            self.queue_seconds = 0.0
+            self.batch_seconds = 0.0
+
+    def stats(self):
+        """
+        Batching metrics.
+
+        Returns:
+            dict: "requests", "texts", "batches", "mean_batch", "largest_batch",
+                  mean time requests spent queued ("mean_queue_ms") and
+                  mean batch run time ("mean_batch_ms"), and "queued" now
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "mean_batch": self.texts / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "mean_queue_ms": self.queue_seconds / self.requests * 1000 if self.requests else None,
+                "mean_batch_ms": self.batch_seconds / self.batches * 1000 if self.batches else None,
+                "queued": self._queue.qsize(),
+            }
@@ -1,15 +1,33 @@
 import streamlit as st
 import spacy
+from spacy.tokens import Doc
+from spacy.lang.en.stop_words import STOP_WORDS
 import dateparser
 import re
+import difflib
+import hashlib
+import threading
+import time
 import pandas as pd
 from dateparser import parse
 from datetime import datetime, timedelta
 from dateparser.search import search_dates
-import geonamescache
-from word2number import w2n
 import json
 import google.generativeai as genai
+from serialization import dumps_bytes, save_json
+import templates
+import paging
+import inference_profile
+from budget_engine import CATEGORIES, build_price_table, summarize_budget
+from currency import convert_price_table, load_rate_table
+from geocoder import geocode_itinerary, has_exact_positions
+from proximity import check_proximity
+from route_optimizer import apply_attraction_days, plan_attraction_days
+from doc_cache import cache_from_env
+from gazetteer import build_gazetteer
+from managed_pipeline import ManagedPipeline, limits_from_env
+from nlp_dispatcher import DEFAULT_MAX_WAIT_MS, DEFAULT_TIMEOUT_S, NlpDispatcher
+from number_normalizer import COUNT_NUMBER, DIGIT_NUMBER, NUMBER, NUMBER_WORD, format_number, parse_number
 
 # Configure the Streamlit page
 st.set_page_config(
@@ -169,17 +187,6 @@ def setup_gemini():
     genai.configure(api_key=GOOGLE_API_KEY)
     return genai.GenerativeModel('gemini-1.5-pro')  # Choose the appropriate model
 
-# Load spaCy model globally
-@st.cache_resource
-def load_spacy_model():
-    return spacy.load("en_core_web_trf")
-
-nlp = load_spacy_model()
-
-# Load city database from geonamescache
-gc = geonamescache.GeonamesCache()
-cities_dict = {city["name"].lower(): city["name"] for city in gc.get_cities().values()}
-
 # Define seasonal mappings
 seasonal_mappings = {
   "summer": "06-01",
@@ -194,85 +201,306 @@ seasonal_mappings = {
     "spring": "04-01"  
 }
 
-def extract_details(text):
-    doc = nlp(text)
-    text_lower = text.lower()
-    details = {
-        "Starting Location": None,
-        "Destination": None,
-        "Start Date": None,
-        "End Date": None,
-        "Trip Duration": None,
-        "Trip Type": None,
-        "Number of Travelers": None,
-        "Budget Range": None,
-        "Transportation Preferences": None,
-        "Accommodation Preferences": None,
-        "Special Requirements": None
-    }
-    # Extract locations
-    locations = [ent.text for ent in doc.ents if ent.label_ in {"GPE", "LOC"}]    
-    common_destinations = {"goa","Goa","French countryside","goa","Maldives", "Bali", "Paris", "New York", "Los Angeles", "San Francisco", "Tokyo", "London", "Dubai", "Rome", "Bangkok"}
-    # Backup regex-based location extraction
-    regex_matches = re.findall(r'\b(?:from|to|visit|traveling to|heading to|going to|in|at|of|to the|toward the)\s+([A-Z][a-z]+(?:\s[A-Z][a-z]+)*)', text)
-    # Check for cities in text using geonamescache
-    extracted_cities = []
-    words = text.split()
-    for i in range(len(words)):
-        for j in range(i + 1, min(i + 4, len(words))):  # Check up to 3-word phrases
-            phrase = " ".join(words[i:j+1])
-            if phrase.lower() in cities_dict or phrase in common_destinations:
-                extracted_cities.append(cities_dict[phrase.lower()])
+common_destinations = {"goa","Goa","French countryside","goa","Maldives", "Bali", "Paris", "New York", "Los Angeles", "San Francisco", "Tokyo", "London", "Dubai", "Rome", "Bangkok"}
+
+# Location gazetteer matched by an EntityRuler placed before "ner", so one pipeline
+# pass finds every known place; NER still labels places the gazetteer doesn't know
+GAZETTEER_PIPE = "location_gazetteer"
+
+@st.cache_resource
+def load_location_gazetteer():
+    """
+    Build the gazetteer from geonames cities above GAZETTEER_MIN_POPULATION,
+    countries and common_destinations.
+
+    Returns:
+        Gazetteer: Lowercased name -> {"name", "source", "population"}; the key
+                   is also the EntityRuler pattern id
+    """
+    # Cities named like function words ("Of", "Man") would match almost every sentence
+    return build_gazetteer(extra_names=common_destinations, exclude=STOP_WORDS)
+
+def add_location_gazetteer(pipeline):
+    # Before "ner" when the pipeline has one, so NER keeps the gazetteer's spans
+    before = "ner" if "ner" in pipeline.pipe_names else None
+    ruler = pipeline.add_pipe("entity_ruler", name=GAZETTEER_PIPE, before=before,
+                              config={"phrase_matcher_attr": "LOWER"})
+    ruler.add_patterns([{"label": "GPE", "pattern": entry["name"], "id": key}
+                        for key, entry in load_location_gazetteer().items()])
+    return pipeline
+
+# Thread, batch and chunk settings for the transformer on CPU hosts (SPACY_* env variables)
+INFERENCE_PROFILE = inference_profile.profile_from_env()
+
+# Pipelines are reloaded once their vocabulary has grown too much (VOCAB_* env variables)
+VOCAB_LIMITS = limits_from_env()
+
+def _load_transformer():
+    return inference_profile.apply_profile(add_location_gazetteer(spacy.load("en_core_web_trf")), INFERENCE_PROFILE)
+
+# Load spaCy model globally
+@st.cache_resource
+def load_spacy_model():
+    return ManagedPipeline(_load_transformer, name="transformer", **VOCAB_LIMITS)
+
+nlp = load_spacy_model()
+
+# Transformer Docs persisted across restarts (SPACY_DOC_CACHE_* env variables).
+# The gazetteer hash is part of the fingerprint, since its patterns shape the entities.
+@st.cache_resource
+def load_doc_cache():
+    gazetteer_hash = hashlib.sha1("\n".join(sorted(load_location_gazetteer())).encode("utf-8")).hexdigest()
+    return cache_from_env(nlp, salt=gazetteer_hash)
+
+def _parse_transformer(text):
+    return load_dispatcher("transformer").parse(text)
+
+def _pipe_transformer(texts):
+    return load_dispatcher("transformer").pipe(texts)
+
+# Cheaper tiers of the extraction cascade (see extract_locations_cascade)
+def _load_rules_pipeline():
+    # Tokenizer, sentence splitter and gazetteer only; no statistical model
+    rules = spacy.blank("en")
+    rules.add_pipe("sentencizer")
+    return add_location_gazetteer(rules)
+
+@st.cache_resource
+def load_rules_pipeline():
+    return ManagedPipeline(_load_rules_pipeline, name="rules", **VOCAB_LIMITS)
+
+def _load_small_model():
+    return add_location_gazetteer(spacy.load("en_core_web_sm"))
+
+@st.cache_resource
+def load_small_model():
+    try:
+        return ManagedPipeline(_load_small_model, name="small", **VOCAB_LIMITS)
+    except OSError:
+        return None  # Not installed; the cascade goes from the rules straight to the transformer
+
+def managed_pipelines():
+    return [pipeline for pipeline in (load_spacy_model(), load_rules_pipeline(), load_small_model())
+            if pipeline is not None]
+
+# Sessions run in their own threads and share the pipelines above; every call goes
+# through one dispatcher per pipeline, which micro-batches concurrent requests
+# (SPACY_BATCH_WAIT_MS) and gives up waiting after SPACY_DISPATCH_TIMEOUT_S. The
+# rules tier takes about a millisecond, so it only batches requests that are
+# already queued.
+@st.cache_resource
+def load_dispatcher(tier):
+    pipeline = {"rules": load_rules_pipeline, "small": load_small_model, "transformer": load_spacy_model}[tier]()
+    if pipeline is None:
+        return None
+    return NlpDispatcher(pipeline, INFERENCE_PROFILE, max_wait_ms=0 if tier == "rules" else DEFAULT_MAX_WAIT_MS,
+                         name=tier, timeout=DEFAULT_TIMEOUT_S)
+
+def location_spans(doc):
+    """
+    List the places found in a parsed Doc.
+
+    Args:
+        doc (Doc): Output of the pipeline, including the location gazetteer
+
+    Returns:
+        list: Dicts with the span "text", canonical "name", "source"
+              ("geonames_city", "geonames_country", "common_destination" or
+              "ner"), "population" (None when unknown), "start"/"end" character
+              offsets and "token_start"/"token_end" token offsets
+    """
+    gazetteer = load_location_gazetteer()
+    spans = []
+    for ent in doc.ents:
+        if ent.label_ not in {"GPE", "LOC"}:
+            continue
+        entry = gazetteer.get(ent.ent_id_ or ent.text.lower())
+        spans.append({
+            "text": ent.text,
+            "name": entry["name"] if entry else ent.text,
+            "source": entry["source"] if entry and ent.ent_id_ else "ner",
+            "population": entry["population"] if entry else None,
+            "start": ent.start_char,
+            "end": ent.end_char,
+            "token_start": ent.start,
+            "token_end": ent.end,
+        })
+    return spans
+
+# Transportation keywords by mode
+transport_modes = {
+    "flight": ["flight", "fly", "airplane", "airlines","airline" ,"aeroplane"],
+    "train": ["train", "railway"],
+    "bus": ["bus", "coach"],
+    "car": ["car", "auto", "automobile", "vehicle", "road trip", "drive"],
+    "boat": ["boat", "ship", "cruise", "ferry"],
+    "bike": ["bike", "bicycle", "cycling"],
+    "subway": ["subway", "metro", "underground"],
+    "tram": ["tram", "streetcar", "trolley"]
+}
 
-    # Combine all sources and remove duplicates while preserving order
+# Budget classification keywords
+budget_keywords = {
+    "friendly budget": "Mid-range Budget",
+    "mid-range budget": "Mid-range",
+    "luxury": "Luxury",
+    "cheap": "Low Budget",
+    "expensive": "Luxury",
+    "premium": "Luxury",
+    "high-range": "Luxury"
+}
+
+# Currency name to symbol mapping (handling singular & plural)
+currency_symbols = {
+    "USD": "$", "dollar": "$", "dollars": "$",
+    "EUR": "€", "euro": "€", "euros": "€",
+    "JPY": "¥", "yen": "¥",
+    "INR": "₹", "rupee": "₹", "rupees": "₹",
+    "GBP": "£", "pound": "£", "pounds": "£",
+    "CNY": "¥", "yuan": "¥", "RMB": "¥"
+}
+
+# Trip type keywords
+trip_types = {
+    "Adventure Travel": ["surfing","cycling","Scuba diving","hiking","trekking","camping", "skiing","ski", "backpacking", "extreme sports"],
+    "Ecotourism": ["wildlife watching", "nature walks", "eco-lodging"],
+    "Cultural Tourism": ["museum visits", "historical site tours", "local festivals"],
+    "Historical Tourism": ["castle tours", "archaeological site visits", "war memorial tours"],
+    "Luxury Travel": ["private island stays", "first-class flights", "fine dining experiences"],
+    "Wildlife Tourism": ["safari tours", "whale watching", "birdwatching"],
+    "Sustainable Tourism": ["eco-resorts", "community-based tourism", "carbon-neutral travel"],
+    "Volunteer Tourism": ["teaching abroad", "wildlife conservation", "disaster relief work"],
+    "Medical Tourism": ["cosmetic surgery", "dental care", "alternative medicine retreats"],
+    "Educational Tourism": ["study abroad programs", "language immersion", "historical research"],
+    "Business Travel": ["corporate meetings", "networking events", "industry trade shows"],
+    "Solo Travel": ["self-guided tours", "meditation retreats", "budget backpacking"],
+    "Group Travel": ["guided tours", "cruise trips", "family reunions"],
+    "Backpacking": ["hostel stays", "hitchhiking", "long-term travel"],
+    "Food Tourism": ["food tasting tours", "cooking classes", "street food exploration"],
+    "Religious Tourism": ["pilgrimages", "monastery visits", "religious festivals"],
+    "Digital Nomadism": ["co-working spaces", "long-term stays", "remote work-friendly cafes"],
+    "Family Travel": ["Family trip","theme parks","honeymoon", "kid-friendly resorts", "multi-generational travel","Family vacation"]
+}
+
+# Accommodation keywords by type
+accommodation_types = {
+    "Boutique hotels": ["hotel", "boutique hotel", "small hotel", "intimate hotel"],
+    "Resorts": ["resort", "holiday resort", "self-contained resort", "luxury resort"],
+    "Hostels": ["hostel","hostels", "dormitory", "shared accommodation"],
+    "Bed and breakfasts": ["bed and breakfast", "B&B", "guesthouse"],
+    "Motels": ["motel", "motor lodge", "roadside motel"],
+    "Guesthouses": ["guesthouse", "private guesthouse", "pension"],
+    "Vacation rentals": ["vacation rental", "holiday rental", "short-term rental", "airbnb"],
+    "Camping": ["camping", "campground", "tent", "camp"]
+}
+
+special_requirements = ["wheelchair access", "vegetarian meals", "vegan", "gluten-free"]
+
+# Words that introduce the origin or a stop of the route, and how many tokens
+# may separate them from the place they refer to ("to the old city of Kyoto")
+ROUTE_MARKERS = {"from": "origin", "to": "stop", "toward": "stop", "towards": "stop"}
+ROUTE_MAX_GAP = 6
+
+def resolve_route(doc, spans):
+    """
+    Resolve the route's legs in one left-to-right pass over the tokens.
+
+    A place within ROUTE_MAX_GAP tokens after "from" is the origin, one after
+    "to"/"toward" is the next stop, and a place right before the first "to"
+    is the origin of "Delhi to Mumbai to Goa" style routes.
+
+    Args:
+        doc (Doc): The parsed text
+        spans (list): Its location_spans
+
+    Returns:
+        list: Legs in travel order as {"from": name or None, "to": name} dicts;
+              empty when the text has no "from"/"to" places
+    """
+    span_starts = {span["token_start"]: span for span in spans}
+    origin, stops = None, []
+    pending, pending_at = None, 0
+    previous, previous_end = None, -1
+
+    position = 0
+    while position < len(doc):
+        token = doc[position]
+        if token.is_sent_start or position - pending_at > ROUTE_MAX_GAP:
+            pending = None
+        span = span_starts.get(position)
+        if span is not None:
+            name = span["name"]
+            if pending == "origin" and origin is None and name not in stops:
+                origin = name
+            elif pending == "stop" and (not stops or stops[-1] != name):
+                stops.append(name)
+            pending = None
+            previous, previous_end = name, span["token_end"]
+            position = span["token_end"]
+            continue
+
+        role = ROUTE_MARKERS.get(token.lower_)
+        if role is not None:
+            if role == "stop" and origin is None and not stops and previous_end == position:
+                origin = previous
+            pending, pending_at = role, position
+        position += 1
+
+    if not stops:
+        return [{"from": origin, "to": None}] if origin else []
+    route = [origin] + stops
+    return [{"from": start, "to": end} for start, end in zip(route, route[1:])]
+
+# Extract starting location and destination from the parsed doc
+def extract_locations(doc, text):
+    spans = location_spans(doc)
+    legs = resolve_route(doc, spans)
+
+    start_location = legs[0]["from"] if legs else None
+    destination = None
+    if legs and legs[-1]["to"]:
+        destination = legs[-1]["to"]
+        # Round trips end where they started; the destination is the last place before heading back
+        if destination == start_location and len(legs) > 1:
+            destination = legs[-1]["from"]
+
+    # Without "from"/"to", the first places mentioned are the start and destination
     seen = set()
-    all_locations = [loc for loc in locations + regex_matches + extracted_cities if not (loc in seen or seen.add(loc))]
-
-    # Determine starting location and destination using dependency parsing
-    start_location, destination = None, None
-    for token in doc:
-        if token.text.lower() == "from":
-            location = " ".join(w.text for w in token.subtree if w.ent_type_ in {"GPE", "LOC"})
-            if location:
-                start_location = location
-        elif token.text.lower() in {"to", "toward"}:
-            location = " ".join(w.text for w in token.subtree if w.ent_type_ in {"GPE", "LOC"})
-            if location:
-                destination = location
-
-    # If dependency parsing fails, use list extraction
+    all_locations = [span["name"] for span in spans if not (span["name"] in seen or seen.add(span["name"]))]
     if not start_location and not destination:
         if len(all_locations) > 1:
             start_location, destination = all_locations[:2]
         elif len(all_locations) == 1:
             destination = all_locations[0]
+    elif not destination:
+        destination = next((name for name in all_locations if name != start_location), None)
 
-    # Construct final details dictionary
     details = {}
     if start_location:
         details["Starting Location"] = start_location
     if destination:
         details["Destination"] = destination
+    if len(legs) > 1:
+        details["Route Legs"] = legs
+    return details
+
+# Extract trip duration, start date and end date
+def extract_dates(text):
+    details = {}
 
     # Extract duration
-    duration_match = re.search(r'(?P<value>\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s*[-]?\s*(?P<unit>day|days|night|nights|week|weeks|month|months)', text, re.IGNORECASE)
+    duration_match = re.search(r'(?P<value>' + NUMBER + r')\s*[-]?\s*(?P<unit>day|days|night|nights|week|weeks|month|months)\b', text, re.IGNORECASE)
     duration_days = None
 
     if duration_match:
         unit = duration_match.group("unit").lower()
-        value = duration_match.group("value").lower()
-
-        # Convert word-based numbers to digits
-        try:
-            value = int(value) if value.isdigit() else w2n.word_to_num(value)
-        except ValueError:
-            value = 1  # Default to 1 if conversion fails
+        value = parse_number(duration_match.group("value")) or 1  # Default to 1 if conversion fails
         if "week" in unit:
-            duration_days = value * 7   
+            duration_days = round(value * 7)
         elif "month" in unit:
-            duration_days = value * 30
+            duration_days = round(value * 30)
         else:
-            duration_days = value
+            duration_days = round(value)
         details["Trip Duration"] = f"{duration_days} days"
     else:
         # Handle cases where the duration is mentioned without a number
@@ -282,77 +510,64 @@ def extract_details(text):
             duration_days = 30
         elif "day" in text or "night" in text:
             duration_days = 1
-        
+
         if duration_days:
-            details["Trip Duration"] = f"{duration_days} days"        
-    
+            details["Trip Duration"] = f"{duration_days} days"
+
     # Extract dates
     text_lower = text.lower()
-    
-    # NEW PATTERN: Handle date ranges with format "5-12th june"
-    text_lower = text.lower()
-    
+
     # Create patterns for different date formats
-    
+
     # Pattern 1: Handle date ranges with format "from 3-13th april 2025"
     date_range_ordinal_pattern = r'from\s+(\d{1,2})(?:st|nd|rd|th)?-(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?'
     ordinal_match = re.search(date_range_ordinal_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 2: Handle formats like "from 22th june 2025 to 29th june 2025"
     date_to_date_pattern = r'from\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?\s+to\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?'
     to_date_match = re.search(date_to_date_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 3: Handle formats like "from 02-04-2025 to 29-04-2025"
     numeric_date_pattern = r'from\s+(\d{1,2})-(\d{1,2})-(\d{4})\s+to\s+(\d{1,2})-(\d{1,2})-(\d{4})'
     numeric_match = re.search(numeric_date_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 4: Handle formats like "from 12th march for two week"
-    date_for_duration_pattern = r'from\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?\s+for\s+(\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s+(day|days|week|weeks|month|months)'
+    date_for_duration_pattern = r'from\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?\s+for\s+(' + NUMBER + r')\s+(day|days|week|weeks|month|months)'
     date_for_duration_match = re.search(date_for_duration_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 5: Handle formats like "for a week from 13th april"
-    duration_from_date_pattern = r'for\s+(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten)\s+(day|days|week|weeks|month|months)\s+from\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?'
+    duration_from_date_pattern = r'for\s+(' + NUMBER + r')\s+(day|days|week|weeks|month|months)\s+from\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?'
     duration_from_date_match = re.search(duration_from_date_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 6: Handle formats like "for two weeks on 3rd april"
-    duration_on_date_pattern = r'for\s+(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten)\s+(day|days|week|weeks|month|months)\s+on\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?'
+    duration_on_date_pattern = r'for\s+(' + NUMBER + r')\s+(day|days|week|weeks|month|months)\s+on\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?'
     duration_on_date_match = re.search(duration_on_date_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 7: Handle formats like "on 13th march for a week"
-    on_date_for_duration_pattern = r'on\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?\s+for\s+(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten)\s+(day|days|week|weeks|month|months)'
+    on_date_for_duration_pattern = r'on\s+(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]+)(?:\s+(\d{4}))?\s+for\s+(' + NUMBER + r')\s+(day|days|week|weeks|month|months)'
     on_date_for_duration_match = re.search(on_date_for_duration_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 8: Handle formats like "for 2 weeks on 20/05/2025" or "for two weeks on 02-08-2025"
-    duration_on_numeric_date_pattern = r'for\s+(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten)\s+(day|days|week|weeks|month|months)\s+on\s+(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})'
+    duration_on_numeric_date_pattern = r'for\s+(' + NUMBER + r')\s+(day|days|week|weeks|month|months)\s+on\s+(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})'
     duration_on_numeric_date_match = re.search(duration_on_numeric_date_pattern, text, re.IGNORECASE)
-    
+
     # Pattern 9: Handle formats like "on 05/06/2025 for two weeks" or "on 06-07-2025 for 2 weeks"
-    on_numeric_date_for_duration_pattern = r'on\s+(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})\s+for\s+(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten)\s+(day|days|week|weeks|month|months)'
+    on_numeric_date_for_duration_pattern = r'on\s+(\d{1,2})[/\-](\d{1,2})[/\-](\d{4})\s+for\s+(' + NUMBER + r')\s+(day|days|week|weeks|month|months)'
     on_numeric_date_for_duration_match = re.search(on_numeric_date_for_duration_pattern, text, re.IGNORECASE)
-    
+
     # Function to convert text numbers to integers
     def convert_text_to_number(text_num):
-        if text_num.lower() in ['a', 'an']:
-            return 1
-        try:
-            return int(text_num)
-        except ValueError:
-            # Convert word numbers to digits
-            word_to_num = {
-                'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
-                'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10
-            }
-            return word_to_num.get(text_num.lower(), 1)
-    
+        return parse_number(text_num) or 1
+
     # Function to convert unit to days
     def convert_unit_to_days(num, unit):
         if 'week' in unit:
-            return num * 7
+            return round(num * 7)
         elif 'month' in unit:
-            return num * 30
+            return round(num * 30)
         else:  # days
-            return num
-    
+            return round(num)
+
     # Process the matched patterns
     if ordinal_match:
         # Handle format "from 3-13th april 2025"
@@ -360,56 +575,56 @@ def extract_details(text):
         end_day = ordinal_match.group(2)
         month = ordinal_match.group(3)
         year = ordinal_match.group(4) or datetime.today().year
-        
+
         start_date_text = f"{start_day} {month} {year}"
         end_date_text = f"{end_day} {month} {year}"
-        
+
         start_date = dateparser.parse(start_date_text, settings={'PREFER_DATES_FROM': 'future'})
         end_date = dateparser.parse(end_date_text, settings={'PREFER_DATES_FROM': 'future'})
-        
+
         if start_date and end_date:
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{(end_date - start_date).days + 1} days"  # +1 to include both days
-    
+
     elif to_date_match:
         # Handle format "from 22th june 2025 to 29th june 2025"
         start_day = to_date_match.group(1)
         start_month = to_date_match.group(2)
         start_year = to_date_match.group(3) or datetime.today().year
-        
+
         end_day = to_date_match.group(4)
         end_month = to_date_match.group(5) or start_month
         end_year = to_date_match.group(6) or start_year
-        
+
         start_date_text = f"{start_day} {start_month} {start_year}"
         end_date_text = f"{end_day} {end_month} {end_year}"
-        
+
         start_date = dateparser.parse(start_date_text, settings={'PREFER_DATES_FROM': 'future'})
         end_date = dateparser.parse(end_date_text, settings={'PREFER_DATES_FROM': 'future'})
-        
+
         if start_date and end_date:
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{(end_date - start_date).days + 1} days"
-    
+
     elif numeric_match:
         # Handle format "from 02-04-2025 to 29-04-2025"
         start_day = numeric_match.group(1)
         start_month = numeric_match.group(2)
         start_year = numeric_match.group(3)
-        
+
         end_day = numeric_match.group(4)
         end_month = numeric_match.group(5)
         end_year = numeric_match.group(6)
-        
+
         start_date = datetime(int(start_year), int(start_month), int(start_day))
         end_date = datetime(int(end_year), int(end_month), int(end_day))
-        
+
         details["Start Date"] = start_date.strftime('%Y-%m-%d')
         details["End Date"] = end_date.strftime('%Y-%m-%d')
         details["Trip Duration"] = f"{(end_date - start_date).days + 1} days"
-    
+
     elif date_for_duration_match:
         # Handle format "from 12th march for two week"
         day = date_for_duration_match.group(1)
@@ -417,18 +632,18 @@ def extract_details(text):
         year = date_for_duration_match.group(3) or datetime.today().year
         duration_num = convert_text_to_number(date_for_duration_match.group(4))
         duration_unit = date_for_duration_match.group(5)
-        
+
         start_date_text = f"{day} {month} {year}"
         start_date = dateparser.parse(start_date_text, settings={'PREFER_DATES_FROM': 'future'})
-        
+
         if start_date:
             duration_days = convert_unit_to_days(duration_num, duration_unit)
             end_date = start_date + timedelta(days=duration_days - 1)  # -1 to make duration inclusive of start day
-            
+
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{duration_days} days"
-    
+
     elif duration_from_date_match:
         # Handle format "for a week from 13th april"
         duration_num = convert_text_to_number(duration_from_date_match.group(1))
@@ -436,18 +651,18 @@ def extract_details(text):
         day = duration_from_date_match.group(3)
         month = duration_from_date_match.group(4)
         year = duration_from_date_match.group(5) or datetime.today().year
-        
+
         start_date_text = f"{day} {month} {year}"
         start_date = dateparser.parse(start_date_text, settings={'PREFER_DATES_FROM': 'future'})
-        
+
         if start_date:
             duration_days = convert_unit_to_days(duration_num, duration_unit)
             end_date = start_date + timedelta(days=duration_days - 1)
-            
+
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{duration_days} days"
-    
+
     elif duration_on_date_match:
         # Handle format "for two weeks on 3rd april"
         duration_num = convert_text_to_number(duration_on_date_match.group(1))
@@ -455,18 +670,18 @@ def extract_details(text):
         day = duration_on_date_match.group(3)
         month = duration_on_date_match.group(4)
         year = duration_on_date_match.group(5) or datetime.today().year
-        
+
         start_date_text = f"{day} {month} {year}"
         start_date = dateparser.parse(start_date_text, settings={'PREFER_DATES_FROM': 'future'})
-        
+
         if start_date:
             duration_days = convert_unit_to_days(duration_num, duration_unit)
             end_date = start_date + timedelta(days=duration_days - 1)
-            
+
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{duration_days} days"
-    
+
     elif on_date_for_duration_match:
         # Handle format "on 13th march for a week"
         day = on_date_for_duration_match.group(1)
@@ -474,18 +689,18 @@ def extract_details(text):
         year = on_date_for_duration_match.group(3) or datetime.today().year
         duration_num = convert_text_to_number(on_date_for_duration_match.group(4))
         duration_unit = on_date_for_duration_match.group(5)
-        
+
         start_date_text = f"{day} {month} {year}"
         start_date = dateparser.parse(start_date_text, settings={'PREFER_DATES_FROM': 'future'})
-        
+
         if start_date:
             duration_days = convert_unit_to_days(duration_num, duration_unit)
             end_date = start_date + timedelta(days=duration_days - 1)
-            
+
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{duration_days} days"
-    
+
     elif duration_on_numeric_date_match:
         # Handle format "for 2 weeks on 20/05/2025" or "for two weeks on 02-08-2025"
         duration_num = convert_text_to_number(duration_on_numeric_date_match.group(1))
@@ -493,19 +708,19 @@ def extract_details(text):
         day = duration_on_numeric_date_match.group(3)
         month = duration_on_numeric_date_match.group(4)
         year = duration_on_numeric_date_match.group(5)
-        
+
         try:
             start_date = datetime(int(year), int(month), int(day))
             duration_days = convert_unit_to_days(duration_num, duration_unit)
             end_date = start_date + timedelta(days=duration_days - 1)
-            
+
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{duration_days} days"
         except ValueError:
             # Handle potential date validation errors
             pass
-    
+
     elif on_numeric_date_for_duration_match:
         # Handle format "on 05/06/2025 for two weeks" or "on 06-07-2025 for 2 weeks"
         day = on_numeric_date_for_duration_match.group(1)
@@ -513,28 +728,19 @@ def extract_details(text):
         year = on_numeric_date_for_duration_match.group(3)
         duration_num = convert_text_to_number(on_numeric_date_for_duration_match.group(4))
         duration_unit = on_numeric_date_for_duration_match.group(5)
-        
+
         try:
             start_date = datetime(int(year), int(month), int(day))
             duration_days = convert_unit_to_days(duration_num, duration_unit)
             end_date = start_date + timedelta(days=duration_days - 1)
-            
+
             details["Start Date"] = start_date.strftime('%Y-%m-%d')
             details["End Date"] = end_date.strftime('%Y-%m-%d')
             details["Trip Duration"] = f"{duration_days} days"
         except ValueError:
             # Handle potential date validation errors
             pass
-    
-    # If none of the specific patterns matched, fall back to existing date extraction logic
-    if not details.get("Start Date"):
-        # Enhanced regex for extracting date ranges in multiple formats
-        date_range_match = re.search(
-            r'(?P<start_day>\d{1,2})(?:st|nd|rd|th)?\s*(?P<start_month>[A-Za-z]+)?,?\s*(?P<start_year>\d{4})?\s*(?:-|from|on|to|through)\s*'
-            r'(?P<end_day>\d{1,2})(?:st|nd|rd|th)?\s*(?P<end_month>[A-Za-z]+)?,?\s*(?P<end_year>\d{4})?',
-            text, re.IGNORECASE
-)
-        
+
     if seasonal_mappings:
         for season, start_month_day in seasonal_mappings.items():
             pattern = r'\b' + re.escape(season) + r'\b'
@@ -542,47 +748,34 @@ def extract_details(text):
                 today = datetime.today().year
                 start_date = f"{today}-{start_month_day}"
                 details["Start Date"] = start_date
-                if "duration_days" in locals():
+                if duration_days:
                     details["End Date"] = (datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=duration_days)).strftime('%Y-%m-%d')
-                break  
-    
-    # Extract number of travelers
-    travelers_match = re.search(r'(?P<adults>\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s*(?:people|persons|adult|person|adults|man|men|woman|women|lady|ladies|climber|traveler)',text, re.IGNORECASE)
-    children_match = re.search(r'(?P<children>\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s*(?:child|children)', text, re.IGNORECASE)
-    infants_match = re.search(r'(?P<infants>\d+|one|two|three|four|five|six|seven|eight|nine|ten)\s*(?:infant|infants)', text, re.IGNORECASE)
+                break
+
+    return details
+
+# Extract number of travelers
+def extract_travelers(text):
+    travelers_match = re.search(r'(?P<adults>' + COUNT_NUMBER + r')\s*(?:people|persons|adult|person|adults|man|men|woman|women|lady|ladies|climber|climbers|traveler|travelers)\b',text, re.IGNORECASE)
+    children_match = re.search(r'(?P<children>' + COUNT_NUMBER + r')\s*(?:child|children)\b', text, re.IGNORECASE)
+    infants_match = re.search(r'(?P<infants>' + COUNT_NUMBER + r')\s*(?:infant|infants)\b', text, re.IGNORECASE)
 
     solo_match = re.search(r'\b(?:solo|alone|I|me)\b', text, re.IGNORECASE)
     duo_match = re.search(r'\b(?:duo|honeymoon|couple|pair|my partner and I|my wife and I|my husband and I)\b', text, re.IGNORECASE)
     trio_match = re.search(r'\btrio\b', text, re.IGNORECASE)
     group_match = re.search(r'family of (\d+)|group of (\d+)', text, re.IGNORECASE)
-     
-    # Count occurrences of adult-related words
-    adult_words_match = len(re.findall(r'\b(?:man|men|woman|women|lady|ladies)\b', text, re.IGNORECASE))
-    number_words = {
-    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
-    "six": "6", "seven": "7", "eight": "8", "nine": "9","ten": "10"}
-
-    # Convert written numbers for adults
-    num_adults_text = travelers_match.group("adults") if travelers_match else "0"
-    num_adults_text = number_words.get(num_adults_text.lower(), num_adults_text)
-    num_adults = int(num_adults_text)
-
-    # Convert written numbers for children
-    num_children_text = children_match.group("children") if children_match else "0"
-    num_children_text = number_words.get(num_children_text.lower(), num_children_text)
-    num_children = int(num_children_text)
-
-    # Convert written numbers for infants
-    num_infants_text = infants_match.group("infants") if infants_match else "0"
-    num_infants_text = number_words.get(num_infants_text.lower(), num_infants_text)
-    num_infants = int(num_infants_text)
+
+    # Convert written numbers
+    num_adults = int(parse_number(travelers_match.group("adults")) or 0) if travelers_match else 0
+    num_children = int(parse_number(children_match.group("children")) or 0) if children_match else 0
+    num_infants = int(parse_number(infants_match.group("infants")) or 0) if infants_match else 0
 
     travelers = {
     "Adults": num_adults,
     "Children": num_children,
     "Infants": num_infants
     }
-    
+
     if solo_match:
         travelers["Adults"] = 1
     elif duo_match:
@@ -593,86 +786,56 @@ def extract_details(text):
         total_people = int(group_match.group(1) or group_match.group(2))
         if total_people > 2:
             travelers["Adults"] = max(2, total_people - travelers["Children"] - travelers["Infants"])
-    
-    details["Number of Travelers"] = travelers
-    
-    # Extract transportation preferences
-    transport_modes = {
-        "flight": ["flight", "fly", "airplane", "airlines","airline" ,"aeroplane"],
-        "train": ["train", "railway"],
-        "bus": ["bus", "coach"],
-        "car": ["car", "auto", "automobile", "vehicle", "road trip", "drive"],
-        "boat": ["boat", "ship", "cruise", "ferry"],
-        "bike": ["bike", "bicycle", "cycling"],
-        "subway": ["subway", "metro", "underground"],
-        "tram": ["tram", "streetcar", "trolley"]
-    }
-    
+
+    return {"Number of Travelers": travelers}
+
+# Extract transportation preferences
+def extract_transport_preferences(text):
     transport_matches = []
     for mode, keywords in transport_modes.items():
         for keyword in keywords:
             if re.search(r'\b' + re.escape(keyword) + r'\b', text, re.IGNORECASE):
                 transport_matches.append(mode)
                 break
-    
-    details["Transportation Preferences"] = transport_matches if transport_matches else "Any"
 
-    # Extract budget details
-    # Budget classification keywords
-    budget_keywords = {
-    "friendly budget": "Mid-range Budget",
-    "mid-range budget": "Mid-range",
-    "luxury": "Luxury",
-    "cheap": "Low Budget",
-    "expensive": "Luxury",
-    "premium": "Luxury",
-    "high-range": "Luxury"
-    }
+    return {"Transportation Preferences": transport_matches if transport_matches else "Any"}
 
+# Extract budget details
+def extract_budget(text):
     budget_matches = []
     # Check for budget keywords in text
     for key, val in budget_keywords.items():
         if re.search(r'\b' + re.escape(key) + r'\b', text, re.IGNORECASE):
             budget_matches.append(val)
 
-    # Currency name to symbol mapping (handling singular & plural)
-    currency_symbols = {
-    "USD": "$", "dollar": "$", "dollars": "$",
-    "EUR": "€", "euro": "€", "euros": "€",
-    "JPY": "¥", "yen": "¥",
-    "INR": "₹", "rupee": "₹", "rupees": "₹",
-    "GBP": "£", "pound": "£", "pounds": "£",
-    "CNY": "¥", "yuan": "¥", "RMB": "¥"
-    }
-
     # First pattern: Budget with context words
     budget_context_match = re.search(
-    r'\b(?:budget|cost|expense|spending cap|is|max limit|cost limit|amount|price)\s*(?:of\s*)?(?P<currency>\$|€|¥|₹|£)?\s*(?P<amount>[\d,]+)\s*(?P<currency_name>USD|dollars?|yen|JPY|euro|EUR|euros|rupees?|INR|pounds?|GBP|CNY|yuan|RMB)?\b',
+    r'\b(?:budget|cost|expense|spending cap|is|max limit|cost limit|amount|price)\s*(?:of\s*)?(?P<currency>\$|€|¥|₹|£)?\s*(?P<amount>' + DIGIT_NUMBER + r')\s*(?P<currency_name>USD|dollars?|yen|JPY|euro|EUR|euros|rupees?|INR|pounds?|GBP|CNY|yuan|RMB)?\b',
     text, re.IGNORECASE
     )
 
     # Second pattern: Direct currency amount without context words
     direct_currency_match = re.search(
-    r'\b(?P<currency>\$|€|¥|₹|£)\s*(?P<amount>[\d,]+)\b|\b(?P<amount2>[\d,]+)\s*(?P<currency_name>USD|dollars?|yen|JPY|euro|EUR|euros|rupees?|INR|pounds?|GBP|CNY|yuan|RMB)\b',
+    r'(?P<currency>\$|€|¥|₹|£)\s*(?P<amount>' + DIGIT_NUMBER + r')|\b(?P<amount2>' + DIGIT_NUMBER + r')\s*(?P<currency_name>USD|dollars?|yen|JPY|euro|EUR|euros|rupees?|INR|pounds?|GBP|CNY|yuan|RMB)\b',
     text, re.IGNORECASE
     )
 
     # Process budget amount and currency
     if budget_context_match:
         currency_symbol = budget_context_match.group("currency") or ""
-        amount = budget_context_match.group("amount").replace(",", "")  # Normalize number format
+        amount = format_number(parse_number(budget_context_match.group("amount")))  # Normalize number format
         currency_name = budget_context_match.group("currency_name") or ""
         detected_symbol = currency_symbol or currency_symbols.get(currency_name.lower(), "")
-        
+
         if not currency_symbol and not currency_name:
             budget_value = f"{amount} (Specify currency)"
         else:
             budget_value = f"{detected_symbol}{amount}" + (f" ({currency_name})" if currency_name and not currency_symbol else "")
-    
+
     # Use detected symbol or mapped currency name
     elif direct_currency_match:
         currency_symbol = direct_currency_match.group("currency") or ""
-        amount = direct_currency_match.group("amount") or direct_currency_match.group("amount2")
+        amount = format_number(parse_number(direct_currency_match.group("amount") or direct_currency_match.group("amount2")))
         currency_name = direct_currency_match.group("currency_name") or ""
         detected_symbol = currency_symbol or currency_symbols.get(currency_name.lower(), "")
     # Use detected symbol or mapped currency name
@@ -684,68 +847,277 @@ def extract_details(text):
     else:
        budget_value = budget_matches[0] if budget_matches else "Unknown"
 
-    # Assign to details dictionary
-    details["Budget Range"] = budget_value
-    
-    # Extract trip type
-    trip_type = {
-    "Adventure Travel": ["surfing","cycling","Scuba diving","hiking","trekking","camping", "skiing","ski", "backpacking", "extreme sports"],
-    "Ecotourism": ["wildlife watching", "nature walks", "eco-lodging"],
-    "Cultural Tourism": ["museum visits", "historical site tours", "local festivals"],
-    "Historical Tourism": ["castle tours", "archaeological site visits", "war memorial tours"],
-    "Luxury Travel": ["private island stays", "first-class flights", "fine dining experiences"],
-    "Wildlife Tourism": ["safari tours", "whale watching", "birdwatching"],
-    "Sustainable Tourism": ["eco-resorts", "community-based tourism", "carbon-neutral travel"],
-    "Volunteer Tourism": ["teaching abroad", "wildlife conservation", "disaster relief work"],
-    "Medical Tourism": ["cosmetic surgery", "dental care", "alternative medicine retreats"],
-    "Educational Tourism": ["study abroad programs", "language immersion", "historical research"],
-    "Business Travel": ["corporate meetings", "networking events", "industry trade shows"],
-    "Solo Travel": ["self-guided tours", "meditation retreats", "budget backpacking"],
-    "Group Travel": ["guided tours", "cruise trips", "family reunions"],
-    "Backpacking": ["hostel stays", "hitchhiking", "long-term travel"],
-    "Food Tourism": ["food tasting tours", "cooking classes", "street food exploration"],
-    "Religious Tourism": ["pilgrimages", "monastery visits", "religious festivals"],
-    "Digital Nomadism": ["co-working spaces", "long-term stays", "remote work-friendly cafes"],
-    "Family Travel": ["Family trip","theme parks","honeymoon", "kid-friendly resorts", "multi-generational travel","Family vacation"]
-    }
-    
+    return {"Budget Range": budget_value}
+
+# Extract trip type, accommodation preferences and special requirements
+def extract_preferences(text):
+    details = {}
+
     trip_type_matches = []
-    for trip, keywords in trip_type.items():
+    for trip, keywords in trip_types.items():
         for keyword in keywords:
             if re.search(r'\b' + re.escape(keyword) + r'\b', text, re.IGNORECASE):
                trip_type_matches.append(trip)
                break
-    
+
     details["Trip Type"] = trip_type_matches if trip_type_matches else "Leisure"
-       
-    # Extract accommodation preferences
-    accommodation_types = {
-    "Boutique hotels": ["hotel", "boutique hotel", "small hotel", "intimate hotel"],
-    "Resorts": ["resort", "holiday resort", "self-contained resort", "luxury resort"],
-    "Hostels": ["hostel","hostels", "dormitory", "shared accommodation"],
-    "Bed and breakfasts": ["bed and breakfast", "B&B", "guesthouse"],
-    "Motels": ["motel", "motor lodge", "roadside motel"],
-    "Guesthouses": ["guesthouse", "private guesthouse", "pension"],
-    "Vacation rentals": ["vacation rental", "holiday rental", "short-term rental", "airbnb"],
-    "Camping": ["camping", "campground", "tent", "camp"]
-    }
-    
+
     accommodation_matches = []
     for accomm_type, keywords in accommodation_types.items():
         for keyword in keywords:
             if re.search(r'\b' + re.escape(keyword) + r'\b', text, re.IGNORECASE):
                 accommodation_matches.append(accomm_type)
                 break
-    
+
     details["Accommodation Preferences"] = accommodation_matches if accommodation_matches else "Not specified"
-    
-    # Extract special preferences    
-    special_requirements = ["wheelchair access", "vegetarian meals", "vegan", "gluten-free"]
+
+    # Extract special preferences
     found_requirements = [req for req in special_requirements if req in text.lower()]
     details["Special Requirements"] = ", ".join(found_requirements) if found_requirements else "Not specified"
-    
+
     return details
 
+# Field extractors in output order; "locations" is the only one that needs the spaCy doc
+FIELD_EXTRACTORS = [
+    ("locations", extract_locations),
+    ("dates", extract_dates),
+    ("travelers", extract_travelers),
+    ("transport", extract_transport_preferences),
+    ("budget", extract_budget),
+    ("preferences", extract_preferences),
+]
+
+# Extraction cascade: locations are first resolved with the gazetteer alone, then
+# with en_core_web_sm, and only then with the transformer; the other fields are
+# regex-based and never need a model
+CASCADE_TIERS = ("rules", "small", "transformer")
+CASCADE_MIN_CONFIDENCE = 0.75
+
+def location_confidence(doc, locations):
+    """
+    Score how far a locations result can be trusted without a larger model.
+
+    Returns:
+        float: 1.0 when "to"/"toward" named a known destination, 0.6 when
+               the destination is only the first place mentioned, 0.4 when a
+               capitalized word after "from"/"to" is not a known place (a
+               larger model may recognize it) and 0.0 without a destination
+    """
+    if not locations.get("Destination"):
+        return 0.0
+    for token in doc[:-1]:
+        following = doc[token.i + 1]
+        if token.lower_ in ROUTE_MARKERS and following.is_title and following.is_alpha \
+                and not following.is_stop and not following.ent_type_:
+            return 0.4
+    legs = resolve_route(doc, location_spans(doc))
+    return 1.0 if legs and legs[-1]["to"] else 0.6
+
+class CascadeStats:
+    """Process-wide counts of which tier resolved the locations, and how long each took."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.resolved = {tier: 0 for tier in CASCADE_TIERS}
+            self.seconds = {tier: 0.0 for tier in CASCADE_TIERS}
+            self.transformer_runs = 0
+            self.transformer_seconds = 0.0
+
+    def record(self, tier, seconds, transformer_seconds=None):
+        with self.lock:
+            self.resolved[tier] += 1
+            self.seconds[tier] += seconds
+            if transformer_seconds is not None:
+                self.transformer_runs += 1
+                self.transformer_seconds += transformer_seconds
+
+    def report(self):
+        """
+        Summarize the traffic seen so far.
+
+        Returns:
+            dict: Per tier "requests", "share" and "mean_ms", plus
+                  "saved_seconds": time not spent in the transformer, estimated
+                  from its mean latency (None until it has run once)
+        """
+        with self.lock:
+            total = sum(self.resolved.values())
+            tiers = {tier: {"requests": count, "share": count / total if total else 0.0,
+                            "mean_ms": self.seconds[tier] / count * 1000 if count else None}
+                     for tier, count in self.resolved.items()}
+            saved = None
+            if self.transformer_runs:
+                mean_transformer = self.transformer_seconds / self.transformer_runs
+                early = [tier for tier in CASCADE_TIERS if tier != "transformer"]
+                saved = sum(self.resolved[tier] for tier in early) * mean_transformer \
+                    - sum(self.seconds[tier] for tier in early)
+            return {"requests": total, "tiers": tiers, "saved_seconds": saved}
+
+@st.cache_resource
+def load_cascade_stats():
+    return CascadeStats()
+
+def extract_locations_cascade(text, parse_transformer=None):
+    """
+    Extract the locations with the cheapest tier that resolves them confidently.
+
+    Args:
+        text (str): The travel description
+        parse_transformer (callable): Returns the transformer Doc for text;
+                                      defaults to the Doc cache, parsing text on a miss
+
+    Returns:
+        tuple: (locations dict, tier name, confidence)
+    """
+    start = time.perf_counter()
+    for tier in CASCADE_TIERS:
+        if tier == "transformer":
+            tier_start = time.perf_counter()
+            doc = parse_transformer() if parse_transformer else load_doc_cache().parse(text, _parse_transformer)
+            locations = extract_locations(doc, text)
+            confidence = location_confidence(doc, locations)
+            load_cascade_stats().record(tier, time.perf_counter() - start, time.perf_counter() - tier_start)
+            return locations, tier, confidence
+
+        dispatcher = load_dispatcher(tier)
+        if dispatcher is None:
+            continue
+        doc = dispatcher.parse(text)
+        locations = extract_locations(doc, text)
+        confidence = location_confidence(doc, locations)
+        if confidence >= CASCADE_MIN_CONFIDENCE:
+            load_cascade_stats().record(tier, time.perf_counter() - start)
+            return locations, tier, confidence
+
+def extract_details(text):
+    details = {}
+    for field, extractor in FIELD_EXTRACTORS:
+        if field == "locations":
+            details.update(extract_locations_cascade(text)[0])
+        else:
+            details.update(extractor(text))
+    return details
+
+# Words an edit must touch for a field extractor's result to possibly change. An edit is
+# seen as the changed words plus one neighbour on each side, which can leave out the unit
+# a number belongs to ("a dozen people" -> "two dozen people" changes "for two dozen"),
+# so the fields with spelled-out counts also trigger on every number word.
+def _keyword_trigger(keywords):
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+
+FIELD_TRIGGERS = {
+    "dates": re.compile(r'\d|day|night|week|month|' + NUMBER_WORD + "|" + "|".join(seasonal_mappings), re.IGNORECASE),
+    "travelers": re.compile(r'\d|people|person|adult|man|men|lad(?:y|ies)|climber|traveler|child|infant|'
+                            r'solo|alone|\bI\b|\bme\b|duo|honeymoon|couple|pair|partner|wife|husband|trio|family|group|'
+                            + NUMBER_WORD, re.IGNORECASE),
+    "transport": _keyword_trigger(k for keywords in transport_modes.values() for k in keywords),
+    "budget": re.compile(r'\d|[$€¥₹£]|budget|cost|expense|spending|limit|amount|price|\bis\b|'
+                         r'usd|dollar|eur|yen|jpy|rupee|inr|pound|gbp|cny|yuan|rmb|'
+                         + "|".join(re.escape(key) for key in budget_keywords), re.IGNORECASE),
+    "preferences": _keyword_trigger([k for keywords in trip_types.values() for k in keywords]
+                                    + [k for keywords in accommodation_types.values() for k in keywords]
+                                    + special_requirements),
+}
+
+# Split on sentence ends and line breaks so unchanged sentences keep their spaCy analysis
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+|\n+')
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in SENTENCE_SPLIT_PATTERN.split(text) if sentence.strip()]
+
+def _mentions_location(fragment):
+    if re.search(r'[A-Z]', fragment):
+        return True
+    gazetteer = load_location_gazetteer()
+    words = fragment.lower().split()
+    for i in range(len(words)):
+        for j in range(i + 1, min(i + 5, len(words) + 1)):
+            if " ".join(words[i:j]) in gazetteer:
+                return True
+    return False
+
+def parse_sentences(sentences, doc_cache):
+    """
+    Build a Doc for the text from per-sentence Docs, running the pipeline only
+    on sentences that are neither in doc_cache nor in the disk Doc cache.
+
+    Args:
+        sentences (list): Sentences of the text, in order
+        doc_cache (dict): Maps sentence text to its parsed Doc; updated in place
+                          and pruned to the given sentences
+
+    Returns:
+        Doc: A single Doc covering all sentences
+    """
+    # One pipeline for the whole call: Doc.from_docs needs every Doc in the same Vocab
+    pipeline = nlp.for_request()
+    sentence_set = set(sentences)
+    for sentence in list(doc_cache):
+        # Docs parsed before a reload belong to the old Vocab
+        if sentence not in sentence_set or doc_cache[sentence].vocab is not pipeline.vocab:
+            del doc_cache[sentence]
+    missing = [sentence for sentence in dict.fromkeys(sentences) if sentence not in doc_cache]
+    parsed = load_doc_cache().pipe(missing, lambda texts: load_dispatcher("transformer").pipe(texts, pipeline),
+                                   vocab=pipeline.vocab)
+    for sentence, doc in zip(missing, parsed):
+        doc_cache[sentence] = doc
+    if not sentences:
+        return load_dispatcher("transformer").parse("", pipeline)
+    return Doc.from_docs([doc_cache[sentence] for sentence in sentences])
+
+def extract_details_incremental(text, state):
+    """
+    Extract travel details, re-running only the field extractors whose source
+    text changed since the previous call with the same state.
+
+    Args:
+        text (str): The travel description
+        state (dict): Mutable per-session state (e.g. from st.session_state)
+                      holding the previous text, field results and parsed Docs
+
+    Returns:
+        tuple: (details dict, list of field extractors that were re-run)
+    """
+    words = text.split()
+    previous_words = state.get("text", "").split()
+    field_results = state.setdefault("field_results", {})
+    doc_cache = state.setdefault("doc_cache", {})
+
+    # Word spans that were inserted, removed or edited since the previous input.
+    # One neighbouring word is kept on each side so edits that split or join a phrase are seen.
+    changed = []
+    matcher = difflib.SequenceMatcher(None, previous_words, words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changed.append(" ".join(previous_words[max(i1 - 1, 0):i2 + 1]))
+            changed.append(" ".join(words[max(j1 - 1, 0):j2 + 1]))
+
+    rerun = []
+    details = {}
+    for field, extractor in FIELD_EXTRACTORS:
+        if field not in field_results:
+            dirty = True
+        elif field == "locations":
+            dirty = any(_mentions_location(fragment) for fragment in changed)
+        else:
+            dirty = any(FIELD_TRIGGERS[field].search(fragment) for fragment in changed)
+
+        if dirty:
+            if field == "locations":
+                field_results[field], _, _ = extract_locations_cascade(
+                    text, lambda: parse_sentences(split_sentences(text), doc_cache))
+            else:
+                field_results[field] = extractor(text)
+            rerun.append(field)
+        details.update(field_results[field])
+
+    state["text"] = text
+    return details, rerun
+
 # Function to generate itinerary using Gemini
 def generate_itinerary_with_gemini(prompt):
     model = setup_gemini()
@@ -824,6 +1196,11 @@ def generate_prompt(details):
         prompt += f", starting from {details['Starting Location']}"
     elif "Start Date" in details:
         prompt += f", departing on {details['Start Date']}"
+
+    # Multi-leg routes
+    if details.get("Route Legs"):
+        stops = [leg["from"] for leg in details["Route Legs"] if leg["from"]] + [details["Route Legs"][-1]["to"]]
+        prompt += f". The route is {' → '.join(stops)}"
     
     # End date
     if details.get("End Date"):
@@ -1396,19 +1773,20 @@ def normalize_itinerary_data(parsed_data):
     return parsed_data
 
 # Function to format and save the parsed itinerary to a file
-def save_itinerary_json(parsed_data, output_file=None):
+def save_itinerary_json(parsed_data, output_file=None, compact=False):
     """
     Save the parsed itinerary to a JSON file.
     
     Args:
         parsed_data (dict): The parsed itinerary data
         output_file (str, optional): Output file path. If None, generates a file name
-                                    based on destination and date.
+                                    based on destination and date. A ".gz" suffix
+                                    writes a gzip-compressed file.
+        compact (bool): Write compact JSON instead of pretty-printed JSON
     
     Returns:
         str: Path to the saved file
     """
-    import json
     import os
     from datetime import datetime
     
@@ -1422,11 +1800,7 @@ def save_itinerary_json(parsed_data, output_file=None):
     # Ensure directory exists
     os.makedirs(os.path.dirname(os.path.abspath(output_file)) if os.path.dirname(output_file) else '.', exist_ok=True)
     
-    # Save to file with pretty formatting
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(parsed_data, f, indent=2, ensure_ascii=False)
-    
-    return output_file
+    return save_json(parsed_data, output_file, compact=compact)
 
 # Function to extract costs and create a budget summary
 def extract_budget_summary(parsed_data):
@@ -1437,98 +1811,14 @@ def extract_budget_summary(parsed_data):
         parsed_data (dict): The parsed itinerary data
         
     Returns:
-        dict: Budget summary with categorized expenses
+        dict: Budget summary with categorized expenses, per-category, per-currency
+              and per-day totals. Each item keeps its own currency and
+              "estimated_total" is given in the most common one.
     """
-    import re
-    
-    budget_summary = {
-        "accommodation_costs": [],
-        "dining_costs": [],
-        "transportation_costs": [],
-        "attraction_costs": [],
-        "estimated_total": {
-            "min": 0,
-            "max": 0,
-            "currency": "USD"  # Default currency
-        }
-    }
-    
-    # Extract currency symbol if present in any price
-    currency_pattern = r'([$€£₹¥])'
-    all_text = str(parsed_data)
-    currency_matches = re.findall(currency_pattern, all_text)
-    main_currency = max(currency_matches, key=currency_matches.count) if currency_matches else "$"
-    
-    # Function to extract numeric values from price strings
-    def extract_price_range(price_str):
-        # Handle patterns like "$100-$150", "$100 to $150", "100-150 USD", etc.
-        if not price_str:
-            return None
-            
-        # Extract all numbers
-        nums = re.findall(r'\d+', price_str)
-        if not nums:
-            return None
-            
-        if len(nums) == 1:
-            # Single number found
-            return {"min": int(nums[0]), "max": int(nums[0])}
-        elif len(nums) >= 2:
-            # Range found
-            return {"min": int(nums[0]), "max": int(nums[1])}
-        
-        return None
-    
-    # Extract accommodation costs
-    for acc in parsed_data.get("accommodations", []):
-        price_range = extract_price_range(acc.get("price_range", ""))
-        if price_range:
-            budget_summary["accommodation_costs"].append({
-                "name": acc.get("name", "Accommodation"),
-                "min": price_range["min"],
-                "max": price_range["max"]
-            })
-    
-    # Extract dining costs
-    for dining in parsed_data.get("dining", []):
-        price_range = extract_price_range(dining.get("price_range", ""))
-        if price_range:
-            budget_summary["dining_costs"].append({
-                "name": dining.get("name", dining.get("meal_type", "Meal")),
-                "min": price_range["min"],
-                "max": price_range["max"],
-                "meal_type": dining.get("meal_type", "")
-            })
-    
-    # Extract transportation costs
-    for transport in parsed_data.get("transportation", []):
-        details = transport.get("details", "")
-        # Look for price patterns in transportation details
-        price_match = re.search(r'([$€£₹¥]?\d+(?:\s*-\s*|\s+to\s+)[$€£₹¥]?\d+|[$€£₹¥]\d+)', details)
-        if price_match:
-            price_range = extract_price_range(price_match.group(0))
-            if price_range:
-                budget_summary["transportation_costs"].append({
-                    "type": transport.get("type", "Transportation"),
-                    "min": price_range["min"],
-                    "max": price_range["max"]
-                })
-    
-    # Calculate estimated total
-    min_total = 0
-    max_total = 0
-    
-    for category in ["accommodation_costs", "dining_costs", "transportation_costs", "attraction_costs"]:
-        for item in budget_summary[category]:
-            min_total += item["min"]
-            max_total += item["max"]
-    
-    budget_summary["estimated_total"]["min"] = min_total
-    budget_summary["estimated_total"]["max"] = max_total
-    budget_summary["estimated_total"]["currency"] = main_currency
+    budget_summary = summarize_budget(parsed_data)
     
     # Add to the main parsed data if anything was found
-    if min_total > 0 or max_total > 0:
+    if budget_summary["estimated_total"]["min"] > 0 or budget_summary["estimated_total"]["max"] > 0:
         if "trip_overview" not in parsed_data:
             parsed_data["trip_overview"] = {}
         parsed_data["trip_overview"]["budget_summary"] = budget_summary
@@ -1537,7 +1827,7 @@ def extract_budget_summary(parsed_data):
 
 # Main function to process itineraries
 # Main function to process itineraries
-def process_itinerary(itinerary_text, output_file=None, include_budget_summary=True):
+def process_itinerary(itinerary_text, output_file=None, include_budget_summary=True, compact=False):
     """
     Process an itinerary text to extract structured data and optionally save to a file.
     
@@ -1545,12 +1835,11 @@ def process_itinerary(itinerary_text, output_file=None, include_budget_summary=T
         itinerary_text (str): The raw itinerary text to process
         output_file (str, optional): Path to save the JSON output. If None, doesn't save to file.
         include_budget_summary (bool): Whether to include budget analysis in the output
+        compact (bool): Write compact JSON instead of pretty-printed JSON
         
     Returns:
         dict: The structured itinerary data with all extracted information
     """
-    import json
-    import re
     
     # Parse the itinerary text into structured data
     parsed_data = parse_itinerary(itinerary_text)
@@ -1562,8 +1851,7 @@ def process_itinerary(itinerary_text, output_file=None, include_budget_summary=T
     
     # Save to file if output_file is specified
     if output_file:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(parsed_data, f, indent=2)
+        save_json(parsed_data, output_file, compact=compact)
             
     return parsed_data
 
@@ -1846,344 +2134,417 @@ def enhance_prompt_for_structured_output(prompt):
     Please structure your response using clear section headers for each day (Day 1, Day 2, etc.), and clearly mark morning, afternoon, and evening activities as well as meals and accommodations to facilitate accurate JSON extraction.
     """
 
+# Overview Tab
+def _render_overview_tab(itinerary_json):
+    st.markdown(templates.overview_html(itinerary_json), unsafe_allow_html=True)
+
+# Long lists are shown one page at a time
+DAYS_PER_PAGE = 7
+ITEMS_PER_PAGE = 10
+SEARCH_FIELDS = {
+    "dining": ("name", "cuisine", "meal_type", "price_range", "description"),
+    "attractions": ("name", "description", "visit_duration"),
+}
+
+def _search_index(itinerary_json, list_key):
+    # Built once per itinerary; the parsed itinerary object stays the same across reruns
+    cache = st.session_state.get("search_indexes")
+    if cache is None or cache["itinerary_id"] != id(itinerary_json):
+        cache = st.session_state["search_indexes"] = {"itinerary_id": id(itinerary_json)}
+    if list_key not in cache:
+        cache[list_key] = paging.SearchIndex(itinerary_json.get(list_key, []), SEARCH_FIELDS[list_key])
+    return cache[list_key]
+
+def _render_paged_section(itinerary_json, title, list_key, render_item, page_size, item_label):
+    """
+    Render one page of an itinerary list, with a search box for searchable lists.
+
+    Only the items on the current page are rendered, so the cost of a rerun
+    does not grow with the length of the trip.
+    """
+    items = itinerary_json.get(list_key, [])
+    st.markdown(templates.SECTION_TITLE.render(title=title), unsafe_allow_html=True)
+
+    positions = range(len(items))
+    if list_key in SEARCH_FIELDS and items:
+        query = st.text_input(f"Search {item_label}", key=f"{list_key}_query")
+        positions = _search_index(itinerary_json, list_key).search(query)
+        if not positions:
+            st.info(f"No {item_label} match your search.")
+            return
+
+    pages = paging.page_count(len(positions), page_size)
+    page = 1
+    if pages > 1:
+        page_key = f"{list_key}_page"
+        # A new search can leave fewer pages than the page last viewed
+        if st.session_state.get(page_key, 1) > pages:
+            st.session_state[page_key] = pages
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=page_key)
+    start, end = paging.page_bounds(len(positions), page, page_size)
+
+    st.markdown(templates.join(render_item(items[i]) for i in positions[start:end]), unsafe_allow_html=True)
+    if pages > 1:
+        st.caption(f"Showing {start + 1}-{end} of {len(positions)} {item_label}")
+
+# Itinerary Tab
+def _render_itinerary_tab(itinerary_json):
+    _render_paged_section(itinerary_json, "Daily Itinerary", "days", templates.day_html, DAYS_PER_PAGE, "days")
+
+# Map of the geocoded items of a section
+def _render_locations_map(items):
+    located = [item for item in items if isinstance(item, dict) and "lat" in item and "lon" in item]
+    if located:
+        st.map(pd.DataFrame({"lat": [item["lat"] for item in located], "lon": [item["lon"] for item in located]}),
+               size=15)
+
+# Accommodation Tab
+def _render_accommodation_tab(itinerary_json):
+    _render_paged_section(itinerary_json, "Accommodations", "accommodations", templates.accommodation_html,
+                          ITEMS_PER_PAGE, "accommodations")
+    _render_locations_map(itinerary_json.get("accommodations", []))
+
+# Dining Tab
+def _render_dining_tab(itinerary_json):
+    _render_paged_section(itinerary_json, "Dining Recommendations", "dining", templates.dining_html,
+                          ITEMS_PER_PAGE, "restaurants")
+
+# Attractions Tab
+def _render_attractions_tab(itinerary_json):
+    _render_paged_section(itinerary_json, "Top Attractions", "attractions", templates.attraction_html,
+                          ITEMS_PER_PAGE, "attractions")
+    _render_locations_map(itinerary_json.get("attractions", []))
+
+# Budget Tab
+def _render_budget_tab(itinerary_json):
+    st.markdown(templates.budget_html(itinerary_json.get("budget", {})), unsafe_allow_html=True)
+
+    # Every priced line item in the itinerary, converted into one currency
+    price_table = build_price_table(itinerary_json)
+    if len(price_table):
+        rates = load_rate_table()
+        main_currency = price_table.currencies[0]
+        target_currency = st.selectbox(
+            "Show line items in", rates.codes,
+            index=rates.codes.index(main_currency) if main_currency in rates else 0,
+            key="budget_currency"
+        )
+        mins, maxs = convert_price_table(price_table, target_currency, rates)
+        line_items = pd.DataFrame({
+            "Item": price_table.labels,
+            "Category": [CATEGORIES[c].title() for c in price_table.category],
+            "Day": [str(d) if d > 0 else "" for d in price_table.day],
+            "Quoted": [f"{lo:,.0f}-{hi:,.0f} {price_table.currencies[c]}" for lo, hi, c
+                       in zip(price_table.mins, price_table.maxs, price_table.currency)],
+            f"Min ({target_currency})": mins.round(2),
+            f"Max ({target_currency})": maxs.round(2),
+        })
+        st.dataframe(line_items, hide_index=True, use_container_width=True)
+        st.caption(f"Converted with offline reference rates as of {rates.as_of}")
+
+# Essential Info Tab
+def _render_essential_info_tab(itinerary_json):
+    st.markdown(templates.essential_info_html(itinerary_json), unsafe_allow_html=True)
+
+# Sections of the itinerary view, in display order
+ITINERARY_TABS = [
+    ("🌍 Overview", _render_overview_tab),
+    ("📅 Itinerary", _render_itinerary_tab),
+    ("🏨 Accommodation", _render_accommodation_tab),
+    ("🍽️ Dining", _render_dining_tab),
+    ("🎯 Attractions", _render_attractions_tab),
+    ("💰 Budget", _render_budget_tab),
+    ("ℹ️ Essential Info", _render_essential_info_tab),
+]
+
 def display_itinerary_tabs(itinerary_json):
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "🌍 Overview", "📅 Itinerary", "🏨 Accommodation", 
-        "🍽️ Dining", "🎯 Attractions", "💰 Budget", "ℹ️ Essential Info"
-    ])
-    
-    # Overview Tab
-    with tab1:
-        st.markdown("<h2 style='text-align: center;'>Trip Overview</h2>", unsafe_allow_html=True)
-        overview = itinerary_json.get("trip_overview", {})
-        
-        # Create three columns for better organization
-        col1, col2, col3 = st.columns([1, 1, 1])
-        
-        with col1:
-            st.markdown("""
-                <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px;'>
-                    <h3 style='color: #1E88E5; margin: 0;'>🌍 Destination</h3>
-                    <p style='font-size: 1.2rem; margin: 0.5rem 0;'>{}</p>
-                </div>
-            """.format(overview.get("destination", "Not specified")), unsafe_allow_html=True)
-            
-            st.markdown("""
-                <div style='background-color: #E8F5E9; padding: 1rem; border-radius: 10px; margin-top: 1rem;'>
-                    <h3 style='color: #43A047; margin: 0;'>⏱️ Duration</h3>
-                    <p style='font-size: 1.2rem; margin: 0.5rem 0;'>{} days</p>
-                </div>
-            """.format(overview.get("duration_days", "Not specified")), unsafe_allow_html=True)
-        
-        with col2:
-            days = itinerary_json.get("days", [])
-            if days:
-                start_date = days[0].get("date", "Not specified")
-                end_date = days[-1].get("date", "Not specified")
-            else:
-                start_date = overview.get("start_date", "Not specified")
-                end_date = overview.get("end_date", "Not specified")
-            
-            st.markdown("""
-                <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px;'>
-                    <h3 style='color: #EF6C00; margin: 0;'>📅 Travel Dates</h3>
-                    <p style='margin: 0.5rem 0;'><b>Start:</b> {}</p>
-                    <p style='margin: 0.5rem 0;'><b>End:</b> {}</p>
-                </div>
-            """.format(start_date, end_date), unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown("""
-                <div style='background-color: #F3E5F5; padding: 1rem; border-radius: 10px;'>
-                    <h3 style='color: #8E24AA; margin: 0;'>💰 Budget Range</h3>
-                    <p style='font-size: 1.2rem; margin: 0.5rem 0;'>{}</p>
-                </div>
-            """.format(overview.get("budget_range", "Not specified")), unsafe_allow_html=True)
-        
-        # Weather information
-        st.markdown("""
-            <div style='background-color: #E1F5FE; padding: 1.5rem; border-radius: 10px; margin-top: 2rem;'>
-                <h3 style='color: #0288D1; margin: 0;'>🌤️ Weather Information</h3>
-        """, unsafe_allow_html=True)
-        
-        weather = itinerary_json.get("weather", {})
-        if weather:
-            temp_range = weather.get("temperature_range", {})
-            if temp_range:
-                st.markdown(f"""
-                    <p style='margin: 0.5rem 0;'><b>Temperature:</b> {temp_range.get('min')}°{temp_range.get('unit', 'C')} to {temp_range.get('max')}°{temp_range.get('unit', 'C')}</p>
-                    <p style='margin: 0.5rem 0;'><b>Conditions:</b> {weather.get('conditions', 'Not specified')}</p>
-                    <p style='margin: 0.5rem 0;'><b>What to Wear:</b> {weather.get('clothing_recommendations', 'Not specified')}</p>
-                """, unsafe_allow_html=True)
-        st.markdown("</div>", unsafe_allow_html=True)
-        
-        # Best Time to Visit
-        st.markdown("""
-            <div style='background-color: #F5F5F5; padding: 1.5rem; border-radius: 10px; margin-top: 2rem;'>
-                <h3 style='color: #424242; margin: 0;'>📅 Best Time to Visit</h3>
-                <p style='margin: 0.5rem 0;'>{}</p>
-            </div>
-        """.format(itinerary_json.get("essential_info", {}).get("best_time_to_visit", "Not specified")), unsafe_allow_html=True)
-
-    # Itinerary Tab
-    with tab2:
-        st.markdown("<h2 style='text-align: center;'>Daily Itinerary</h2>", unsafe_allow_html=True)
-        days = itinerary_json.get("days", [])
-        for day in days:
-            with st.expander(f"Day {day.get('day_number')} - {day.get('title', '')}"):
-                st.markdown("""
-                    <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
-                        <h3 style='color: #1E88E5; margin: 0;'>Morning</h3>
-                        <p>{}</p>
-                        <h3 style='color: #1E88E5; margin-top: 1rem;'>Afternoon</h3>
-                        <p>{}</p>
-                        <h3 style='color: #1E88E5; margin-top: 1rem;'>Evening</h3>
-                        <p>{}</p>
-                    </div>
-                """.format(
-                    day.get("morning", "No activities specified"),
-                    day.get("afternoon", "No activities specified"),
-                    day.get("evening", "No activities specified")
-                ), unsafe_allow_html=True)
-                
-                meals = day.get("meals", {})
-                st.markdown("""
-                    <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
-                        <h3 style='color: #EF6C00; margin: 0;'>Meals</h3>
-                        <p><b>Breakfast:</b> {}</p>
-                        <p><b>Lunch:</b> {}</p>
-                        <p><b>Dinner:</b> {}</p>
-                    </div>
-                """.format(
-                    meals.get("breakfast", "Not specified"),
-                    meals.get("lunch", "Not specified"),
-                    meals.get("dinner", "Not specified")
-                ), unsafe_allow_html=True)
-                
-                st.markdown("""
-                    <div style='background-color: #E8F5E9; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
-                        <h3 style='color: #43A047; margin: 0;'>Accommodation</h3>
-                        <p>{}</p>
-                    </div>
-                """.format(day.get("accommodation", "Not specified")), unsafe_allow_html=True)
-
-    # Accommodation Tab
-    with tab3:
-        st.markdown("<h2 style='text-align: center;'>Accommodations</h2>", unsafe_allow_html=True)
-        accommodations = itinerary_json.get("accommodations", [])
-        for acc in accommodations:
-            with st.expander(acc.get("name", "Unnamed Accommodation")):
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.markdown("""
-                        <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px;'>
-                            <p><b>Price Range:</b> {}</p>
-                            <p><b>Description:</b> {}</p>
-                        </div>
-                    """.format(
-                        acc.get("price_range", "Not specified"),
-                        acc.get("description", "No description available")
-                    ), unsafe_allow_html=True)
-                with col2:
-                    # Add booking functionality with direct link
-                    booking_url = f"https://www.booking.com/search.html?ss={acc.get('name', '')}"
-                    st.markdown(f"""
-                        <div style='text-align: center;'>
-                            <a href="{booking_url}" target="_blank" style="
-                                display: inline-block;
-                                padding: 0.5rem 1rem;
-                                background-color: #1E88E5;
-                                color: white;
-                                text-decoration: none;
-                                border-radius: 5px;
-                                margin: 0.5rem 0;
-                                font-weight: bold;
-                                transition: background-color 0.3s;">
-                                🏨 Book Now
-                            </a>
-                        </div>
-                        <div style='background-color: #E8F5E9; padding: 1rem; border-radius: 10px; margin-top: 1rem;'>
-                            <p>✓ Direct booking available</p>
-                            <p>✓ Best price guarantee</p>
-                            <p>✓ Free cancellation</p>
-                        </div>
-                    """, unsafe_allow_html=True)
-
-    # Dining Tab
-    with tab4:
-        st.markdown("<h2 style='text-align: center;'>Dining Recommendations</h2>", unsafe_allow_html=True)
-        dining = itinerary_json.get("dining", [])
-        for restaurant in dining:
-            with st.expander(restaurant.get("name", "Unnamed Restaurant")):
-                st.markdown("""
-                    <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px;'>
-                        <p><b>Cuisine:</b> {}</p>
-                        <p><b>Price Range:</b> {}</p>
-                        <p><b>Meal Type:</b> {}</p>
-                    </div>
-                """.format(
-                    restaurant.get("cuisine", "Not specified"),
-                    restaurant.get("price_range", "Not specified"),
-                    restaurant.get("meal_type", "Not specified")
-                ), unsafe_allow_html=True)
-
-    # Attractions Tab
-    with tab5:
-        st.markdown("<h2 style='text-align: center;'>Top Attractions</h2>", unsafe_allow_html=True)
-        attractions = itinerary_json.get("attractions", [])
-        for attraction in attractions:
-            with st.expander(attraction.get("name", "Unnamed Attraction")):
-                st.markdown("""
-                    <div style='background-color: #E8F5E9; padding: 1rem; border-radius: 10px;'>
-                        <p><b>Description:</b> {}</p>
-                        <p><b>Visit Duration:</b> {}</p>
-                    </div>
-                """.format(
-                    attraction.get("description", "No description available"),
-                    attraction.get("visit_duration", "Not specified")
-                ), unsafe_allow_html=True)
-
-    # Budget Tab
-    with tab6:
-        st.markdown("<h2 style='text-align: center;'>Budget Breakdown</h2>", unsafe_allow_html=True)
-        budget = itinerary_json.get("budget", {})
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("""
-                <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px;'>
-                    <h3 style='color: #1E88E5; margin: 0;'>Total Cost</h3>
-                    <p style='font-size: 1.2rem;'>{}</p>
-                    <h3 style='color: #1E88E5; margin-top: 1rem;'>Accommodation</h3>
-                    <p>{}</p>
-                    <h3 style='color: #1E88E5; margin-top: 1rem;'>Food</h3>
-                    <p>{}</p>
-                </div>
-            """.format(
-                budget.get("total_estimated_cost", "Not specified"),
-                budget.get("accommodation_cost", "Not specified"),
-                budget.get("food_cost", "Not specified")
-            ), unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-                <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px;'>
-                    <h3 style='color: #EF6C00; margin: 0;'>Transportation</h3>
-                    <p>{}</p>
-                    <h3 style='color: #EF6C00; margin-top: 1rem;'>Activities</h3>
-                    <p>{}</p>
-                    <h3 style='color: #EF6C00; margin-top: 1rem;'>Miscellaneous</h3>
-                    <p>{}</p>
-                </div>
-            """.format(
-                budget.get("transportation_cost", "Not specified"),
-                budget.get("activities_cost", "Not specified"),
-                budget.get("miscellaneous_cost", "Not specified")
-            ), unsafe_allow_html=True)
-
-    # Essential Info Tab
-    with tab7:
-        st.markdown("<h2 style='text-align: center;'>Essential Information</h2>", unsafe_allow_html=True)
-        essential_info = itinerary_json.get("essential_info", {})
-        
-        # Travel Tips
-        st.markdown("<h3 style='color: #1E88E5;'>💡 Travel Tips</h3>", unsafe_allow_html=True)
-        tips = itinerary_json.get("travel_tips", [])
-        for tip in tips:
-            st.markdown(f"• {tip}")
-        
-        # Essential Information Cards
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("""
-                <div style='background-color: #E3F2FD; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
-                    <h3 style='color: #1E88E5; margin: 0;'>📋 Important Information</h3>
-                    <p style='margin: 0.5rem 0;'><b>🛂 Visa:</b> {}</p>
-                    <p style='margin: 0.5rem 0;'><b>🆘 Emergency:</b> {}</p>
-                    <p style='margin: 0.5rem 0;'><b>🏺 Local Customs:</b> {}</p>
-                </div>
-            """.format(
-                essential_info.get("visa_requirements", "Not specified"),
-                essential_info.get("emergency_contacts", "Not specified"),
-                essential_info.get("local_customs", "Not specified")
-            ), unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-                <div style='background-color: #FFF3E0; padding: 1rem; border-radius: 10px; margin: 0.5rem 0;'>
-                    <h3 style='color: #EF6C00; margin: 0;'>🔍 Additional Information</h3>
-                    <p style='margin: 0.5rem 0;'><b>🛡️ Safety:</b> {}</p>
-                    <p style='margin: 0.5rem 0;'><b>🗣️ Language:</b> {}</p>
-                    <p style='margin: 0.5rem 0;'><b>💱 Currency:</b> {}</p>
-                </div>
-            """.format(
-                essential_info.get("safety_tips", "Not specified"),
-                essential_info.get("language", "Not specified"),
-                essential_info.get("currency_exchange", "Not specified")
-            ), unsafe_allow_html=True)
+    """
+    Render the itinerary one section at a time.
+
+    st.tabs runs every tab body on each rerun and sends all of them to the
+    browser. Here only the selected section is rendered; the others are
+    built when the user switches to them.
+    """
+    renderers = dict(ITINERARY_TABS)
+    st.markdown(templates.stylesheet(), unsafe_allow_html=True)
+    selected = st.radio("Itinerary section", list(renderers), horizontal=True,
+                        key="itinerary_tab", label_visibility="collapsed")
+    renderers[selected](itinerary_json)
+
+# Pipeline results are kept in st.session_state so reruns (switching sections,
+# paging, downloads) re-render from memory instead of calling spaCy or Gemini.
+# Only the latest plan is kept, which bounds the per-session footprint.
+PLAN_KEY = "plan"
+PLAN_ERROR_MESSAGES = ["Error❗Error❗Error❗", "Failed to generate", "Invalid input"]
+
+def run_plan_pipeline(user_input, incremental=True):
+    """
+    Run extraction, prompt generation, itinerary generation and JSON parsing once.
+
+    Args:
+        user_input (str): The trip description
+        incremental (bool): Reuse the analysis of the previous submission
+
+    Returns:
+        dict: The plan, with "details", "prompt" and either "error" or the
+              itinerary text, parsed JSON and serialized JSON download
+    """
+    if incremental:
+        details, _ = extract_details_incremental(user_input, st.session_state.setdefault("extraction_state", {}))
+    else:
+        details = extract_details(user_input)
+
+    prompt = generate_prompt(details)
+    plan = {"input": user_input, "details": details, "prompt": prompt}
+    if any(error in prompt for error in PLAN_ERROR_MESSAGES):
+        plan["error"] = "An error occurred in itinerary generation. Please check your input and try again."
+        return plan
+
+    # Enhance prompt to get structured output
+    structured_prompt = enhance_prompt_for_structured_output(prompt)
+    with st.spinner("Generating detailed itinerary with Google Gemini..."):
+        itinerary_text = generate_itinerary_with_gemini(structured_prompt)
+    with st.spinner("Extracting structured data from itinerary..."):
+        itinerary_json = extract_itinerary_json(itinerary_text)
+    # Offline lookup; gives the accommodation and attraction maps their points
+    itinerary_json = geocode_itinerary(itinerary_json)
+
+    # Group attractions into days by distance and order each day's visits. Like the
+    # proximity check below, this needs exact (POI) positions and is skipped without them.
+    if has_exact_positions(itinerary_json, ("attractions",)):
+        plan["routes"] = plan_attraction_days(itinerary_json)
+        itinerary_json = apply_attraction_days(itinerary_json, plan["routes"])
+
+    plan["itinerary_text"] = itinerary_text
+    plan["itinerary_json"] = itinerary_json
+    # Serialized once here rather than on every rerun that shows the download button
+    plan["itinerary_json_bytes"] = dumps_bytes(itinerary_json)
+    # Verify the "within walking distance" dining requested in the prompt. Only POI matches
+    # are exact; without a POI file nothing is, and the check and its warning are skipped.
+    if has_exact_positions(itinerary_json, ("dining",)) and \
+            has_exact_positions(itinerary_json, ("accommodations", "attractions")):
+        plan["proximity"] = check_proximity(itinerary_json)
+    return plan
+
+def store_plan(plan):
+    """Replace the session's plan and reset view state that belonged to the previous one."""
+    st.session_state[PLAN_KEY] = plan
+    stale = ["search_indexes"] + [f"{key}_{suffix}" for key in ("days", "accommodations", "dining", "attractions")
+                                  for suffix in ("page", "query")]
+    for key in stale:
+        st.session_state.pop(key, None)
+
+def render_plan(plan):
+    """Render a stored plan; no extraction or generation happens here."""
+    details = plan["details"]
+
+    # Create a pandas DataFrame for table presentation
+    details_df = pd.DataFrame(details.items(), columns=["Detail", "Value"])
+    details_df.index = details_df.index + 1
+    st.subheader("Extracted Travel Details")
+    st.table(details_df)
+
+    # Display JSON output of user details
+    with st.expander("View Extracted Travel Details (JSON)", expanded=False):
+        st.json(details)
+
+    with st.expander("View Itinerary Request Prompt", expanded=False):
+        st.write(plan["prompt"])
+
+    if "error" in plan:
+        st.warning(plan["error"])
+        return
+
+    with st.expander("View Full Itinerary Text", expanded=False):
+        st.markdown(plan["itinerary_text"])
+    with st.expander("View Raw JSON Data", expanded=False):
+        st.json(plan["itinerary_json"])
+
+    # Add download buttons
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="Download Itinerary Text",
+            data=plan["itinerary_text"],
+            file_name="travel_itinerary.txt",
+            mime="text/plain"
+        )
+    with col2:
+        st.download_button(
+            label="Download Itinerary JSON",
+            data=plan["itinerary_json_bytes"],
+            file_name="travel_itinerary.json",
+            mime="application/json"
+        )
+
+    proximity = plan.get("proximity") or {}
+    if proximity.get("far"):
+        st.warning(f"These dining suggestions are more than {proximity['threshold_km']:g} km from the day's "
+                   f"accommodation and attractions: {', '.join(proximity['far'])}")
+
+    routes = plan.get("routes") or {}
+    if routes.get("days"):
+        with st.expander("Suggested Attraction Order", expanded=False):
+            st.caption(f"{routes['total_distance_km']:,.1f} km of travel between attractions, "
+                       f"{routes['text_order_distance_km']:,.1f} km in the order listed")
+            st.table(pd.DataFrame([
+                {"Day": day["day_number"], "Attractions": " → ".join(item.get("name", "") for item in day["attractions"]),
+                 "Distance (km)": day["distance_km"]}
+                for day in routes["days"]
+            ]).set_index("Day"))
+
+    # Display the itinerary one section at a time
+    display_itinerary_tabs(plan["itinerary_json"])
+
+# Warm-up: pay for everything the first request would otherwise wait on (model
+# loads, the gazetteer and geocoder indexes, dateparser's language data, regex
+# compilation and torch's first allocations) before the app reports ready.
+# The texts cover explicit dates, durations, seasons and currencies so most
+# extractor branches compile their patterns.
+WARMUP_TEXTS = (
+    "Trip from Mumbai to Goa from 3-13th april 2025 for 2 adults, budget 50000 rupees. We prefer trains and a beach resort.",
+    "Family of four flying from London to Tokyo for two weeks in spring, around $6,000, vegetarian food and museums.",
+    "Solo backpacking in Vietnam next month for 10 days on a cheap budget, hostels and buses only.",
+)
+WARMUP_ITINERARY = """Destination: Goa
+5-day trip
+Trip type: Beach Tourism
+Budget range: ₹50,000
+
+Day 1: Arrival and North Goa beaches
+Date: 3rd April 2025
+* **Morning:** Check in and walk along Calangute Beach.
+* **Afternoon:** Visit Fort Aguada (₹50 entry).
+* **Evening:** Sunset at Baga Beach.
+* **Meals:**
+    * Breakfast: Cafe Chocolatti (₹400-₹600)
+    * Lunch: Britto's (₹800-₹1,200)
+    * Dinner: Thalassa (₹1,500-₹2,500)
+* **Accommodation:** Taj Fort Aguada Resort (₹12,000-₹18,000 per night)
+
+Day 2: Old Goa
+* **Morning:** Basilica of Bom Jesus.
+* **Afternoon:** Se Cathedral and the Museum of Christian Art.
+* **Evening:** Dinner cruise on the Mandovi river.
+* **Accommodation:** Taj Fort Aguada Resort
+"""
+
+def warmup():
+    """
+    Run every lazily initialized part of the extraction pipeline once.
+
+    The warm-up texts stay out of the Doc cache, and the cascade, dispatcher
+    and vocabulary stats are reset afterwards.
+
+    Returns:
+        dict: Seconds per step and "total"
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    def step(name, run):
+        step_start = time.perf_counter()
+        run()
+        timings[name] = round(time.perf_counter() - step_start, 3)
+
+    step("models", lambda: [load_dispatcher(tier) for tier in CASCADE_TIERS])
+    step("gazetteer", load_location_gazetteer)
+    step("doc_cache", load_doc_cache)
+    # Warm-up requests are not traffic: they skip the Doc cache, so the warm-up texts
+    # are neither served from it nor written to it, and the counters are reset below
+    with load_doc_cache().bypassed():
+        # Straight to the transformer: the cascade may resolve the warm-up texts with the
+        # cheaper tiers
+        step("transformer", lambda: _pipe_transformer(list(WARMUP_TEXTS)))
+        step("extract_details", lambda: [generate_prompt(extract_details(text)) for text in WARMUP_TEXTS])
+
+    def itinerary():
+        # The offline half of run_plan_pipeline, after the Gemini call
+        itinerary_json = geocode_itinerary(extract_itinerary_json(WARMUP_ITINERARY))
+        dumps_bytes(itinerary_json)
+        check_proximity(itinerary_json)
+        plan_attraction_days(itinerary_json)
+    step("extract_itinerary_json", itinerary)
+    load_cascade_stats().reset()
+    for tier in CASCADE_TIERS:
+        dispatcher = load_dispatcher(tier)
+        if dispatcher is not None:
+            dispatcher.reset_stats()
+    for pipeline in managed_pipelines():
+        pipeline.reset_stats()
+    timings["total"] = round(time.perf_counter() - start, 3)
+    return timings
+
+@st.cache_resource(show_spinner="Warming up the extraction models...")
+def load_warmup():
+    return warmup()
+
+def render_readiness(timings):
+    """Sidebar readiness indicator with the warm-up time per step."""
+    st.sidebar.success(f"Ready (warmed up in {timings['total']:.1f} s)")
+    with st.sidebar.expander("Warm-up", expanded=False):
+        st.table(pd.DataFrame([{"Step": name, "Seconds": seconds} for name, seconds in timings.items()
+                               if name != "total"]).set_index("Step"))
+
+def render_cascade_stats():
+    """Sidebar summary of which extraction tier resolved the locations so far."""
+    report = load_cascade_stats().report()
+    with st.sidebar.expander("Extraction Cascade", expanded=False):
+        if not report["requests"]:
+            st.caption("No requests yet.")
+            return
+        st.table(pd.DataFrame([
+            {"Tier": tier, "Requests": stats["requests"], "Share": f"{stats['share']:.0%}",
+             "Mean ms": round(stats["mean_ms"], 1) if stats["mean_ms"] is not None else None}
+            for tier, stats in report["tiers"].items()
+        ]).set_index("Tier"))
+        if report["saved_seconds"] is not None:
+            st.caption(f"About {report['saved_seconds']:.1f} s of transformer time saved")
+        cache = load_doc_cache().stats()
+        if cache["hits"] or cache["misses"]:
+            st.caption(f"Doc cache: {cache['hits']} hits, {cache['misses']} misses, "
+                       f"{cache['entries']} entries ({cache['bytes'] / 1e6:.1f} MB)")
+
+def render_vocab_stats():
+    """Sidebar summary of how much each pipeline's vocabulary has grown since it was loaded."""
+    with st.sidebar.expander("Vocabulary", expanded=False):
+        st.table(pd.DataFrame([
+            {"Pipeline": stats["name"], "Strings": stats["strings"], "New since load": stats["new_strings"],
+             "Limit": stats["max_new_strings"] or None, "Per request": round(stats["strings_per_request"], 1),
+             "Reloads": stats["reloads"]}
+            for stats in (pipeline.stats() for pipeline in managed_pipelines())
+        ]).set_index("Pipeline"))
+
+def render_dispatch_stats():
+    """Sidebar summary of how concurrent requests were batched per pipeline."""
+    stats = [dispatcher.stats() for dispatcher in map(load_dispatcher, CASCADE_TIERS) if dispatcher is not None]
+    with st.sidebar.expander("Batching", expanded=False):
+        st.table(pd.DataFrame([
+            {"Pipeline": tier["name"], "Requests": tier["requests"], "Batches": tier["batches"],
+             "Mean batch": round(tier["mean_batch"], 2), "Largest": tier["largest_batch"],
+             "Queued ms": round(tier["mean_queue_ms"], 1) if tier["mean_queue_ms"] is not None else None,
+             "Batch ms": round(tier["mean_batch_ms"], 1) if tier["mean_batch_ms"] is not None else None}
+            for tier in stats
+        ]).set_index("Pipeline"))
 
 def main():
     st.title("Travel Plan Extractor")
+    render_readiness(load_warmup())
     user_input = st.text_area("Enter your travel details:")
+    incremental = st.checkbox("Reuse analysis from my previous submission", value=True)
     if st.button("Plan my Trip", type='primary'):
         if user_input:
-            details = extract_details(user_input)
-            
-            # Create a pandas DataFrame for table presentation
-            details_df = pd.DataFrame(details.items(), columns=["Detail", "Value"])
-            details_df.index = details_df.index + 1
-            st.subheader("Extracted Travel Details")
-            st.table(details_df)
-            details_json = extract_details(user_input)
-        
-            # Display JSON output of user details
-            with st.expander("View Extracted Travel Details (JSON)", expanded=False):
-                st.json(details_json) 
-            
-            # Generate and display the itinerary prompt
-            prompt = generate_prompt(details)
-            # Enhance prompt to get structured output
-            structured_prompt = enhance_prompt_for_structured_output(prompt)
-            
-            with st.expander("View Itinerary Request Prompt", expanded=False):
-                st.write(prompt)
-            
-            # Check for errors
-            error_messages = ["Error❗Error❗Error❗", "Failed to generate", "Invalid input"]
-            if not any(error in prompt for error in error_messages):
-                with st.spinner("Generating detailed itinerary with Google Gemini..."): 
-                    itinerary_text = generate_itinerary_with_gemini(structured_prompt)  
-                with st.expander("View Full Itinerary Text", expanded=False):
-                    st.markdown(itinerary_text)
-                # Extract structured JSON data from the itinerary
-                with st.spinner("Extracting structured data from itinerary..."):
-                    itinerary_json = extract_itinerary_json(itinerary_text)
-                with st.expander("View Raw JSON Data", expanded=False):
-                    st.json(itinerary_json)
-                # Display the itinerary in tabs
-                display_itinerary_tabs(itinerary_json)
-                
-                # Add download buttons
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.download_button(
-                        label="Download Itinerary Text",
-                        data=itinerary_text,
-                        file_name="travel_itinerary.txt",
-                        mime="text/plain"
-                    )
-                with col2:
-                    st.download_button(
-                        label="Download Itinerary JSON",
-                        data=json.dumps(itinerary_json, indent=2),
-                        file_name="travel_itinerary.json",
-                        mime="application/json"
-                    )
-            else:
-                st.warning("An error occurred in itinerary generation. Please check your input and try again.")
+            store_plan(run_plan_pipeline(user_input, incremental))
         else:
             st.warning("Please enter some text to extract details.")
-    
+
+    plan = st.session_state.get(PLAN_KEY)
+    if plan is not None:
+        render_plan(plan)
+    render_cascade_stats()
+    render_vocab_stats()
+    render_dispatch_stats()
+
     # Footer
     st.markdown("---")
     st.markdown("### 💡 Tips")
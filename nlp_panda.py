@@ -6,7 +6,7 @@ import pandas as pd
 from dateparser import parse
 from datetime import datetime, timedelta
 from dateparser.search import search_dates
-import geonamescache
+from gazetteer import build_gazetteer
 from word2number import w2n
 import json
 import google.generativeai as genai
@@ -26,9 +26,8 @@ def load_spacy_model():
 
 nlp = load_spacy_model()
 
-# Load city database from geonamescache
-gc = geonamescache.GeonamesCache()
-cities_dict = {city["name"].lower(): city["name"] for city in gc.get_cities().values()}
+# Load the city gazetteer (geonames cities above GAZETTEER_MIN_POPULATION, no countries)
+cities_dict = build_gazetteer(countries=())
 
 # Define seasonal mappings
 seasonal_mappings = {
@@ -71,8 +70,10 @@ def extract_details(text):
     for i in range(len(words)):
         for j in range(i + 1, min(i + 4, len(words))):  # Check up to 3-word phrases
             phrase = " ".join(words[i:j+1])
-            if phrase.lower() in cities_dict or phrase in common_destinations:
-                extracted_cities.append(cities_dict[phrase.lower()])
+            if phrase.lower() in cities_dict:
+                extracted_cities.append(cities_dict[phrase.lower()]["name"])
+            elif phrase in common_destinations:
+                extracted_cities.append(phrase)
 
     # Combine all sources and remove duplicates while preserving order
     seen = set()
@@ -0,0 +1,99 @@
+"""
+Number normalization shared by the duration, traveler and budget extractors.
+
+`NUMBER` is a regex fragment the extractors embed in their patterns
+(`COUNT_NUMBER` leaves out a bare "a"/"an"), and `parse_number` turns
+whatever it matched into a number:
+
+    "3", "50,000", "1,50,000", "2.5"        digits, with separators
+    "1.5k", "2 lakh", "3 million"           digits with a scale
+    "twenty-one", "one hundred and fifty"   number words up to the thousands
+    "a", "an", "a couple", "two dozen"      articles and counting words
+
+Parsed values are memoized; extractors see the same few phrases ("two weeks",
+"a week", "2 adults") over and over. Run `python benchmarks/bench_numbers.py`
+for a comparison with `word2number`.
+"""
+import re
+from functools import lru_cache
+
+UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40,
+    "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+# Words that multiply the number so far ("two dozen", "five hundred")
+MULTIPLIERS = {"couple": 2, "dozen": 12, "hundred": 100}
+# Words that close a group ("two thousand five hundred")
+SCALES = {"thousand": 1000, "k": 1000, "lakh": 100000, "lakhs": 100000, "million": 1000000,
+          "crore": 10000000, "crores": 10000000}
+ARTICLES = {"a": 1, "an": 1}
+
+_WORD = "|".join(sorted(list(UNITS) + list(MULTIPLIERS) + [scale for scale in SCALES if scale != "k"],
+                        key=len, reverse=True))
+_SCALE = "|".join(sorted(SCALES, key=len, reverse=True))
+# Any one number word, e.g. to spot edits that may change a number
+NUMBER_WORD = rf"\b(?:{_WORD})\b"
+
+# Digits with thousands separators (Western or Indian grouping) or a decimal part, optionally scaled
+DIGIT_NUMBER = rf"(?:\d{{1,3}}(?:,\d{{2,3}})+(?:\.\d+)?|\d+(?:\.\d+)?)(?:\s*(?:{_SCALE})\b)?"
+WORD_NUMBER = rf"\b(?:(?:a|an)\s+)?(?:{_WORD})(?:(?:\s+and\s+|[\s-]+)(?:{_WORD}))*\b(?:\s+of\b)?"
+# Any number an extractor accepts; use with re.IGNORECASE
+NUMBER = rf"(?:{DIGIT_NUMBER}|{WORD_NUMBER}|\b(?:a|an)\b)"
+# NUMBER without a bare "a"/"an", for counts whose unit could also start a longer word ("a personalized")
+COUNT_NUMBER = rf"(?:{DIGIT_NUMBER}|{WORD_NUMBER})"
+
+_DIGIT_PATTERN = re.compile(rf"^(?P<digits>[\d,]+(?:\.\d+)?)\s*(?P<scale>{_SCALE})?$")
+_WORD_SPLIT = re.compile(r"[\s-]+")
+
+
+def _words_to_number(words):
+    total, current = 0, 0
+    for word in words:
+        if word in ("and", "of"):
+            continue
+        if word in UNITS:
+            current += UNITS[word]
+        elif word in ARTICLES:
+            current += ARTICLES[word]
+        elif word in MULTIPLIERS:
+            current = (current or 1) * MULTIPLIERS[word]
+        elif word in SCALES:
+            total += (current or 1) * SCALES[word]
+            current = 0
+        else:
+            return None
+    return total + current
+
+
+@lru_cache(maxsize=4096)
+def parse_number(text):
+    """
+    Convert a number phrase to a number.
+
+    Args:
+        text (str): Text matched by NUMBER, e.g. "twenty-one", "1.5k" or "a couple"
+
+    Returns:
+        int, float or None: The value (int when whole), None when text is not a number
+    """
+    phrase = text.strip().lower()
+    if not phrase:
+        return None
+
+    match = _DIGIT_PATTERN.match(phrase)
+    if match:
+        value = float(match.group("digits").replace(",", ""))
+        if match.group("scale"):
+            value *= SCALES[match.group("scale")]
+    else:
+        value = _words_to_number(_WORD_SPLIT.split(phrase))
+        if value is None:
+            return None
+    return int(value) if float(value).is_integer() else value
+
+
+def format_number(value):
+    """Render a parsed number without a trailing ".0"."""
+    return str(int(value)) if float(value).is_integer() else str(value)
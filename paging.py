@@ -0,0 +1,81 @@
+"""
+Pagination and search for long itinerary lists.
+
+A 60-day itinerary has 60 day cards and often dozens of restaurants and
+attractions. The views render one page of a list at a time, so the cost of a
+rerun is bounded by the page size instead of the length of the trip, and the
+attraction and dining lists are filtered through a `SearchIndex` built once
+per itinerary.
+"""
+import bisect
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def page_count(total, page_size):
+    """Number of pages needed for total items; at least 1."""
+    return max(1, math.ceil(total / page_size))
+
+
+def page_bounds(total, page, page_size):
+    """
+    Start and end offsets of a 1-based page, clamped to the available pages.
+
+    Returns:
+        tuple: (start, end) suitable for slicing
+    """
+    page = min(max(page, 1), page_count(total, page_size))
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total)
+
+
+class SearchIndex:
+    """
+    Inverted index over the text fields of a list of items.
+
+    Tokens are kept sorted so a query term matches every token it is a prefix
+    of ("sush" finds "sushi") with a bisect instead of a scan. Multi-word
+    queries return the items matching all terms.
+    """
+
+    def __init__(self, items, fields):
+        postings = {}
+        for position, item in enumerate(items):
+            text = " ".join(str(item.get(field) or "") for field in fields)
+            for token in set(TOKEN_PATTERN.findall(text.lower())):
+                postings.setdefault(token, []).append(position)
+        self.tokens = sorted(postings)
+        self.postings = [postings[token] for token in self.tokens]
+        self.size = len(items)
+
+    def _prefix_matches(self, term):
+        matches = set()
+        for i in range(bisect.bisect_left(self.tokens, term), len(self.tokens)):
+            if not self.tokens[i].startswith(term):
+                break
+            matches.update(self.postings[i])
+        return matches
+
+    def search(self, query):
+        """
+        Find the items matching a free-text query.
+
+        Args:
+            query (str): Words to look for; an empty query matches everything
+
+        Returns:
+            list: Positions of the matching items, in list order
+        """
+        terms = TOKEN_PATTERN.findall((query or "").lower())
+        if not terms:
+            return list(range(self.size))
+
+        result = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            matches = self._prefix_matches(term)
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+        return sorted(result)
@@ -0,0 +1,262 @@
+"""
+Pre-fork extraction server.
+
+Loads and warms up the extraction pipeline (`nlp_json.warmup`) once in a
+parent process and forks worker processes that serve HTTP requests from a
+shared listening socket. Workers inherit the loaded pipeline copy-on-write
+instead of each loading `en_core_web_trf` on its own. With --no-preload each
+worker warms up in the background after the fork and reports ready once done.
+
+spaCy vocabularies only grow (see managed_pipeline). A worker forked from a
+preloaded parent exits once a pipeline has added VOCAB_MAX_NEW_STRINGS
+strings, after finishing its current request, and the parent forks a fresh
+copy of the pristine pipeline; reloading in place would give the worker a
+private copy of the model. Workers without preload reload in place.
+
+Usage:
+    python prefork_server.py --workers 4 --port 8601
+    python prefork_server.py --workers 4 --memory-report
+    python prefork_server.py --workers 4 --no-preload --memory-report
+
+Endpoints:
+    POST /extract    {"text": "..."}  -> extracted travel details
+    POST /itinerary  {"text": "..."}  -> structured itinerary JSON
+    GET  /memory                      -> memory stats of the answering worker
+    GET  /ready                       -> 200 with warm-up timings once warmed up, 503 before
+    GET  /vocab                       -> vocabulary growth of the answering worker's pipelines
+"""
+import argparse
+import gc
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Representative request sent by the memory report
+WARMUP_TEXT = "Trip from Mumbai to Goa from 3-13th april 2025 for 2 adults, budget 50000 rupees"
+
+# Module holding the pipeline, populated by preload() in the parent or in each worker
+_app = None
+# Seconds per warm-up step, reported by /ready
+_warmup = None
+_preload_lock = threading.Lock()
+
+
+def preload():
+    """
+    Import the extraction module, which loads the spaCy pipeline, and run its
+    warm-up so models, gazetteers, dateparser data and the extractor regexes
+    are all initialized before the first request (and, in the parent, before
+    forking).
+
+    Returns:
+        module: The loaded `nlp_json` module
+    """
+    global _app, _warmup
+    with _preload_lock:
+        if _app is None:
+            import nlp_json
+            _warmup = nlp_json.warmup()
+            _app = nlp_json
+    return _app
+
+
+def read_memory_stats(pid=None):
+    """
+    Read the memory footprint of a process from /proc/<pid>/smaps_rollup.
+
+    Args:
+        pid (int, optional): Process id. Defaults to the current process.
+
+    Returns:
+        dict: RSS, PSS, USS (private clean + dirty) and shared sizes in MB,
+              or an empty dict when the information is not available
+    """
+    pid = pid or os.getpid()
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].endswith(":") and parts[2] == "kB":
+                    fields[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return {}
+
+    def mb(kb):
+        return round(kb / 1024, 1)
+
+    return {
+        "pid": pid,
+        "rss_mb": mb(fields.get("Rss", 0)),
+        "pss_mb": mb(fields.get("Pss", 0)),
+        "uss_mb": mb(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+        "shared_mb": mb(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)),
+    }
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/memory":
+            self._send_json(read_memory_stats())
+        elif self.path == "/ready":
+            # Never blocks on preload(), so load balancers can poll while a worker warms up
+            if _app is None:
+                self._send_json({"ready": False, "pid": os.getpid()}, status=503)
+            else:
+                self._send_json({"ready": True, "pid": os.getpid(), "warmup": _warmup})
+        elif self.path == "/vocab":
+            if _app is None:
+                self._send_json({"error": "Not ready", "pid": os.getpid()}, status=503)
+            else:
+                self._send_json({"pid": os.getpid(),
+                                 "pipelines": [pipeline.stats() for pipeline in _app.managed_pipelines()]})
+        else:
+            self._send_json({"error": "Not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            text = json.loads(self.rfile.read(length) or b"{}").get("text", "")
+        except ValueError:
+            self._send_json({"error": "Invalid JSON body"}, status=400)
+            return
+        if not text:
+            self._send_json({"error": "Missing 'text'"}, status=400)
+            return
+
+        app = preload()
+        if self.path == "/extract":
+            self._send_json(app.extract_details(text))
+        elif self.path == "/itinerary":
+            self._send_json(app.extract_itinerary_json(text))
+        else:
+            self._send_json({"error": "Not found"}, status=404)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"[worker {os.getpid()}] {format % args}\n")
+
+
+def _worker_loop(server):
+    # Objects frozen by the parent stay untouched by the collector in the child
+    gc.enable()
+    signal.signal(signal.SIGTERM, lambda signum, frame: os._exit(0))
+    if _app is None:
+        # Not preloaded: warm up while already answering /ready with 503
+        threading.Thread(target=preload, daemon=True).start()
+    else:
+        # Exit instead of reloading once a vocabulary outgrows its limit; the parent
+        # forks a replacement. shutdown() waits for serve_forever, so it needs its own thread.
+        for pipeline in _app.managed_pipelines():
+            pipeline.on_limit = lambda: threading.Thread(target=server.shutdown, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def spawn_worker(server):
+    pid = os.fork()
+    if pid == 0:
+        _worker_loop(server)
+    return pid
+
+
+def print_memory_report(title, pids):
+    print(f"\n{title}")
+    print(f"{'pid':>8} {'rss_mb':>10} {'pss_mb':>10} {'uss_mb':>10} {'shared_mb':>10}")
+    total_uss = 0
+    for pid in pids:
+        stats = read_memory_stats(pid)
+        if not stats:
+            print(f"{pid:>8} {'n/a':>10}")
+            continue
+        total_uss += stats["uss_mb"]
+        print(f"{pid:>8} {stats['rss_mb']:>10} {stats['pss_mb']:>10} {stats['uss_mb']:>10} {stats['shared_mb']:>10}")
+    print(f"Total unique (USS) across processes: {round(total_uss, 1)} MB")
+
+
+def run_memory_report(host, port, pids, requests_per_worker=3):
+    """
+    Print per-worker memory before and after each worker has served requests.
+    Requests are sent to the shared socket, so the kernel spreads them across
+    the workers.
+    """
+    print_memory_report("Before requests (right after fork)", [os.getpid()] + pids)
+
+    url = f"http://{host}:{port}/extract"
+    body = json.dumps({"text": WARMUP_TEXT}).encode("utf-8")
+    for _ in range(requests_per_worker * len(pids)):
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=300) as response:
+            response.read()
+
+    print_memory_report("After requests", [os.getpid()] + pids)
+
+
+def serve(host="127.0.0.1", port=8601, workers=2, use_preload=True, memory_report=False):
+    if use_preload:
+        # Keep the collector from moving freshly loaded objects between
+        # generations, then freeze them so children never write to their pages
+        gc.disable()
+        preload()
+        gc.freeze()
+        print(f"Warmed up in {_warmup['total']:.1f} s: {json.dumps(_warmup)}")
+
+    server = HTTPServer((host, port), ExtractionHandler)
+    pids = [spawn_worker(server) for _ in range(workers)]
+    print(f"Serving on http://{host}:{port} with {workers} workers (preload={'on' if use_preload else 'off'})")
+
+    def shutdown(signum, frame):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    if memory_report:
+        run_memory_report(host, port, pids)
+        shutdown(None, None)
+
+    # Replace workers that exit, whether recycled or crashed
+    while True:
+        pid, _ = os.wait()
+        if pid in pids:
+            pids[pids.index(pid)] = spawn_worker(server)
+            time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork travel extraction server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8601)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Load the pipeline separately in every worker (for comparison)")
+    parser.add_argument("--memory-report", action="store_true",
+                        help="Print per-worker memory before and after serving requests, then exit")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, not args.no_preload, args.memory_report)
+
+
+if __name__ == "__main__":
+    main()
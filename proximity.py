@@ -0,0 +1,122 @@
+"""
+Distance checks between the places of a generated itinerary.
+
+`generate_prompt` asks for dining "within walking distance" of each day's
+hotel and attractions. After `geocoder.geocode_itinerary` has placed the
+items, `check_proximity` verifies it: every restaurant is matched against a
+KD-tree of the accommodations and attractions (one query per restaurant
+instead of every pair), and every day's restaurants against that day's own
+hotel and sights, then anything farther than the walking threshold is
+flagged.
+
+Items whose coordinates are only the destination fallback or a town
+centroid ("approximate_location") are reported without a distance rather
+than being flagged, since their real position is unknown. Only POIs give
+exact positions, and the repository ships no POI file (see geocoder), so
+with the default data nothing is measured; `run_plan_pipeline` skips the
+check unless `geocoder.has_exact_positions` finds something to measure.
+"""
+import numpy as np
+
+from geocoder import KDTree, chord_to_km, is_exactly_placed, normalize_name, to_xyz
+
+WALKING_DISTANCE_KM = 1.5
+
+
+def _located(items):
+    # Items with real (not fallback or centroid) coordinates, plus their unit vectors
+    located = [item for item in items or [] if is_exactly_placed(item)]
+    points = to_xyz([item["lat"] for item in located], [item["lon"] for item in located]).reshape(-1, 3)
+    return located, points
+
+
+def _names(items):
+    # Normalized names, computed once and matched against every day's text
+    return [(item, f" {normalize_name(item['name'])} ") for item in items
+            if isinstance(item, dict) and item.get("name")]
+
+
+def _mentioned(names, text):
+    # Items whose name appears in a day's free text
+    text = f" {normalize_name(text)} "
+    return [item for item, name in names if name in text]
+
+
+def _day_text(day):
+    meals = day.get("meals") or {}
+    parts = [day.get(slot) for slot in ("morning", "afternoon", "evening")] + list(meals.values())
+    return " ".join(str(part) for part in parts if part)
+
+
+def _nearest(point, anchors, anchor_points):
+    # Closest anchor to one point by brute force; a day has only a handful of anchors
+    distances = chord_to_km(np.linalg.norm(anchor_points - point, axis=1))
+    best = int(np.argmin(distances))
+    return anchors[best].get("name", ""), float(distances[best])
+
+
+def _entry(item, nearest, distance, threshold_km):
+    if distance is None:
+        return {"name": item.get("name", ""), "nearest": None, "distance_km": None, "far": False}
+    return {"name": item.get("name", ""), "nearest": nearest, "distance_km": round(distance, 2),
+            "far": distance > threshold_km}
+
+
+def check_proximity(itinerary, threshold_km=WALKING_DISTANCE_KM):
+    """
+    Measure how far each dining suggestion is from the places it should be near.
+
+    Args:
+        itinerary (dict): Itinerary with geocoded accommodations, attractions and dining
+        threshold_km (float): Distance above which a restaurant is flagged
+
+    Returns:
+        dict: "dining" (each restaurant's nearest hotel or attraction),
+              "days" (per day: restaurants mentioned that day against the
+              day's hotel and attractions), "far" (names of flagged
+              restaurants) and "threshold_km"
+    """
+    accommodations = itinerary.get("accommodations") or []
+    attractions = itinerary.get("attractions") or []
+    dining = itinerary.get("dining") or []
+    anchors, anchor_points = _located(list(accommodations) + list(attractions))
+    anchor_ids = {id(item): i for i, item in enumerate(anchors)}
+    dining_located, dining_points = _located(dining)
+    dining_ids = {id(item): i for i, item in enumerate(dining_located)}
+    tree = KDTree.build(anchor_points) if len(anchors) else None
+    accommodation_names, attraction_names, dining_names = _names(accommodations), _names(attractions), _names(dining)
+
+    # Nearest hotel or attraction of every restaurant in one batched query
+    if tree is not None:
+        chords, nearest_ids = tree.query_nearest(dining_points)
+        distances = chord_to_km(chords)
+    overall = []
+    for item in dining:
+        i = dining_ids.get(id(item))
+        if tree is None or i is None:
+            overall.append(_entry(item, None, None, threshold_km))
+            continue
+        overall.append(_entry(item, anchors[nearest_ids[i]].get("name", ""), float(distances[i]), threshold_km))
+
+    days = []
+    hotels = []
+    for day in itinerary.get("days") or []:
+        # "Same as Day 1." keeps the previous night's hotel
+        day_text = _day_text(day)
+        hotels = _mentioned(accommodation_names, day.get("accommodation") or "") or hotels
+        day_anchors = hotels + _mentioned(attraction_names, day_text)
+        day_anchors = [item for item in day_anchors if id(item) in anchor_ids]
+        entries = []
+        for item in _mentioned(dining_names, day_text):
+            i = dining_ids.get(id(item))
+            if i is None or not day_anchors:
+                entries.append(_entry(item, None, None, threshold_km))
+                continue
+            day_points = anchor_points[[anchor_ids[id(anchor)] for anchor in day_anchors]]
+            nearest, distance = _nearest(dining_points[i], day_anchors, day_points)
+            entries.append(_entry(item, nearest, distance, threshold_km))
+        days.append({"day_number": day.get("day_number"), "dining": entries})
+
+    far = sorted({entry["name"] for entry in overall if entry["far"]}
+                 | {entry["name"] for day in days for entry in day["dining"] if entry["far"]})
+    return {"dining": overall, "days": days, "far": far, "threshold_km": threshold_km}
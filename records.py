@@ -0,0 +1,402 @@
+"""
+Compact typed records for extracted travel details and parsed itineraries.
+
+`extract_details` and `extract_itinerary_json` produce plain nested dicts.
+Batch jobs that hold tens of thousands of itineraries can convert them into
+the `__slots__` records below, which drop the per-instance `__dict__`, store
+lists as tuples and intern short repeated labels.
+
+Every record converts back to the original dict shape with `to_dict()`, or
+can be handed to the UI as a read-only `Mapping` with `as_mapping()`, which
+reads the record's slots on access instead of copying them. Nested records
+come back as views too; `serialization.dumps` encodes a view directly, and
+`to_dict()` on a view copies it for the standard `json` module.
+"""
+import sys
+from collections.abc import Mapping, Sequence
+
+
+def _intern(value):
+    # Short labels such as meal types and units repeat across every itinerary
+    if isinstance(value, str) and len(value) <= 32:
+        return sys.intern(value)
+    return value
+
+
+def _view(value):
+    if isinstance(value, Record):
+        return RecordView(value)
+    if isinstance(value, tuple):
+        return TupleView(value)
+    return value
+
+
+def _plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Record:
+    """
+    Base class for slot-based records.
+
+    Subclasses list `_keys` as (dict key, slot name) pairs in output order.
+    Slots holding None are treated as absent, matching the original dicts,
+    which omit fields that were not found. Keys outside `_keys` are kept in
+    `extra` so converting back to a dict is lossless.
+    """
+    __slots__ = ("extra",)
+    _keys = ()
+
+    def __init__(self, extra=None, **values):
+        for _, slot in self._keys:
+            setattr(self, slot, values.get(slot))
+        self.extra = extra or None
+
+    @classmethod
+    def _extra(cls, data):
+        known = {key for key, _ in cls._keys}
+        return {key: value for key, value in data.items() if key not in known} or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(extra=cls._extra(data), **{slot: data.get(key) for key, slot in cls._keys})
+
+    def get_item(self, key):
+        """Return the value stored for a dict key, raising KeyError if absent."""
+        for item_key, slot in self._keys:
+            if item_key == key:
+                value = getattr(self, slot)
+                if value is not None:
+                    return value
+                break
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def present_keys(self):
+        keys = [key for key, slot in self._keys if getattr(self, slot) is not None]
+        return keys + list(self.extra or ())
+
+    def to_dict(self):
+        return {key: _plain(self.get_item(key)) for key in self.present_keys()}
+
+    def as_mapping(self):
+        return RecordView(self)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.extra == other.extra and all(
+            getattr(self, slot) == getattr(other, slot) for _, slot in self._keys
+        )
+
+    def __repr__(self):
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for _, slot in self._keys if getattr(self, slot) is not None)
+        return f"{type(self).__name__}({fields})"
+
+
+class RecordView(Mapping):
+    """Read-only dict-shaped view over a record; nested records are wrapped on access."""
+    __slots__ = ("_record",)
+
+    def __init__(self, record):
+        self._record = record
+
+    def __getitem__(self, key):
+        return _view(self._record.get_item(key))
+
+    def __iter__(self):
+        return iter(self._record.present_keys())
+
+    def __len__(self):
+        return len(self._record.present_keys())
+
+    def to_dict(self):
+        """Copy into plain dicts and lists, e.g. for `json.dumps`."""
+        return self._record.to_dict()
+
+    def __repr__(self):
+        return f"RecordView({self._record!r})"
+
+
+class TupleView(Sequence):
+    """Read-only list-shaped view over a tuple of records."""
+    __slots__ = ("_items",)
+
+    def __init__(self, items):
+        self._items = items
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TupleView(self._items[index])
+        return _view(self._items[index])
+
+    def __len__(self):
+        return len(self._items)
+
+
+class TravelDetails(Record):
+    """Details extracted from a trip description by `extract_details`."""
+    __slots__ = ("starting_location", "destination", "trip_duration", "start_date", "end_date",
+                 "adults", "children", "infants", "transportation_preferences", "budget_range",
+                 "trip_type", "accommodation_preferences", "special_requirements")
+    _keys = (
+        ("Starting Location", "starting_location"),
+        ("Destination", "destination"),
+        ("Trip Duration", "trip_duration"),
+        ("Start Date", "start_date"),
+        ("End Date", "end_date"),
+        ("Number of Travelers", "travelers"),
+        ("Transportation Preferences", "transportation_preferences"),
+        ("Budget Range", "budget_range"),
+        ("Trip Type", "trip_type"),
+        ("Accommodation Preferences", "accommodation_preferences"),
+        ("Special Requirements", "special_requirements"),
+    )
+
+    def __init__(self, travelers=None, extra=None, **values):
+        for _, slot in self._keys:
+            if slot != "travelers":
+                setattr(self, slot, values.get(slot))
+        self.travelers = travelers
+        self.extra = extra or None
+
+    @property
+    def travelers(self):
+        if self.adults is None:
+            return None
+        return {"Adults": self.adults, "Children": self.children, "Infants": self.infants}
+
+    @travelers.setter
+    def travelers(self, value):
+        value = value or {}
+        self.adults = value.get("Adults")
+        self.children = value.get("Children", 0)
+        self.infants = value.get("Infants", 0)
+
+    @classmethod
+    def from_dict(cls, data):
+        values = {slot: data.get(key) for key, slot in cls._keys}
+        for slot in ("transportation_preferences", "trip_type", "accommodation_preferences"):
+            if isinstance(values[slot], list):
+                values[slot] = tuple(_intern(item) for item in values[slot])
+        return cls(extra=cls._extra(data), **values)
+
+
+class Meal(Record):
+    """A dining recommendation from the itinerary's `dining` list."""
+    __slots__ = ("name", "description", "cuisine", "price_range", "meal_type")
+    _keys = (
+        ("name", "name"),
+        ("description", "description"),
+        ("cuisine", "cuisine"),
+        ("price_range", "price_range"),
+        ("meal_type", "meal_type"),
+    )
+
+    @classmethod
+    def from_dict(cls, data):
+        meal = super().from_dict(data)
+        meal.meal_type = _intern(meal.meal_type)
+        return meal
+
+
+class Attraction(Record):
+    __slots__ = ("name", "description", "visit_duration")
+    _keys = (
+        ("name", "name"),
+        ("description", "description"),
+        ("visit_duration", "visit_duration"),
+    )
+
+
+class Accommodation(Record):
+    __slots__ = ("name", "description", "price_range")
+    _keys = (
+        ("name", "name"),
+        ("description", "description"),
+        ("price_range", "price_range"),
+    )
+
+
+class TransportOption(Record):
+    __slots__ = ("type", "details")
+    _keys = (
+        ("type", "type"),
+        ("details", "details"),
+    )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(extra=cls._extra(data), type=_intern(data.get("type")), details=data.get("details"))
+
+
+class DayMeals(Record):
+    __slots__ = ("breakfast", "lunch", "dinner")
+    _keys = (
+        ("breakfast", "breakfast"),
+        ("lunch", "lunch"),
+        ("dinner", "dinner"),
+    )
+
+
+class DayPlan(Record):
+    """One entry of the itinerary's `days` list."""
+    __slots__ = ("day_number", "date", "title", "morning", "afternoon", "evening",
+                 "meals", "accommodation", "activities")
+    _keys = (
+        ("day_number", "day_number"),
+        ("date", "date"),
+        ("title", "title"),
+        ("morning", "morning"),
+        ("afternoon", "afternoon"),
+        ("evening", "evening"),
+        ("meals", "meals"),
+        ("accommodation", "accommodation"),
+        ("activities", "activities"),
+    )
+
+    @classmethod
+    def from_dict(cls, data):
+        day = super().from_dict(data)
+        if isinstance(day.meals, dict):
+            day.meals = DayMeals.from_dict(day.meals)
+        if day.activities is not None:
+            day.activities = tuple(day.activities)
+        return day
+
+
+class CostItem(Record):
+    """A priced line item of a budget summary; `label_key` is "name" or "type"."""
+    __slots__ = ("label_key", "label", "min", "max", "currency", "meal_type")
+    _keys = (
+        ("label", "label"),
+        ("min", "min"),
+        ("max", "max"),
+        ("currency", "currency"),
+        ("meal_type", "meal_type"),
+    )
+
+    def __init__(self, label_key="name", **values):
+        super().__init__(**values)
+        self.label_key = _intern(label_key)
+
+    @classmethod
+    def from_dict(cls, data):
+        label_key = "type" if "type" in data and "name" not in data else "name"
+        extra = {key: value for key, value in data.items()
+                 if key not in (label_key, "min", "max", "currency", "meal_type")} or None
+        return cls(label_key=label_key, extra=extra, label=data.get(label_key), min=data.get("min"),
+                   max=data.get("max"), currency=_intern(data.get("currency")),
+                   meal_type=_intern(data.get("meal_type")))
+
+    def get_item(self, key):
+        return super().get_item("label" if key == self.label_key else key)
+
+    def present_keys(self):
+        return [self.label_key if key == "label" else key for key in super().present_keys()]
+
+
+class BudgetSummary(Record):
+    """Output of `extract_budget_summary`."""
+    __slots__ = ("accommodation_costs", "dining_costs", "transportation_costs", "attraction_costs",
+                 "category_totals", "daily_totals", "totals_by_currency", "total_min", "total_max", "currency")
+    _cost_keys = ("accommodation_costs", "dining_costs", "transportation_costs", "attraction_costs")
+    _keys = tuple((key, key) for key in _cost_keys) + (
+        ("category_totals", "category_totals"),
+        ("daily_totals", "daily_totals"),
+        ("totals_by_currency", "totals_by_currency"),
+        ("estimated_total", "estimated_total"),
+    )
+
+    def __init__(self, estimated_total=None, extra=None, **values):
+        for _, slot in self._keys[:-1]:
+            setattr(self, slot, values.get(slot))
+        self.estimated_total = estimated_total
+        self.extra = extra or None
+
+    @property
+    def estimated_total(self):
+        total = {"min": self.total_min, "max": self.total_max, "currency": self.currency}
+        return {key: value for key, value in total.items() if value is not None} or None
+
+    @estimated_total.setter
+    def estimated_total(self, value):
+        value = value or {}
+        self.total_min = value.get("min")
+        self.total_max = value.get("max")
+        self.currency = _intern(value.get("currency"))
+
+    @classmethod
+    def from_dict(cls, data):
+        values = {key: tuple(CostItem.from_dict(item) for item in data[key]) if data.get(key) is not None else None
+                  for key in cls._cost_keys}
+        for key in ("category_totals", "daily_totals", "totals_by_currency"):
+            values[key] = data.get(key)
+        if values["daily_totals"] is not None:
+            values["daily_totals"] = tuple(values["daily_totals"])
+        return cls(estimated_total=data.get("estimated_total"), extra=cls._extra(data), **values)
+
+
+class TripOverview(Record):
+    """The itinerary's `trip_overview`; other keys are kept in `extra`."""
+    __slots__ = ("title", "destination", "start_date", "end_date", "duration_days", "trip_type",
+                 "budget_range", "budget_summary")
+    _keys = (
+        ("title", "title"),
+        ("destination", "destination"),
+        ("start_date", "start_date"),
+        ("end_date", "end_date"),
+        ("duration_days", "duration_days"),
+        ("trip_type", "trip_type"),
+        ("budget_range", "budget_range"),
+        ("budget_summary", "budget_summary"),
+    )
+
+    @classmethod
+    def from_dict(cls, data):
+        overview = super().from_dict(data)
+        if isinstance(overview.budget_summary, dict):
+            overview.budget_summary = BudgetSummary.from_dict(overview.budget_summary)
+        return overview
+
+
+class Itinerary(Record):
+    """A parsed itinerary as produced by `extract_itinerary_json`."""
+    __slots__ = ("trip_overview", "days", "attractions", "accommodations", "dining",
+                 "transportation", "travel_tips", "weather", "budget", "essential_info")
+    _keys = (
+        ("trip_overview", "trip_overview"),
+        ("days", "days"),
+        ("attractions", "attractions"),
+        ("accommodations", "accommodations"),
+        ("dining", "dining"),
+        ("transportation", "transportation"),
+        ("travel_tips", "travel_tips"),
+        ("weather", "weather"),
+        ("budget", "budget"),
+        ("essential_info", "essential_info"),
+    )
+    _item_types = {
+        "days": DayPlan,
+        "attractions": Attraction,
+        "accommodations": Accommodation,
+        "dining": Meal,
+        "transportation": TransportOption,
+    }
+
+    @classmethod
+    def from_dict(cls, data):
+        values = {}
+        for key, slot in cls._keys:
+            value = data.get(key)
+            if key in cls._item_types and value is not None:
+                value = tuple(cls._item_types[key].from_dict(item) for item in value)
+            elif key == "travel_tips" and value is not None:
+                value = tuple(value)
+            elif key == "trip_overview" and isinstance(value, dict):
+                value = TripOverview.from_dict(value)
+            values[slot] = value
+        return cls(extra=cls._extra(data), **values)
@@ -0,0 +1,268 @@
+"""
+Group geocoded attractions into days and order each day's visits.
+
+`extract_attractions` lists attractions in the order the text mentions
+them, so consecutive visits can be on opposite sides of a city. The
+optimizer works on the coordinates `geocoder.geocode_itinerary` adds:
+
+1. k-means++ on the attractions' unit vectors splits them into one cluster
+   per day (vectorized Lloyd iterations), followed by a capacity-limited
+   assignment so no day gets more than its share.
+2. Each day is routed from the hotel and back (or as an open path when no
+   hotel is placed) with nearest-neighbor construction and 2-opt, where all
+   candidate segment reversals of a pass are scored as one NumPy matrix.
+
+`apply_attraction_days` writes the chosen order into the itinerary's own
+days. Only exactly placed attractions (POI matches, see geocoder) take
+part, so with the default data, which has no POI file, there is nothing to
+plan and `run_plan_pipeline` skips the optimizer.
+
+With 150 attractions over 10 days this takes a few milliseconds.
+"""
+import math
+
+import numpy as np
+
+from geocoder import chord_to_km, is_exactly_placed, to_xyz
+
+KMEANS_ITERATIONS = 50
+TWO_OPT_PASSES = 100
+
+
+def distance_matrix(points):
+    """Great-circle distances in km between every pair of unit vectors."""
+    return chord_to_km(np.linalg.norm(points[:, np.newaxis, :] - points[np.newaxis, :, :], axis=2))
+
+
+def kmeans(points, k, rng, iterations=KMEANS_ITERATIONS):
+    """
+    Cluster points into k groups.
+
+    Args:
+        points (np.ndarray): (n, 3) unit vectors
+        k (int): Number of clusters, at most n
+        rng (np.random.Generator): Seeds the k-means++ initialization
+        iterations (int): Maximum Lloyd iterations
+
+    Returns:
+        np.ndarray: (k, 3) cluster centers
+    """
+    centers = [points[rng.integers(len(points))]]
+    closest = np.sum((points - centers[0]) ** 2, axis=1)
+    for _ in range(1, k):
+        # k-means++: pick the next center with probability proportional to squared distance
+        total = closest.sum()
+        choice = rng.choice(len(points), p=closest / total) if total > 0 else rng.integers(len(points))
+        centers.append(points[choice])
+        closest = np.minimum(closest, np.sum((points - points[choice]) ** 2, axis=1))
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(iterations):
+        dist = np.sum((points[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2, axis=2)
+        new_labels = np.argmin(dist, axis=1)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, points)
+        empty = counts == 0
+        centers[~empty] = sums[~empty] / counts[~empty, np.newaxis]
+        if empty.any():
+            # Restart empty clusters at the points farthest from their center
+            farthest = np.argsort(dist[np.arange(len(points)), labels])[::-1][:empty.sum()]
+            centers[empty] = points[farthest]
+    return centers
+
+
+def balanced_assignment(points, centers, capacity):
+    """
+    Assign each point to a center without exceeding capacity per center.
+
+    Point-center pairs are taken closest first, so points keep their nearest
+    center unless it is already full.
+
+    Returns:
+        np.ndarray: Center index per point
+    """
+    dist = np.sum((points[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2, axis=2)
+    labels = np.full(len(points), -1)
+    load = np.zeros(len(centers), dtype=np.int64)
+    for flat in np.argsort(dist, axis=None):
+        point, center = divmod(int(flat), len(centers))
+        if labels[point] < 0 and load[center] < capacity:
+            labels[point] = center
+            load[center] += 1
+    return labels
+
+
+def route_length(route, dist):
+    return float(dist[route[:-1], route[1:]].sum())
+
+
+def nearest_neighbor_route(dist, start=0):
+    """Visit every node greedily from start and return to it; returns the closed route."""
+    unvisited = np.ones(len(dist), dtype=bool)
+    route = [start]
+    unvisited[start] = False
+    while unvisited.any():
+        candidates = np.where(unvisited, dist[route[-1]], np.inf)
+        route.append(int(np.argmin(candidates)))
+        unvisited[route[-1]] = False
+    route.append(start)
+    return np.array(route)
+
+
+def two_opt(route, dist, passes=TWO_OPT_PASSES):
+    """
+    Improve a closed route by reversing segments while that shortens it.
+
+    Each pass scores every reversal route[i:j + 1] at once: the change in
+    length is dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d] for the
+    edges (a, b) before and (c, d) after the segment. The endpoints stay
+    fixed.
+
+    Returns:
+        np.ndarray: The improved route
+    """
+    route = route.copy()
+    n = len(route)
+    if n < 5:
+        return route
+    upper = np.triu(np.ones((n - 2, n - 2), dtype=bool), k=1)
+    for _ in range(passes):
+        before, first, after = route[:-2], route[1:-1], route[2:]
+        delta = (dist[before[:, np.newaxis], first[np.newaxis, :]] + dist[first[:, np.newaxis], after[np.newaxis, :]]
+                 - dist[before, first][:, np.newaxis] - dist[first, after][np.newaxis, :])
+        delta = np.where(upper, delta, np.inf)
+        i, j = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[i, j] >= -1e-9:
+            break
+        route[i + 1:j + 2] = route[i + 1:j + 2][::-1]
+    return route
+
+
+def order_stops(points, start=None):
+    """
+    Order the stops of one day.
+
+    Args:
+        points (np.ndarray): (n, 3) unit vectors of the stops
+        start (np.ndarray): Unit vector of the hotel the day starts and ends
+                            at; None for an open path
+
+    Returns:
+        tuple: (stop indices in visiting order, length in km)
+    """
+    if start is not None:
+        nodes = np.vstack([start[np.newaxis, :], points])
+        dist = distance_matrix(nodes)
+    else:
+        # A depot at zero distance from every stop turns the open path into a closed tour
+        dist = np.zeros((len(points) + 1, len(points) + 1))
+        dist[1:, 1:] = distance_matrix(points)
+    route = two_opt(nearest_neighbor_route(dist), dist)
+    return route[1:-1] - 1, route_length(route, dist)
+
+
+def _placed(items):
+    return [i for i, item in enumerate(items) if is_exactly_placed(item)]
+
+
+def _hotel_point(itinerary):
+    accommodations = itinerary.get("accommodations") or []
+    placed = _placed(accommodations)
+    if not placed:
+        return None
+    hotel = accommodations[placed[0]]
+    return to_xyz(hotel["lat"], hotel["lon"])
+
+
+def plan_attraction_days(itinerary, n_days=None, seed=0):
+    """
+    Split the itinerary's geocoded attractions into days and order each day.
+
+    Args:
+        itinerary (dict): Itinerary after `geocoder.geocode_itinerary`
+        n_days (int): Number of days; defaults to the itinerary's day count
+        seed (int): Seed for the k-means++ initialization
+
+    Returns:
+        dict: "days" (per day: "day_number", "date", ordered "attractions"
+              and "distance_km"), "total_distance_km", "text_order_distance_km"
+              (the same days filled in text order, for comparison) and
+              "unplaced" (attractions without real coordinates)
+    """
+    attractions = itinerary.get("attractions") or []
+    days = itinerary.get("days") or []
+    placed = _placed(attractions)
+    placed_set = set(placed)
+    unplaced = [item.get("name", "") if isinstance(item, dict) else str(item)
+                for i, item in enumerate(attractions) if i not in placed_set]
+    n_days = max(1, min(n_days or len(days) or 1, len(placed) or 1))
+    result = {"days": [], "total_distance_km": 0.0, "text_order_distance_km": 0.0, "unplaced": unplaced}
+    if not placed:
+        return result
+
+    items = [attractions[i] for i in placed]
+    points = to_xyz([item["lat"] for item in items], [item["lon"] for item in items]).reshape(-1, 3)
+    hotel = _hotel_point(itinerary)
+    capacity = math.ceil(len(items) / n_days)
+
+    centers = kmeans(points, n_days, np.random.default_rng(seed))
+    labels = balanced_assignment(points, centers, capacity)
+    # Days follow the order of their first attraction in the text
+    first_seen = {}
+    for position, label in enumerate(labels):
+        first_seen.setdefault(int(label), position)
+
+    for number, label in enumerate(sorted(first_seen, key=first_seen.get), start=1):
+        members = np.nonzero(labels == label)[0]
+        order, length = order_stops(points[members], hotel)
+        day = days[number - 1] if number <= len(days) else {}
+        result["days"].append({
+            "day_number": day.get("day_number", number),
+            "date": day.get("date", ""),
+            "attractions": [items[members[i]] for i in order],
+            "distance_km": round(length, 2),
+        })
+        result["total_distance_km"] += length
+
+    for begin in range(0, len(items), capacity):
+        chunk = points[begin:begin + capacity]
+        nodes = chunk if hotel is None else np.vstack([hotel[np.newaxis, :], chunk, hotel[np.newaxis, :]])
+        result["text_order_distance_km"] += float(distance_matrix(nodes)[np.arange(len(nodes) - 1),
+                                                                        np.arange(1, len(nodes))].sum())
+    result["total_distance_km"] = round(result["total_distance_km"], 2)
+    result["text_order_distance_km"] = round(result["text_order_distance_km"], 2)
+    return result
+
+
+def apply_attraction_days(itinerary, routes):
+    """
+    Write a route plan into the itinerary's own days.
+
+    Each itinerary day with a planned route gets its attractions' names in
+    visiting order as "attraction_order" and the route length as
+    "attraction_distance_km". The days' free text (morning, afternoon,
+    evening) was written by the model and is left as it is.
+
+    Args:
+        itinerary (dict): The itinerary `plan_attraction_days` planned
+        routes (dict): Its result
+
+    Returns:
+        dict: A shallow copy of the itinerary with updated day copies
+    """
+    planned = {day["day_number"]: day for day in routes.get("days") or []}
+    if not planned:
+        return itinerary
+    days = []
+    for number, day in enumerate(itinerary.get("days") or [], start=1):
+        route = planned.get(day.get("day_number", number)) if isinstance(day, dict) else None
+        if route is not None:
+            day = dict(day, attraction_order=[item.get("name", "") for item in route["attractions"]],
+                       attraction_distance_km=route["distance_km"])
+        days.append(day)
+    return dict(itinerary, days=days)
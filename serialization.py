@@ -0,0 +1,135 @@
+"""
+Serialization helpers for itinerary output.
+
+Pretty-printed JSON (indent=2) stays the default for files people read. The
+compact mode drops indentation and separator whitespace, `orjson` is used as
+the encoder when it is installed, files ending in `.gz` are gzip-compressed,
+and `JsonLinesWriter` streams many itineraries into one file without holding
+them all in memory.
+
+Run `python benchmarks/bench_serialization.py` to compare output size and
+encode time against the pretty printer.
+"""
+import gzip
+import json
+from collections.abc import Mapping, Sequence
+
+try:
+    import orjson
+except ImportError:  # Optional speedup
+    orjson = None
+
+from records import Record
+
+
+def _default(value):
+    # Records and record views serialize as the dict shape they stand for
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (Sequence, set)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(data, compact=False, fast=True):
+    """
+    Encode data as UTF-8 JSON bytes.
+
+    Args:
+        data: Itinerary dict, record or any JSON-compatible structure
+        compact (bool): Drop indentation and whitespace between separators
+        fast (bool): Use orjson when it is installed
+
+    Returns:
+        bytes: The encoded JSON
+    """
+    if fast and orjson is not None:
+        option = 0 if compact else orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, default=_default, option=option)
+        except TypeError:
+            pass  # e.g. non-string dict keys, which the standard encoder accepts
+    return dumps(data, compact=compact, fast=False).encode("utf-8")
+
+
+def dumps(data, compact=False, fast=True):
+    """Encode data as a JSON string; see `dumps_bytes` for the arguments."""
+    if fast and orjson is not None:
+        return dumps_bytes(data, compact=compact).decode("utf-8")
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default)
+    return json.dumps(data, ensure_ascii=False, indent=2, default=_default)
+
+
+def save_json(data, output_file, compact=False, compress=None):
+    """
+    Write data to a JSON file.
+
+    Args:
+        data: Itinerary dict, record or any JSON-compatible structure
+        output_file (str): Destination path
+        compact (bool): Write compact instead of pretty-printed JSON
+        compress (bool, optional): Gzip the output. Defaults to True when
+                                   output_file ends with ".gz".
+
+    Returns:
+        str: The path written
+    """
+    if compress is None:
+        compress = output_file.endswith(".gz")
+    payload = dumps_bytes(data, compact=compact)
+    opener = gzip.open if compress else open
+    with opener(output_file, "wb") as f:
+        f.write(payload)
+    return output_file
+
+
+def load_json(input_file):
+    """Read a JSON file written by `save_json`, gzip-compressed or not."""
+    opener = gzip.open if input_file.endswith(".gz") else open
+    with opener(input_file, "rb") as f:
+        payload = f.read()
+    return orjson.loads(payload) if orjson is not None else json.loads(payload)
+
+
+class JsonLinesWriter:
+    """
+    Stream itineraries into a JSON Lines file, one compact document per line.
+
+    Usage:
+        with JsonLinesWriter("itineraries.jsonl.gz") as writer:
+            for itinerary in itineraries:
+                writer.write(itinerary)
+    """
+
+    def __init__(self, output_file, compress=None):
+        if compress is None:
+            compress = output_file.endswith(".gz")
+        self.output_file = output_file
+        self.count = 0
+        self._file = gzip.open(output_file, "wb") if compress else open(output_file, "wb")
+
+    def write(self, data):
+        self._file.write(dumps_bytes(data, compact=True))
+        self._file.write(b"\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_json_lines(input_file):
+    """Yield the documents of a file written by `JsonLinesWriter` one at a time."""
+    opener = gzip.open if input_file.endswith(".gz") else open
+    with opener(input_file, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line) if orjson is not None else json.loads(line)
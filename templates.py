@@ -0,0 +1,382 @@
+"""
+HTML templates for the itinerary views.
+
+Every card used by `display_itinerary_tabs` (nlp_json.py) and dashboard.py is
+a `CardTemplate` compiled once at import time. Field values are HTML-escaped
+on substitution, and the section builders below join all cards of a section
+into one string so each section is sent to the browser as a single
+`st.markdown` element instead of one element per card.
+
+Collapsible items use `<details>` instead of `st.expander`, so a list of days
+or restaurants stays inside that one element, and card styling lives in CSS
+classes (`stylesheet()`) rather than inline on every card.
+
+Run `python benchmarks/bench_templates.py` to compare rerun time and payload
+with one `st.markdown` call per card.
+"""
+import html
+from string import Template
+from urllib.parse import quote_plus
+
+NOT_SPECIFIED = "Not specified"
+
+
+class Markup(str):
+    """Already-rendered HTML that `escape` passes through unchanged."""
+    __slots__ = ()
+
+
+def escape(value, default=NOT_SPECIFIED):
+    """
+    Escape a value for insertion into HTML.
+
+    Args:
+        value: Any value; None and "" are replaced by default
+        default (str): Text shown for missing values
+
+    Returns:
+        Markup: The escaped text
+    """
+    if isinstance(value, Markup):
+        return value
+    if value is None or value == "":
+        value = default
+    return Markup(html.escape(str(value)))
+
+
+class CardTemplate:
+    """
+    A `string.Template` compiled once, with whitespace stripped.
+
+    Indentation and blank lines are removed when the template is built: they
+    are noise in the payload, and indented lines after a blank line would be
+    read by the markdown renderer as a code block once cards are joined.
+    """
+    __slots__ = ("template", "defaults")
+
+    def __init__(self, source, **defaults):
+        compact = "".join(line.strip() for line in source.strip().splitlines())
+        self.template = Template(compact)
+        self.defaults = defaults
+
+    def render(self, **fields):
+        values = dict(self.defaults, **fields)
+        return Markup(self.template.substitute({key: escape(value, default="") for key, value in values.items()}))
+
+    def render_all(self, items):
+        """Render one card per field mapping and join them."""
+        return join(self.render(**fields) for fields in items)
+
+
+def join(fragments):
+    return Markup("".join(fragments))
+
+
+# Shared card styles, injected once per page by `stylesheet()` instead of inline on every card
+STYLESHEET = """
+<style>
+.itin-title { text-align: center; }
+.itin-grid { display: grid; gap: 1rem; }
+.itin-cols-2 { grid-template-columns: repeat(2, minmax(0, 1fr)); }
+.itin-cols-3 { grid-template-columns: repeat(3, minmax(0, 1fr)); }
+.itin-card { padding: 1rem; border-radius: 10px; margin: 0.5rem 0; }
+.itin-card h3 { margin: 0; }
+.itin-card h3 ~ h3 { margin-top: 1rem; }
+.itin-card .itin-large { font-size: 1.2rem; }
+.itin-wide { padding: 1.5rem; margin-top: 2rem; }
+.itin-blue { background-color: #E3F2FD; } .itin-blue h3 { color: #1E88E5; }
+.itin-orange { background-color: #FFF3E0; } .itin-orange h3 { color: #EF6C00; }
+.itin-green { background-color: #E8F5E9; } .itin-green h3 { color: #43A047; }
+.itin-purple { background-color: #F3E5F5; } .itin-purple h3 { color: #8E24AA; }
+.itin-sky { background-color: #E1F5FE; } .itin-sky h3 { color: #0288D1; }
+.itin-grey { background-color: #F5F5F5; } .itin-grey h3 { color: #424242; }
+.itin-details { border: 1px solid rgba(49, 51, 63, 0.2); border-radius: 8px; padding: 0.5rem 1rem; margin: 0.5rem 0; }
+.itin-details summary { cursor: pointer; font-weight: 600; }
+.itin-booking { display: grid; grid-template-columns: 3fr 1fr; gap: 1rem; }
+.itin-book-button { display: inline-block; padding: 0.5rem 1rem; background-color: #1E88E5; color: white !important;
+                    text-decoration: none; border-radius: 5px; margin: 0.5rem 0; font-weight: bold; }
+</style>
+"""
+
+
+def stylesheet():
+    """The CSS for the itinerary cards; emit once per page, before the sections."""
+    return Markup("".join(line.strip() for line in STYLESHEET.strip().splitlines()))
+
+
+SECTION_TITLE = CardTemplate("<h2 class='itin-title'>$title</h2>")
+SUBTITLE = CardTemplate("<h3 style='color: $color;'>$title</h3>", color="#1E88E5")
+GRID = CardTemplate("<div class='itin-grid itin-cols-$columns'>$cells</div>")
+CELL = CardTemplate("<div>$body</div>")
+DETAILS = CardTemplate("""
+    <details class='itin-details'$open>
+        <summary>$summary</summary>
+        $body
+    </details>
+""", open="")
+BULLETS = CardTemplate("<ul>$items</ul>")
+BULLET = CardTemplate("<li>$text</li>")
+
+# Overview section
+OVERVIEW_CARD = CardTemplate("""
+    <div class='itin-card itin-$color'>
+        <h3>$title</h3>
+        <p class='itin-large'>$value</p>
+    </div>
+""")
+DATES_CARD = CardTemplate("""
+    <div class='itin-card itin-orange'>
+        <h3>📅 Travel Dates</h3>
+        <p><b>Start:</b> $start</p>
+        <p><b>End:</b> $end</p>
+    </div>
+""")
+WEATHER_CARD = CardTemplate("""
+    <div class='itin-card itin-wide itin-sky'>
+        <h3>🌤️ Weather Information</h3>
+        $body
+    </div>
+""", body="")
+WEATHER_DETAILS = CardTemplate("""
+    <p><b>Temperature:</b> $min°$unit to $max°$unit</p>
+    <p><b>Conditions:</b> $conditions</p>
+    <p><b>What to Wear:</b> $clothing</p>
+""")
+BEST_TIME_CARD = CardTemplate("""
+    <div class='itin-card itin-wide itin-grey'>
+        <h3>📅 Best Time to Visit</h3>
+        <p>$value</p>
+    </div>
+""")
+
+# Itinerary section
+DAY_ACTIVITIES_CARD = CardTemplate("""
+    <div class='itin-card itin-blue'>
+        <h3>Morning</h3>
+        <p>$morning</p>
+        <h3>Afternoon</h3>
+        <p>$afternoon</p>
+        <h3>Evening</h3>
+        <p>$evening</p>
+    </div>
+""")
+DAY_MEALS_CARD = CardTemplate("""
+    <div class='itin-card itin-orange'>
+        <h3>Meals</h3>
+        <p><b>Breakfast:</b> $breakfast</p>
+        <p><b>Lunch:</b> $lunch</p>
+        <p><b>Dinner:</b> $dinner</p>
+    </div>
+""")
+DAY_ACCOMMODATION_CARD = CardTemplate("""
+    <div class='itin-card itin-green'>
+        <h3>Accommodation</h3>
+        <p>$accommodation</p>
+    </div>
+""")
+
+# Accommodation, dining and attraction sections
+ACCOMMODATION_CARD = CardTemplate("""
+    <div class='itin-booking'>
+        <div class='itin-card itin-blue'>
+            <p><b>Price Range:</b> $price_range</p>
+            <p><b>Description:</b> $description</p>
+        </div>
+        <div>
+            <div style='text-align: center;'><a class='itin-book-button' href="$booking_url" target="_blank">🏨 Book Now</a></div>
+            <div class='itin-card itin-green'>
+                <p>✓ Direct booking available</p>
+                <p>✓ Best price guarantee</p>
+                <p>✓ Free cancellation</p>
+            </div>
+        </div>
+    </div>
+""")
+DINING_CARD = CardTemplate("""
+    <div class='itin-card itin-orange'>
+        <p><b>Cuisine:</b> $cuisine</p>
+        <p><b>Price Range:</b> $price_range</p>
+        <p><b>Meal Type:</b> $meal_type</p>
+    </div>
+""")
+ATTRACTION_CARD = CardTemplate("""
+    <div class='itin-card itin-green'>
+        <p><b>Description:</b> $description</p>
+        <p><b>Visit Duration:</b> $visit_duration</p>
+    </div>
+""")
+
+# Budget and essential info sections
+BUDGET_CARD = CardTemplate("<div class='itin-card itin-$color'>$rows</div>")
+BUDGET_ROW = CardTemplate("<h3>$label</h3><p$style>$value</p>", style="")
+INFO_CARD = CardTemplate("""
+    <div class='itin-card itin-$color'>
+        <h3>$title</h3>
+        $rows
+    </div>
+""")
+INFO_ROW = CardTemplate("<p><b>$label:</b> $value</p>")
+
+# dashboard.py cards, styled by the classes in its stylesheet
+MAIN_HEADER = CardTemplate('<div class="main-header">$title</div>')
+SECTION_HEADER = CardTemplate('<div class="section-header">$title</div>')
+CLASS_CARD = CardTemplate('<div class="info-card"$style>$body</div>', style="")
+PARAGRAPH = CardTemplate("<p>$text</p>")
+HIGHLIGHT_ROW = CardTemplate('<p><span class="highlight">$label:</span> $value</p>')
+LABELED_BULLET = CardTemplate("<li><strong>$label:</strong> $value</li>")
+COUNTDOWN_CARD = CardTemplate("""
+    <div class="info-card" style="text-align: center;">
+        <h1>$days days</h1>
+        <p>$message</p>
+    </div>
+""")
+CONVERSION_CARD = CardTemplate("""
+    <div class="info-card" style="text-align: center;">
+        <h2>$amount $from_currency = $converted $to_currency</h2>
+    </div>
+""")
+ATTRACTION_ENTRY = CardTemplate("""
+    <div style="margin-bottom: 15px;">
+        <p><strong>$name</strong>$cost<br>$description</p>
+    </div>
+""")
+
+
+def _field(item, key, default=NOT_SPECIFIED):
+    # .get(key, default) keeps explicit empty strings, which the old views showed as blanks
+    return item.get(key, default)
+
+
+def overview_html(itinerary_json):
+    """Overview section: destination, duration, dates, budget, weather, best time."""
+    overview = itinerary_json.get("trip_overview", {})
+    days = itinerary_json.get("days", [])
+    if days:
+        start_date = days[0].get("date", NOT_SPECIFIED)
+        end_date = days[-1].get("date", NOT_SPECIFIED)
+    else:
+        start_date = overview.get("start_date", NOT_SPECIFIED)
+        end_date = overview.get("end_date", NOT_SPECIFIED)
+
+    first_column = join([
+        OVERVIEW_CARD.render(color="blue", title="🌍 Destination",
+                             value=_field(overview, "destination")),
+        OVERVIEW_CARD.render(color="green", title="⏱️ Duration",
+                             value=f"{_field(overview, 'duration_days')} days"),
+    ])
+    columns = [
+        CELL.render(body=first_column),
+        CELL.render(body=DATES_CARD.render(start=start_date, end=end_date)),
+        CELL.render(body=OVERVIEW_CARD.render(color="purple", title="💰 Budget Range",
+                                              value=_field(overview, "budget_range"))),
+    ]
+
+    weather = itinerary_json.get("weather", {})
+    temp_range = weather.get("temperature_range", {}) if weather else {}
+    weather_body = ""
+    if temp_range:
+        weather_body = WEATHER_DETAILS.render(
+            min=temp_range.get("min"), max=temp_range.get("max"), unit=temp_range.get("unit", "C"),
+            conditions=_field(weather, "conditions"), clothing=_field(weather, "clothing_recommendations"),
+        )
+
+    return join([
+        SECTION_TITLE.render(title="Trip Overview"),
+        GRID.render(columns=3, cells=join(columns)),
+        WEATHER_CARD.render(body=weather_body),
+        BEST_TIME_CARD.render(value=_field(itinerary_json.get("essential_info", {}), "best_time_to_visit")),
+    ])
+
+
+def day_html(day, expanded=False):
+    """One collapsible day of the itinerary."""
+    meals = day.get("meals", {})
+    body = join([
+        DAY_ACTIVITIES_CARD.render(
+            morning=_field(day, "morning", "No activities specified"),
+            afternoon=_field(day, "afternoon", "No activities specified"),
+            evening=_field(day, "evening", "No activities specified"),
+        ),
+        DAY_MEALS_CARD.render(breakfast=_field(meals, "breakfast"), lunch=_field(meals, "lunch"),
+                              dinner=_field(meals, "dinner")),
+        DAY_ACCOMMODATION_CARD.render(accommodation=_field(day, "accommodation")),
+    ])
+    return DETAILS.render(summary=f"Day {day.get('day_number')} - {day.get('title', '')}", body=body,
+                          open=Markup(" open") if expanded else "")
+
+
+def days_html(days):
+    return join(day_html(day) for day in days)
+
+
+def accommodation_html(acc):
+    name = acc.get("name", "")
+    return DETAILS.render(summary=acc.get("name", "Unnamed Accommodation"), body=ACCOMMODATION_CARD.render(
+        price_range=_field(acc, "price_range"),
+        description=_field(acc, "description", "No description available"),
+        booking_url=f"https://www.booking.com/search.html?ss={quote_plus(name)}",
+    ))
+
+
+def dining_html(restaurant):
+    return DETAILS.render(summary=restaurant.get("name", "Unnamed Restaurant"), body=DINING_CARD.render(
+        cuisine=_field(restaurant, "cuisine"),
+        price_range=_field(restaurant, "price_range"),
+        meal_type=_field(restaurant, "meal_type"),
+    ))
+
+
+def attraction_html(attraction):
+    return DETAILS.render(summary=attraction.get("name", "Unnamed Attraction"), body=ATTRACTION_CARD.render(
+        description=_field(attraction, "description", "No description available"),
+        visit_duration=_field(attraction, "visit_duration"),
+    ))
+
+
+def list_section_html(title, items, render_item):
+    """Section title followed by one collapsible card per item."""
+    return join([SECTION_TITLE.render(title=title)] + [render_item(item) for item in items])
+
+
+def budget_html(budget):
+    """Budget section: estimated costs in two cards."""
+    def card(color, rows):
+        rendered = [BUDGET_ROW.render(label=label, value=_field(budget, key), style=Markup(style))
+                    for label, key, style in rows]
+        return CELL.render(body=BUDGET_CARD.render(color=color, rows=join(rendered)))
+
+    return join([
+        SECTION_TITLE.render(title="Budget Breakdown"),
+        GRID.render(columns=2, cells=join([
+            card("blue", [("Total Cost", "total_estimated_cost", " class='itin-large'"),
+                          ("Accommodation", "accommodation_cost", ""),
+                          ("Food", "food_cost", "")]),
+            card("orange", [("Transportation", "transportation_cost", ""),
+                            ("Activities", "activities_cost", ""),
+                            ("Miscellaneous", "miscellaneous_cost", "")]),
+        ])),
+    ])
+
+
+def essential_info_html(itinerary_json):
+    """Essential info section: travel tips and two information cards."""
+    essential_info = itinerary_json.get("essential_info", {})
+
+    def card(color, title, rows):
+        rendered = [INFO_ROW.render(label=label, value=_field(essential_info, key)) for label, key in rows]
+        return CELL.render(body=INFO_CARD.render(color=color, title=title, rows=join(rendered)))
+
+    tips = itinerary_json.get("travel_tips", [])
+    return join([
+        SECTION_TITLE.render(title="Essential Information"),
+        SUBTITLE.render(title="💡 Travel Tips"),
+        BULLETS.render(items=BULLET.render_all({"text": tip} for tip in tips)),
+        GRID.render(columns=2, cells=join([
+            card("blue", "📋 Important Information",
+                 [("🛂 Visa", "visa_requirements"), ("🆘 Emergency", "emergency_contacts"),
+                  ("🏺 Local Customs", "local_customs")]),
+            card("orange", "🔍 Additional Information",
+                 [("🛡️ Safety", "safety_tips"), ("🗣️ Language", "language"),
+                  ("💱 Currency", "currency_exchange")]),
+        ])),
+    ])
@@ -0,0 +1,41 @@
+from gazetteer import Gazetteer, build_gazetteer
+
+CITIES = [
+    {"name": "Kyoto", "population": 1459640},
+    {"name": "Zürich", "population": 341730},
+    {"name": "Smallville", "population": 900},
+]
+COUNTRIES = [{"name": "Japan", "population": 126000000}]
+
+
+def build():
+    return build_gazetteer(min_population=15000, extra_names=["Bali"], cities=CITIES, countries=COUNTRIES)
+
+
+def test_lookup():
+    gazetteer = build()
+    assert gazetteer["kyoto"] == {"name": "Kyoto", "source": "geonames_city", "population": 1459640}
+    assert gazetteer["zürich"]["name"] == "Zürich"
+    assert gazetteer["bali"] == {"name": "Bali", "source": "common_destination", "population": None}
+    assert "smallville" not in gazetteer
+    assert "kyo" not in gazetteer
+
+
+def test_mapping_methods():
+    gazetteer = build()
+    assert sorted(gazetteer.keys()) == ["bali", "japan", "kyoto", "zürich"]
+    as_dict = dict(gazetteer)
+    assert as_dict["japan"]["source"] == "geonames_country"
+    assert gazetteer == as_dict
+    assert dict(gazetteer.items()) == as_dict
+
+
+def test_exclude_and_countries():
+    gazetteer = build_gazetteer(min_population=0, cities=CITIES, countries=(), exclude=["kyoto"])
+    assert sorted(gazetteer) == ["smallville", "zürich"]
+
+
+def test_empty():
+    gazetteer = Gazetteer([])
+    assert len(gazetteer) == 0
+    assert dict(gazetteer) == {}
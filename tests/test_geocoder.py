@@ -0,0 +1,43 @@
+import json
+
+import geocoder
+from geocoder import KIND_POI, Geocoder, load_geocoder
+
+POIS = [
+    {"name": "Fushimi Inari Taisha", "lat": 34.9671, "lon": 135.7727, "country": "JP"},
+    {"name": "Kinkaku-ji", "lat": 35.0394, "lon": 135.7292, "country": "JP"},
+]
+
+
+def write_pois(tmp_path):
+    path = tmp_path / "poi.json"
+    path.write_text(json.dumps(POIS), encoding="utf-8")
+    return str(path)
+
+
+def test_build_loads_poi_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(geocoder, "geonamescache", None)
+    places = Geocoder.build(poi_path=write_pois(tmp_path))
+    assert places.has_pois
+    place = places.geocode("kinkaku ji")
+    assert place.kind == KIND_POI and place.name == "Kinkaku-ji"
+    nearest, km = places.nearest(34.97, 135.77)[0]
+    assert nearest.name == "Fushimi Inari Taisha" and km < 1
+
+
+def test_without_poi_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(geocoder, "geonamescache", None)
+    places = Geocoder.build(poi_path=str(tmp_path / "missing.json"))
+    assert not places.has_pois
+    assert places.geocode("Kinkaku-ji") is None
+
+
+def test_load_geocoder_round_trips_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(geocoder, "geonamescache", None)
+    poi_path = write_pois(tmp_path)
+    built = load_geocoder(poi_path=poi_path, cache_dir=str(tmp_path / "cache"))
+    geocoder._load_geocoder.cache_clear()
+    loaded = load_geocoder(poi_path=poi_path, cache_dir=str(tmp_path / "cache"))
+    assert loaded is not built
+    assert list(loaded.names) == list(built.names)
+    assert loaded.geocode("Fushimi Inari Taisha").kind == KIND_POI
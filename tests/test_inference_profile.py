@@ -0,0 +1,20 @@
+from inference_profile import chunk_text
+
+TEXT = ("Trip from Mumbai to Goa.  Then Hampi!\n\nDay 1: arrive in Panaji and check in.\n"
+        "A very long sentence about beaches, forts, churches and markets that keeps going without a stop")
+
+
+def test_chunks_keep_every_character():
+    for max_chars in (10, 25, 40, 80, 500):
+        chunks = chunk_text(TEXT, max_chars)
+        assert "".join(chunks) == TEXT
+        assert all(0 < len(chunk) <= max_chars for chunk in chunks)
+
+
+def test_breaks_between_sentences():
+    assert chunk_text("One. Two three. Four five six seven.", 12) == ["One. ", "Two three. ", "Four five ", "six seven."]
+
+
+def test_short_and_blank_text():
+    assert chunk_text("Goa", 10) == ["Goa"]
+    assert chunk_text("  \n ", 10) == []
@@ -0,0 +1,48 @@
+import numpy as np
+
+from geocoder import KIND_CITY, KIND_POI, Geocoder, geocode_itinerary, has_exact_positions
+from proximity import check_proximity
+
+PLACES = [
+    ("Baga", 15.5553, 73.7517, "IN", KIND_CITY, 20000),
+    ("Panaji", 15.4909, 73.8278, "IN", KIND_CITY, 114405),
+    ("Fort Aguada", 15.4920, 73.7737, "IN", KIND_POI, 0),
+    ("Sinq Beach Club", 15.4995, 73.7648, "IN", KIND_POI, 0),
+    ("Britto's", 15.5560, 73.7520, "IN", KIND_POI, 0),
+]
+
+
+def make_geocoder(places):
+    names, lat, lon, country, kind, population = zip(*places)
+    return Geocoder(np.array(names), np.array(lat), np.array(lon), np.array(country),
+                    np.array(kind, dtype=np.int8), np.array(population, dtype=np.int64))
+
+
+def itinerary():
+    return {
+        "trip_overview": {"destination": "Panaji, India"},
+        "accommodations": [{"name": "Fort Aguada"}],
+        "attractions": [{"name": "Baga Beach"}],
+        "dining": [{"name": "Sinq Beach Club"}, {"name": "Britto's"}, {"name": "Unknown Cafe"}],
+    }
+
+
+def test_flags_only_exact_positions():
+    placed = geocode_itinerary(itinerary(), make_geocoder(PLACES))
+    # A town centroid and the destination fallback are approximate
+    assert placed["attractions"][0]["approximate_location"]
+    assert placed["dining"][2]["approximate_location"]
+    assert has_exact_positions(placed, ("dining",))
+
+    result = check_proximity(placed)
+    assert result["far"] == ["Britto's"]
+    distances = {entry["name"]: entry["distance_km"] for entry in result["dining"]}
+    assert distances["Sinq Beach Club"] < 1.5
+    assert distances["Unknown Cafe"] is None
+
+
+def test_cities_only_has_no_exact_positions():
+    cities = [place for place in PLACES if place[4] == KIND_CITY]
+    placed = geocode_itinerary(itinerary(), make_geocoder(cities))
+    assert not has_exact_positions(placed)
+    assert check_proximity(placed)["far"] == []
@@ -0,0 +1,44 @@
+from route_optimizer import apply_attraction_days, plan_attraction_days
+
+
+def place(name, lat, lon, **extra):
+    return dict(name=name, lat=lat, lon=lon, **extra)
+
+
+def itinerary():
+    return {
+        "days": [{"day_number": 1, "title": "Arrival"}, {"day_number": 2, "title": "North"}],
+        "accommodations": [place("Hotel", 35.0, 135.75)],
+        "attractions": [
+            place("South A", 34.96, 135.77), place("North A", 35.04, 135.73),
+            place("South B", 34.97, 135.78), place("North B", 35.05, 135.72),
+            place("Centroid", 35.01, 135.76, approximate_location=True),
+        ],
+    }
+
+
+def test_plans_exact_attractions_only():
+    routes = plan_attraction_days(itinerary())
+    assert routes["unplaced"] == ["Centroid"]
+    groups = [sorted(item["name"] for item in day["attractions"]) for day in routes["days"]]
+    assert groups == [["South A", "South B"], ["North A", "North B"]]
+    assert routes["total_distance_km"] <= routes["text_order_distance_km"]
+
+
+def test_apply_writes_order_into_days():
+    source = itinerary()
+    routes = plan_attraction_days(source)
+    applied = apply_attraction_days(source, routes)
+    assert "attraction_order" not in source["days"][0]
+    for day, route in zip(applied["days"], routes["days"]):
+        assert day["attraction_order"] == [item["name"] for item in route["attractions"]]
+        assert day["attraction_distance_km"] == route["distance_km"]
+    assert applied["days"][1]["title"] == "North"
+
+
+def test_nothing_to_plan_without_exact_positions():
+    source = itinerary()
+    source["attractions"] = [dict(item, approximate_location=True) for item in source["attractions"]]
+    routes = plan_attraction_days(source)
+    assert routes["days"] == []
+    assert apply_attraction_days(source, routes) is source